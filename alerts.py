@@ -0,0 +1,297 @@
+# -*- coding: utf-8 -*-
+"""
+告警引擎
+
+每次 refresh_all_funds 得到一批行情后，直接用这批结果评估全部启用的规则，不再查询数据库：
+- 规则在首次评估时从 alert_rules 表加载并编译成索引；规则增删改会使 alert_rules_version 加一，
+  每次评估前比较版本号，其他进程修改的规则也会重新加载
+- 同一指标、同一比较方式、同一基金（或“所有持仓”）的规则按阈值排序，
+  每只基金每个指标只需一次二分查找就能得到全部触发的规则
+- 去重：条件持续成立时只在首次成立时告警；条件解除后再次成立、且距上次告警超过 cooldown 秒才再次告警
+- 告警分发给可插拔的输出（log / webhook / sse），通过 register_sink 扩展
+"""
+
+import json
+import logging
+import math
+import queue
+import threading
+import time
+import urllib.request
+from bisect import bisect_left, bisect_right
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from itertools import repeat
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 基金级指标：rate 涨跌幅（%）、profit 当日盈亏（元）、fail_streak 连续获取失败次数
+FUND_METRICS = ('rate', 'profit', 'fail_streak')
+# 组合级指标：total_profit 当日总盈亏、total_rate 总收益率（%）、drawdown 当日总盈亏自高点的回撤（元）
+PORTFOLIO_METRICS = ('total_profit', 'total_rate', 'drawdown')
+METRICS = FUND_METRICS + PORTFOLIO_METRICS
+# abs> 表示绝对值大于阈值（如涨跌幅超过 ±2%）
+OPS = ('>', '>=', '<', '<=', 'abs>')
+
+
+def _matched(op: str, thresholds: List[float], value: float) -> slice:
+    """thresholds 升序排列，返回满足 “value op 阈值” 的阈值下标区间"""
+    if op == '>':
+        return slice(0, bisect_left(thresholds, value))
+    if op == '>=':
+        return slice(0, bisect_right(thresholds, value))
+    if op == '<':
+        return slice(bisect_right(thresholds, value), len(thresholds))
+    if op == '<=':
+        return slice(bisect_left(thresholds, value), len(thresholds))
+    return slice(0, bisect_left(thresholds, abs(value)))
+
+
+def describe(alert: Dict) -> str:
+    """告警的可读描述"""
+    target = f"基金 {alert['code']} {alert.get('fund_name') or ''}".rstrip() if alert['code'] else '组合'
+    return f"{alert.get('name') or '告警'}：{target} {alert['metric']}={alert['value']:.2f} {alert['op']} {alert['threshold']:g}"
+
+
+# ================= 输出 =================
+
+class LogSink:
+    """写入应用日志"""
+
+    def send(self, alert: Dict, rule: Dict) -> None:
+        logger.warning('[告警] %s', describe(alert))
+
+
+class WebhookSink:
+    """POST JSON 到规则的 webhook_url（未设置时用默认地址）；在后台线程发送，不阻塞评估"""
+
+    def __init__(self, default_url: Optional[str] = None, timeout: float = 5):
+        self.default_url = default_url
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='alert-webhook')
+
+    def send(self, alert: Dict, rule: Dict) -> None:
+        url = rule.get('webhook_url') or self.default_url
+        if url:
+            self._executor.submit(self._post, url, alert)
+
+    def _post(self, url: str, alert: Dict) -> None:
+        body = json.dumps(dict(alert, message=describe(alert)), ensure_ascii=False).encode('utf-8')
+        req = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                response.read()
+        except Exception as exc:
+            logger.warning('告警 webhook 发送失败 %s: %s', url, exc)
+
+
+class SSESink:
+    """推送给 /api/alerts/stream 的订阅者；订阅者消费过慢时丢弃其积压的告警"""
+
+    def __init__(self, backlog: int = 100):
+        self.backlog = backlog
+        self._subscribers = set()
+        self._lock = threading.Lock()
+
+    def subscribe(self) -> queue.Queue:
+        q = queue.Queue(maxsize=self.backlog)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q: queue.Queue) -> None:
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def send(self, alert: Dict, rule: Dict) -> None:
+        data = json.dumps(dict(alert, message=describe(alert)), ensure_ascii=False)
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(data)
+            except queue.Full:
+                pass
+
+
+# ================= 引擎 =================
+
+class AlertEngine:
+    """告警引擎（Flask 扩展风格）"""
+
+    def __init__(self):
+        self._app = None
+        self._lock = threading.RLock()
+        self._rules = {}  # rule_id -> 规则字典
+        self._index = None  # metric -> {code 或 None: [(op, 阈值升序, 规则 id)]}
+        self._version = None  # 已加载规则对应的 alert_rules_version
+        self._active = set()  # 上一批中条件成立的 (rule_id, code)
+        self._last_fired = {}  # (rule_id, code) -> 上次告警的时间戳
+        self._fail_streak = {}  # code -> 连续失败次数
+        self._peak = (None, None)  # (日期, 当日总盈亏最高值)
+        self.sinks = {}
+        self.recent = deque(maxlen=200)
+        self.enabled = False
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('ALERTS_ENABLED', True)
+        self.recent = deque(maxlen=app.config.get('ALERT_RECENT_LIMIT', 200))
+        self.sse = SSESink()
+        self.register_sink('log', LogSink())
+        self.register_sink('webhook', WebhookSink(app.config.get('ALERT_WEBHOOK_URL'),
+                                                  app.config.get('REQUEST_TIMEOUT', 5)))
+        self.register_sink('sse', self.sse)
+        app.extensions['alert_engine'] = self
+
+    def register_sink(self, name: str, sink) -> None:
+        """注册告警输出：sink 需实现 send(alert, rule)"""
+        self.sinks[name] = sink
+
+    def invalidate(self) -> None:
+        """规则变更后调用，下次评估时重新加载"""
+        with self._lock:
+            self._index = None
+
+    def load(self, rules: List[Dict]) -> None:
+        """编译规则（AlertRule.to_dict() 格式，只取启用的）"""
+        groups = {}
+        for rule in rules:
+            if not rule.get('enabled', True):
+                continue
+            code = rule.get('code') if rule['metric'] in FUND_METRICS else None
+            groups.setdefault((rule['metric'], code, rule['op']), []).append((rule['threshold'], rule['id']))
+
+        index = {}
+        for (metric, code, op), items in groups.items():
+            items.sort()
+            index.setdefault(metric, {}).setdefault(code, []).append(
+                (op, [t for t, _ in items], [rid for _, rid in items])
+            )
+
+        with self._lock:
+            self._rules = {r['id']: r for r in rules if r.get('enabled', True)}
+            self._index = index
+            # 已删除/停用规则的状态一并清理
+            self._active = {p for p in self._active if p[0] in self._rules}
+            self._last_fired = {p: t for p, t in self._last_fired.items() if p[0] in self._rules}
+
+    def _ensure_loaded(self) -> None:
+        """规则未加载或版本号变化时从数据库重新加载；未绑定应用时（直接调用 load）不检查版本号"""
+        if self._app is None:
+            return
+        from database import db
+        from models import AlertRule, AlertRulesVersion
+        # 版本号先于规则读取：两次读取之间有修改时记录的是旧版本号，下次评估会再次加载
+        version = db.session.query(AlertRulesVersion.version).filter(AlertRulesVersion.id == 1).scalar() or 0
+        if self._index is not None and version == self._version:
+            return
+        self.load([r.to_dict() for r in AlertRule.query.filter_by(enabled=True).all()])
+        self._version = version
+
+    def _match(self, metric: str, code: Optional[str], value: float, triggered: Dict) -> None:
+        """把满足条件的 (rule_id, code) -> value 写入 triggered"""
+        by_code = self._index.get(metric)
+        if not by_code or value is None or (isinstance(value, float) and math.isnan(value)):
+            return
+        keys = (code, None) if code is not None else (None,)
+        for key in keys:
+            for op, thresholds, rule_ids in by_code.get(key, ()):
+                matched = rule_ids[_matched(op, thresholds, value)]
+                if matched:
+                    triggered.update(zip(zip(matched, repeat(code)), repeat(value)))
+
+    def evaluate(self, results: List[Dict], now: Optional[float] = None) -> List[Dict]:
+        """用一批刷新结果（refresh_all_funds 的返回格式）评估全部规则，返回本次触发的告警"""
+        if not self.enabled:
+            return []
+        now = time.time() if now is None else now
+        with self._lock:
+            self._ensure_loaded()
+            if self._index is None or not self._rules:
+                return []
+
+            # (rule_id, code) -> 指标值；组合级规则的 code 为 None
+            triggered = {}
+            failed = set()
+            total_profit = total_amount = 0.0
+            for r in results:
+                code = r['code']
+                if r.get('success'):
+                    self._fail_streak[code] = 0
+                    self._match('rate', code, r.get('rate'), triggered)
+                    self._match('profit', code, r.get('profit'), triggered)
+                    total_profit += r.get('profit') or 0.0
+                    total_amount += r.get('amount') or 0.0
+                else:
+                    failed.add(code)
+                    self._fail_streak[code] = self._fail_streak.get(code, 0) + 1
+                self._match('fail_streak', code, self._fail_streak[code], triggered)
+
+            quoted = len(failed) < len(results)
+            if quoted:
+                today = date.today()
+                peak_day, peak = self._peak
+                if peak_day != today or total_profit > peak:
+                    peak = total_profit
+                    self._peak = (today, peak)
+                self._match('total_profit', None, total_profit, triggered)
+                self._match('total_rate', None, total_profit / total_amount * 100 if total_amount else 0.0, triggered)
+                self._match('drawdown', None, peak - total_profit, triggered)
+
+            fund_names = {r['code']: r.get('name') for r in results if r.get('success')}
+            alerts = []
+            # 只有本批新成立的条件才可能告警，持续成立的条件不再逐条检查
+            for pair in triggered.keys() - self._active:
+                rid, code = pair
+                value = triggered[pair]
+                rule = self._rules[rid]
+                if now - self._last_fired.get(pair, -math.inf) < (rule.get('cooldown') or 0):
+                    continue
+                self._last_fired[pair] = now
+                alerts.append((rule, {
+                    'rule_id': rid,
+                    'name': rule.get('name'),
+                    'metric': rule['metric'],
+                    'op': rule['op'],
+                    'threshold': rule['threshold'],
+                    'code': code,
+                    'fund_name': fund_names.get(code) if code else None,
+                    'value': value,
+                    'time': datetime.fromtimestamp(now).isoformat(timespec='seconds')
+                }))
+
+            # 本批获取失败的基金无法判断涨跌类规则是否解除，沿用上一批的状态
+            active = set(triggered)
+            if failed:
+                active.update(p for p in self._active if p[1] in failed
+                              and self._rules[p[0]]['metric'] != 'fail_streak')
+            if not quoted:
+                active.update(p for p in self._active if p[1] is None)
+            self._active = active
+            self.recent.extend(alert for _, alert in alerts)
+
+        for rule, alert in alerts:
+            self._dispatch(rule, alert)
+        return [alert for _, alert in alerts]
+
+    def _dispatch(self, rule: Dict, alert: Dict) -> None:
+        for name in rule.get('sinks') or ('log',):
+            sink = self.sinks.get(name)
+            if sink is None:
+                continue
+            try:
+                sink.send(alert, rule)
+            except Exception:
+                logger.exception('告警输出 %s 失败', name)
+
+    def get_recent(self, limit: int = 50) -> List[Dict]:
+        """最近触发的告警（新的在前）"""
+        with self._lock:
+            items = list(self.recent)
+        return items[::-1][:limit]
+
+
+alert_engine = AlertEngine()
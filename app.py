@@ -4,14 +4,20 @@
 """
 
 import os
-from flask import Flask, render_template
+from flask import Flask
 from config import config
-from database import init_db
-from routes import api_bp
 
 
 def create_app(config_name='default'):
     """应用工厂函数"""
+    # 数据库、服务与路由模块在创建应用时才导入：只导入 app 模块（如命令行、进程预加载）时保持轻量
+    from alerts import alert_engine
+    from assets import asset_pipeline
+    from database import init_db
+    from directory import fund_directory
+    from routes import api_bp
+    from services import FundAPIService
+
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
@@ -21,14 +27,18 @@ def create_app(config_name='default'):
     
     # 初始化数据库
     init_db(app)
+    alert_engine.init_app(app)
+    fund_directory.init_app(app)
+    FundAPIService.init_app(app)
+    asset_pipeline.init_app(app)
     
     # 注册路由
     app.register_blueprint(api_bp)
     
-    # 主页路由
+    # 主页路由：页面骨架带 ETag，样式与脚本为带指纹的静态资源（见 assets.py）
     @app.route('/')
     def index():
-        return render_template('index.html')
+        return asset_pipeline.render_page('index.html')
     
     return app
 
@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+"""
+前端静态资源
+
+templates/index.html 只保留页面骨架，样式与脚本放在 static/src 下，首次请求时构建：
+- 去掉注释与多余空白，按内容的 sha256 生成带指纹的文件名（如 dashboard.3f2a9c1e07b4.css）
+- 预先生成 gzip 与 brotli（安装了 brotli 包时）版本，请求时按 Accept-Encoding 直接返回，不在请求中压缩
+- 带指纹的资源内容不会变化，以 Cache-Control: immutable 缓存一年；
+  页面骨架带 ETag，每次访问只做一次条件请求，未变化时返回 304
+开启 ASSETS_AUTO_RELOAD 时（修改前端时使用）源文件修改后自动重新构建。
+"""
+
+import gzip
+import hashlib
+import os
+import threading
+from typing import Dict, Optional
+
+from flask import Response, abort, render_template, request
+
+try:
+    import brotli
+except ImportError:  # 可选依赖：未安装时只提供 gzip
+    brotli = None
+
+CONTENT_TYPES = {
+    '.css': 'text/css',
+    '.js': 'text/javascript',
+    '.html': 'text/html'
+}
+
+
+# ================= 压缩 =================
+
+def _is_word(c: str) -> bool:
+    return c.isalnum() or c in '_$' or ord(c) > 127
+
+
+def minify_css(source: str) -> str:
+    """去掉注释，合并空白，删除 { } ; , > 两侧与 : 之后的空白；字符串原样保留"""
+    out = []
+    i, n = 0, len(source)
+    while i < n:
+        c = source[i]
+        if c in '"\'':
+            j = i + 1
+            while j < n and source[j] != c:
+                j += 2 if source[j] == '\\' else 1
+            out.append(source[i:j + 1])
+            i = j + 1
+        elif source.startswith('/*', i):
+            end = source.find('*/', i + 2)
+            i = n if end == -1 else end + 2
+        elif c.isspace():
+            while i < n and source[i].isspace():
+                i += 1
+            nxt = source[i] if i < n else ''
+            if out and out[-1][-1] not in '{};,>:' and nxt not in '{};,>' and nxt:
+                out.append(' ')
+        else:
+            out.append(c)
+            i += 1
+    return ''.join(out).strip()
+
+
+# 其后出现的 / 是正则字面量而不是除号
+_JS_REGEX_AFTER = set('(,=:[!&|?{};+-*%<>~^')
+_JS_REGEX_KEYWORDS = {'return', 'typeof', 'instanceof', 'in', 'of', 'new', 'delete', 'void', 'throw', 'case', 'yield', 'await'}
+
+
+class _JSMinifier:
+    """保守的 JS 压缩：去掉注释、缩进、行内多余空白与空行。
+
+    保留换行，不改变自动分号插入的结果；字符串、模板字符串（含嵌套的 ${...}）与正则字面量原样保留。
+    """
+
+    def __init__(self, source: str):
+        self.src = source
+        self.out = []
+        self.last = ''  # 最近输出的非空白字符
+        self.word = ''  # 最近输出的标识符/关键字
+
+    def run(self) -> str:
+        self._code(0, nested=False)
+        return ''.join(self.out).strip() + '\n'
+
+    def _emit(self, text: str) -> None:
+        self.out.append(text)
+        if text.strip():
+            self.last = text.rstrip()[-1]
+
+    def _code(self, i: int, nested: bool) -> int:
+        """扫描代码直到结尾（nested 时直到与 ${ 配对的 }），返回结束位置"""
+        src, n = self.src, len(self.src)
+        depth = 0
+        while i < n:
+            c = src[i]
+            if c in '"\'':
+                j = i + 1
+                while j < n and src[j] != c and src[j] != '\n':
+                    j += 2 if src[j] == '\\' else 1
+                self._emit(src[i:j + 1])
+                self.word = ''
+                i = j + 1
+            elif c == '`':
+                i = self._template(i)
+            elif src.startswith('//', i):
+                end = src.find('\n', i)
+                i = n if end == -1 else end
+            elif src.startswith('/*', i):
+                end = src.find('*/', i + 2)
+                comment = src[i:n if end == -1 else end]
+                i = n if end == -1 else end + 2
+                self._space('\n' if '\n' in comment else ' ', i)
+            elif c == '/' and (not self.last or self.last in _JS_REGEX_AFTER or self.word in _JS_REGEX_KEYWORDS):
+                i = self._regex(i)
+            elif c.isspace():
+                j = i
+                while j < n and src[j].isspace():
+                    j += 1
+                self._space(src[i:j], j)
+                i = j
+            else:
+                if nested:
+                    if c == '{':
+                        depth += 1
+                    elif c == '}':
+                        if depth == 0:
+                            return i
+                        depth -= 1
+                if _is_word(c):
+                    j = i
+                    while j < n and _is_word(src[j]):
+                        j += 1
+                    self.word = src[i:j]
+                    self._emit(self.word)
+                    i = j
+                    continue
+                self.word = ''
+                self._emit(c)
+                i += 1
+        return i
+
+    def _space(self, ws: str, nxt_pos: int) -> None:
+        """空白：含换行时保留一个换行，否则只在两侧都是标识符（或 + +、- -）时保留一个空格"""
+        if not self.out:
+            return
+        prev = self.out[-1][-1]
+        nxt = self.src[nxt_pos] if nxt_pos < len(self.src) else ''
+        if '\n' in ws:
+            if prev != '\n':
+                self.out.append('\n')
+        elif prev != '\n' and nxt and ((_is_word(prev) and _is_word(nxt)) or (prev == nxt and prev in '+-')):
+            self.out.append(' ')
+
+    def _template(self, i: int) -> int:
+        src, n = self.src, len(self.src)
+        start = i
+        i += 1
+        while i < n and src[i] != '`':
+            if src[i] == '\\':
+                i += 2
+            elif src.startswith('${', i):
+                self._emit(src[start:i + 2])
+                i = self._code(i + 2, nested=True)
+                start = i
+                i += 1
+            else:
+                i += 1
+        self._emit(src[start:i + 1])
+        self.word = ''
+        return i + 1
+
+    def _regex(self, i: int) -> int:
+        src, n = self.src, len(self.src)
+        j = i + 1
+        in_class = False
+        while j < n and src[j] != '\n':
+            if src[j] == '\\':
+                j += 2
+                continue
+            if src[j] == '[':
+                in_class = True
+            elif src[j] == ']':
+                in_class = False
+            elif src[j] == '/' and not in_class:
+                break
+            j += 1
+        j += 1
+        while j < n and src[j].isalpha():
+            j += 1
+        self._emit(src[i:j])
+        self.word = ''
+        return j
+
+
+def minify_js(source: str) -> str:
+    return _JSMinifier(source).run()
+
+
+MINIFIERS = {
+    '.css': minify_css,
+    '.js': minify_js
+}
+
+
+# ================= 资源 =================
+
+class Asset:
+    """构建好的资源：按内容生成的指纹与各编码的预压缩内容"""
+
+    def __init__(self, name: str, data: bytes):
+        base, ext = os.path.splitext(name)
+        self.digest = hashlib.sha256(data).hexdigest()[:12]
+        self.filename = f"{base}.{self.digest}{ext}"
+        self.content_type = CONTENT_TYPES.get(ext, 'application/octet-stream')
+        self.bodies = {'identity': data}
+        compressed = {'gzip': gzip.compress(data, 9, mtime=0)}
+        if brotli is not None:
+            compressed['br'] = brotli.compress(data, quality=11)
+        for encoding, body in compressed.items():
+            # 很小的文件压缩后可能反而更大
+            if len(body) < len(data):
+                self.bodies[encoding] = body
+
+    def response(self, cache_control: str) -> Response:
+        """按 Accept-Encoding 返回预压缩版本（br 优先），支持 If-None-Match 条件请求"""
+        encoding = next((e for e in ('br', 'gzip') if e in self.bodies and request.accept_encodings[e]), 'identity')
+        resp = Response(self.bodies[encoding], mimetype=self.content_type)
+        if encoding != 'identity':
+            resp.headers['Content-Encoding'] = encoding
+        resp.headers['Vary'] = 'Accept-Encoding'
+        resp.headers['Cache-Control'] = cache_control
+        # 不同编码的内容不同，ETag 也要区分
+        resp.set_etag(self.digest if encoding == 'identity' else f"{self.digest}-{encoding}")
+        return resp.make_conditional(request)
+
+
+class AssetPipeline:
+    """静态资源构建与分发（Flask 扩展风格）"""
+
+    def __init__(self):
+        self._app = None
+        self._lock = threading.Lock()
+        self._assets: Dict[str, Asset] = {}  # 源文件名 -> 资源
+        self._files: Dict[str, Asset] = {}  # 带指纹的文件名 -> 资源
+        self._pages: Dict[str, Asset] = {}  # 模板名 -> 渲染后的页面
+        self._mtimes = None
+        self.src_dir = None
+        self.url_prefix = '/assets'
+        self.max_age = 365 * 24 * 3600
+        self.auto_reload = False
+
+    def init_app(self, app):
+        self._app = app
+        self.src_dir = os.path.join(app.root_path, 'static', 'src')
+        self.url_prefix = app.config.get('ASSETS_URL_PREFIX', self.url_prefix)
+        self.max_age = app.config.get('ASSETS_MAX_AGE', self.max_age)
+        self.auto_reload = app.config.get('ASSETS_AUTO_RELOAD', False)
+        app.add_url_rule(f"{self.url_prefix}/<path:filename>", 'assets', self.serve)
+        app.jinja_env.globals['asset_url'] = self.url_for
+        app.extensions['assets'] = self
+
+    def _source_mtimes(self) -> Dict[str, float]:
+        return {
+            name: os.path.getmtime(os.path.join(self.src_dir, name))
+            for name in sorted(os.listdir(self.src_dir))
+            if os.path.splitext(name)[1] in MINIFIERS
+        }
+
+    def build(self) -> Dict[str, Asset]:
+        """压缩并预压缩 static/src 下的全部资源"""
+        assets = {}
+        for name in self._source_mtimes():
+            with open(os.path.join(self.src_dir, name), encoding='utf-8') as f:
+                source = f.read()
+            minified = MINIFIERS[os.path.splitext(name)[1]](source)
+            assets[name] = Asset(name, minified.encode('utf-8'))
+        return assets
+
+    def _ensure_built(self) -> None:
+        if self._mtimes is not None and not self.auto_reload:
+            return
+        mtimes = self._source_mtimes()
+        if mtimes == self._mtimes:
+            return
+        with self._lock:
+            if mtimes == self._mtimes:
+                return
+            assets = self.build()
+            self._files = {a.filename: a for a in assets.values()}
+            self._assets = assets
+            self._pages = {}
+            self._mtimes = mtimes
+
+    def url_for(self, name: str) -> str:
+        """模板中使用：{{ asset_url('dashboard.js') }} -> /assets/dashboard.<指纹>.js"""
+        self._ensure_built()
+        return f"{self.url_prefix}/{self._assets[name].filename}"
+
+    def serve(self, filename: str) -> Response:
+        self._ensure_built()
+        asset = self._files.get(filename)
+        if asset is None:
+            abort(404)
+        return asset.response(f"public, max-age={self.max_age}, immutable")
+
+    def render_page(self, template: str) -> Response:
+        """渲染页面骨架（不依赖请求参数，渲染一次后缓存并预压缩），带 ETag、每次访问重新验证"""
+        self._ensure_built()
+        page: Optional[Asset] = None if self.auto_reload else self._pages.get(template)
+        if page is None:
+            page = Asset(template, render_template(template).encode('utf-8'))
+            self._pages[template] = page
+        return page.response('no-cache')
+
+
+asset_pipeline = AssetPipeline()
@@ -0,0 +1,302 @@
+# -*- coding: utf-8 -*-
+"""
+历史净值回填
+
+新加入的持仓没有任何快照，收益走势要等实时刷新慢慢积累。这里在后台按页拉取
+基金的历史净值（天天基金 lsjz 接口），把每日涨跌幅写入日汇总表 fund_daily_rollups：
+- 每天的持仓金额与盈亏按持仓流水中当天收盘时的持仓计算，当时尚未持有（持仓为 0）的日期不写入
+- 有界线程池并发拉取，全局令牌桶限速，避免触发上游限流
+- 每页一次批量 INSERT（与实时刷新冲突时保留实时数据），经由单写线程提交
+- 每只基金的进度（下一页页码）与数据同一事务保存，进程重启后从断点继续
+
+上游地址由配置 NAV_HISTORY_URL 指定，可指向本地的模拟服务（见 benchmark.py backfill）。
+"""
+
+import json
+import logging
+import threading
+import time
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, time as dt_time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, or_
+
+import dialects
+from database import db
+from db_writer import db_writer
+from models import FundDailyRollup, Holding, NavBackfillState
+
+logger = logging.getLogger(__name__)
+
+# 净值按收盘（北京时间 15:00，即 UTC 07:00）计入当天；快照时间均为 UTC
+NAV_CLOSE_TIME_UTC = dt_time(7, 0)
+
+
+class RateLimiter:
+    """令牌桶限速（线程安全）：平均每秒 rate 次，允许 burst 次突发"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.capacity = max(1, int(burst))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class NavHistoryClient:
+    """历史净值分页接口"""
+
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+        "Referer": "http://fundf10.eastmoney.com/"
+    }
+
+    def __init__(self, base_url: str, timeout: float = 5):
+        self.base_url = base_url
+        self.timeout = timeout
+
+    def fetch_page(self, code: str, page: int, page_size: int,
+                   start_date: Optional[date] = None) -> Tuple[List[Dict], int]:
+        """拉取一页历史净值，返回 ([{day, nav, rate}], 总条数)；请求或解析失败时抛出异常"""
+        params = {
+            'fundCode': code,
+            'pageIndex': page,
+            'pageSize': page_size,
+            'startDate': start_date.isoformat() if start_date else '',
+            'endDate': ''
+        }
+        url = f"{self.base_url}?{urllib.parse.urlencode(params)}"
+        req = urllib.request.Request(url, headers=self.HEADERS)
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode('utf-8'))
+
+        items = []
+        for it in ((payload.get('Data') or {}).get('LSJZList') or []):
+            try:
+                day = date.fromisoformat(it['FSRQ'])
+            except (KeyError, TypeError, ValueError):
+                continue
+            items.append({
+                'day': day,
+                'nav': _to_float(it.get('DWJZ')),
+                # 新成立基金首日等情况涨跌幅为空
+                'rate': _to_float(it.get('JZZZL')) or 0.0
+            })
+        return items, int(payload.get('TotalCount') or 0)
+
+
+def _to_float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class NavBackfill:
+    """历史净值回填（Flask 扩展风格，init_app 后按需启动线程池）"""
+
+    def __init__(self):
+        self._app = None
+        self._executor = None
+        self._lock = threading.Lock()
+        self._inflight = set()
+        self.enabled = False
+        self.days = 365
+        self.page_size = 20
+        self.max_attempts = 3
+        self.retries = 2
+        self.workers = 4
+        self.client = None
+        self.limiter = None
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('NAV_BACKFILL_ENABLED', False)
+        self.days = app.config.get('NAV_BACKFILL_DAYS', self.days)
+        self.page_size = app.config.get('NAV_BACKFILL_PAGE_SIZE', self.page_size)
+        self.max_attempts = app.config.get('NAV_BACKFILL_MAX_ATTEMPTS', self.max_attempts)
+        self.workers = app.config.get('NAV_BACKFILL_WORKERS', self.workers)
+        self.client = NavHistoryClient(app.config['NAV_HISTORY_URL'], app.config.get('REQUEST_TIMEOUT', 5))
+        self.limiter = RateLimiter(app.config.get('NAV_BACKFILL_RATE', 5.0), burst=self.workers)
+        app.extensions['nav_backfill'] = self
+
+    # ================= 调度 =================
+
+    def enqueue(self, codes) -> None:
+        """安排回填；已完成或正在回填的基金会被跳过。只在内存中排队，可在写操作内部调用"""
+        if not self.enabled or self._app is None:
+            return
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='nav-backfill')
+            for code in codes:
+                if code in self._inflight:
+                    continue
+                self._inflight.add(code)
+                self._executor.submit(self._job, code)
+
+    def resume(self) -> None:
+        """后台检查未完成的回填（新持仓、中断或失败可重试的）并继续"""
+        if not self.enabled or self._app is None:
+            return
+        threading.Thread(target=self._resume, name='nav-backfill-resume', daemon=True).start()
+
+    def _resume(self):
+        with self._app.app_context():
+            try:
+                self.enqueue(self.pending_codes())
+            except Exception:
+                logger.exception('检查待回填基金失败')
+
+    def pending_codes(self) -> List[str]:
+        """尚未完成回填的持仓代码"""
+        rows = db.session.query(Holding.code).outerjoin(
+            NavBackfillState, NavBackfillState.code == Holding.code
+        ).filter(or_(
+            NavBackfillState.id.is_(None),
+            NavBackfillState.status == NavBackfillState.STATUS_RUNNING,
+            and_(NavBackfillState.status == NavBackfillState.STATUS_FAILED,
+                 NavBackfillState.attempts < self.max_attempts)
+        )).order_by(Holding.sort_order.asc(), Holding.id.asc()).all()
+        return [r.code for r in rows]
+
+    @staticmethod
+    def get_states() -> List[Dict]:
+        """所有基金的回填进度"""
+        states = NavBackfillState.query.order_by(NavBackfillState.code.asc()).all()
+        return [s.to_dict() for s in states]
+
+    # ================= 执行 =================
+
+    def _job(self, code: str) -> None:
+        try:
+            with self._app.app_context():
+                self.backfill(code)
+        except Exception as exc:
+            logger.warning('基金 %s 历史净值回填失败: %s', code, exc)
+            try:
+                with self._app.app_context():
+                    db_writer.run(self._mark_failed, code, str(exc))
+            except Exception:
+                logger.exception('记录回填失败状态出错')
+        finally:
+            with self._lock:
+                self._inflight.discard(code)
+
+    def backfill(self, code: str) -> None:
+        """从断点开始逐页回填一只基金，直到覆盖 days 天或数据取尽"""
+        holding = db_writer.run(self._claim, code)
+        if holding is None:
+            return
+
+        # 列表按日期倒序分页：中断期间新发布的净值只会让续传的页与已取的页重叠（重复行被忽略），不会漏数据
+        since = date.today() - timedelta(days=self.days)
+        page = holding['next_page']
+        while True:
+            items, total = self._fetch(code, page, since)
+            items = [it for it in items if it['day'] >= since]
+            # 数据按日期倒序返回：本页为空、已到最后一页或已早于起始日期时结束
+            done = not items or page * self.page_size >= total or len(items) < self.page_size
+            db_writer.run(self._save_page, code, items, holding, page + 1, total, done)
+            if done:
+                return
+            page += 1
+
+    def _fetch(self, code: str, page: int, since: date) -> Tuple[List[Dict], int]:
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                return self.client.fetch_page(code, page, self.page_size, start_date=since)
+            except Exception:
+                if attempt >= self.retries:
+                    raise
+                time.sleep(0.5 * 2 ** attempt)
+
+    # ================= 写操作（由写线程执行，不提交） =================
+
+    @staticmethod
+    def _claim(code: str) -> Optional[Dict]:
+        """开始（或继续）回填：持仓已删除或已完成时返回 None"""
+        holding = Holding.query.filter_by(code=code).first()
+        if holding is None:
+            return None
+        state = NavBackfillState.query.filter_by(code=code).first()
+        if state is None:
+            state = NavBackfillState(code=code, next_page=1, fetched_count=0, attempts=0)
+            db.session.add(state)
+        elif state.status == NavBackfillState.STATUS_DONE:
+            return None
+        state.status = NavBackfillState.STATUS_RUNNING
+        state.attempts = (state.attempts or 0) + 1
+        state.error = None
+        return {'name': holding.name, 'next_page': state.next_page or 1}
+
+    @staticmethod
+    def _save_page(code: str, items: List[Dict], holding: Dict, next_page: int, total: int, done: bool) -> None:
+        """写入一页日汇总并推进进度（同一事务）"""
+        from services import LedgerService
+
+        closes = [datetime.combine(it['day'], NAV_CLOSE_TIME_UTC) for it in items]
+        rows = [{
+            'code': code,
+            'day': it['day'],
+            'name': holding['name'],
+            'rate': it['rate'],
+            'profit': amount * it['rate'] / 100,
+            'amount': amount,
+            'last_time': close
+        } for it, close, amount in zip(items, closes, LedgerService.positions_as_of(code, closes))
+            if amount > 0]
+        if rows:
+            NavBackfill._insert_rollups(rows)
+
+        state = NavBackfillState.query.filter_by(code=code).first()
+        if state is None:
+            return
+        state.next_page = next_page
+        state.total_count = total
+        state.fetched_count = (state.fetched_count or 0) + len(items)
+        if done:
+            state.status = NavBackfillState.STATUS_DONE
+
+    @staticmethod
+    def _insert_rollups(rows: List[Dict]) -> None:
+        """批量插入日汇总；当天已有（实时刷新产生的）汇总时保留原值"""
+        stmt = dialects.insert(FundDailyRollup)
+        if stmt is not None:
+            db.session.execute(stmt.values(rows).on_conflict_do_nothing(index_elements=['code', 'day']))
+            return
+
+        # 其他数据库：先查出已存在的日期
+        existing = {d for (d,) in db.session.query(FundDailyRollup.day).filter(
+            FundDailyRollup.code == rows[0]['code'],
+            FundDailyRollup.day.in_([r['day'] for r in rows])
+        )}
+        db.session.add_all(FundDailyRollup(**r) for r in rows if r['day'] not in existing)
+
+    @staticmethod
+    def _mark_failed(code: str, error: str) -> None:
+        state = NavBackfillState.query.filter_by(code=code).first()
+        if state is not None:
+            state.status = NavBackfillState.STATUS_FAILED
+            state.error = error[:255]
+
+
+nav_backfill = NavBackfill()
@@ -0,0 +1,730 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准脚本
+
+用法：
+    python benchmark.py startup [--runs 5] [--max-import-ms 800] [--max-ttfr-ms 1500]
+    python benchmark.py audit   [--funds 200] [--points 500]
+    python benchmark.py queries [--funds 200] [--points 500] [--indexes legacy]
+    python benchmark.py inserts [--funds 200] [--points 500] [--indexes legacy]
+    python benchmark.py writes  [--threads 8] [--writes 200]
+    python benchmark.py backfill [--funds 50] [--history-days 365] [--rate 50]
+    python benchmark.py alerts  [--rules 10000] [--funds 1000] [--batches 60]
+    python benchmark.py search  [--funds 20000] [--queries 10000]
+    python benchmark.py rebalance [--funds 200] [--ops 50] [--rounds 10]
+    python benchmark.py partitions [--database-url postgresql://.../scratch] [--partitioning timescale]
+
+startup 超过阈值时以非零状态码退出，可用于 CI 中防止启动性能回退；
+audit 对每个服务查询执行 EXPLAIN QUERY PLAN，发现全表扫描/临时排序时以非零状态码退出。
+backfill 启动本地模拟的历史净值接口，对新持仓执行回填并校验写入的日汇总条数。
+partitions 在指定的 PostgreSQL 库（会写入并删除测试快照）上执行迁移、写入与分区维护，失败时以非零状态码退出；
+未配置 PostgreSQL 时跳过（状态码 0），可直接放进 CI。
+"""
+
+import argparse
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# 子进程中执行：导入应用并完成第一次请求，输出各阶段耗时（毫秒）
+_TTFR_SNIPPET = r"""
+import time
+t0 = time.perf_counter()
+from app import create_app
+t1 = time.perf_counter()
+app = create_app('production')
+client = app.test_client()
+resp = client.get('/api/holdings')
+assert resp.status_code == 200, resp.status_code
+t2 = time.perf_counter()
+print(f"{(t1 - t0) * 1000:.3f} {(t2 - t0) * 1000:.3f}")
+"""
+
+
+def _run_python(code, env=None):
+    """在新解释器中运行代码，返回 (墙钟耗时毫秒, 标准输出)"""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, '-c', code],
+        cwd=ROOT_DIR, env=env, capture_output=True, text=True, check=True
+    )
+    return (time.perf_counter() - start) * 1000, proc.stdout.strip()
+
+
+def bench_startup(runs):
+    """测量导入耗时与首个请求响应耗时（冷启动/热启动）"""
+    baseline = statistics.median(_run_python('pass')[0] for _ in range(runs))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {'import': [], 'ttfr_cold': [], 'ttfr_warm': []}
+        for i in range(runs):
+            env = dict(os.environ)
+            env['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, f'bench_{i}.db')
+            env.pop('MIGRATE_ENABLED', None)
+            # 不测量后台下载基金目录
+            env['FUND_DIRECTORY_ENABLED'] = '0'
+
+            # 冷启动：新数据库，需要建表；热启动：schema 版本已记录
+            for key in ('ttfr_cold', 'ttfr_warm'):
+                wall, out = _run_python(_TTFR_SNIPPET, env=env)
+                import_ms, ttfr_ms = (float(x) for x in out.split())
+                if key == 'ttfr_cold':
+                    results['import'].append(import_ms)
+                results[key].append(ttfr_ms + baseline)
+
+    return {
+        'interpreter': baseline,
+        'import': statistics.median(results['import']),
+        'ttfr_cold': statistics.median(results['ttfr_cold']),
+        'ttfr_warm': statistics.median(results['ttfr_warm']),
+    }
+
+
+def cmd_startup(args):
+    stats = bench_startup(args.runs)
+    print(f"解释器启动:          {stats['interpreter']:8.1f} ms")
+    print(f"导入 app:            {stats['import']:8.1f} ms")
+    print(f"首个响应（新库）:    {stats['ttfr_cold']:8.1f} ms")
+    print(f"首个响应（已有库）:  {stats['ttfr_warm']:8.1f} ms")
+
+    failed = False
+    if args.max_import_ms and stats['import'] > args.max_import_ms:
+        print(f"导入耗时超过阈值 {args.max_import_ms} ms")
+        failed = True
+    if args.max_ttfr_ms and stats['ttfr_warm'] > args.max_ttfr_ms:
+        print(f"首个响应耗时超过阈值 {args.max_ttfr_ms} ms")
+        failed = True
+    return 1 if failed else 0
+
+
+# 迁移 0003 之前的快照索引，用于 --indexes legacy 对比
+_LEGACY_INDEX_SQL = [
+    "DROP INDEX IF EXISTS idx_snapshots_code_time_cover",
+    "CREATE INDEX IF NOT EXISTS ix_fund_snapshots_code ON fund_snapshots (code)",
+    "CREATE INDEX IF NOT EXISTS ix_fund_snapshots_snapshot_time ON fund_snapshots (snapshot_time)",
+    "CREATE INDEX IF NOT EXISTS idx_code_time ON fund_snapshots (code, snapshot_time)",
+]
+
+
+@contextmanager
+def synthetic_app(funds, points, days=30, indexes='current', backfill=False):
+    """在临时 sqlite 库中创建应用，并写入 funds 只基金 × 每只 points 条快照"""
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(tmp, 'bench.db')
+        os.environ['MIGRATE_ENABLED'] = '0'
+        os.environ['NAV_BACKFILL_ENABLED'] = '1' if backfill else '0'
+        os.environ['FUND_DIRECTORY_ENABLED'] = '0'
+        sys.path.insert(0, ROOT_DIR)
+        from app import create_app
+        from database import db
+        from models import Holding
+        from services import FundSnapshotService
+
+        app = create_app('production')
+        with app.app_context():
+            rng = random.Random(42)
+            codes = [f"{100000 + i:06d}" for i in range(funds)]
+            db.session.add_all(
+                Holding(code=code, name=f"基金{code}", amount=1000.0, sort_order=i)
+                for i, code in enumerate(codes)
+            )
+
+            # 快照按时间交错写入（与真实刷新一致），最后一批落在今天
+            now = datetime.utcnow()
+            step = timedelta(days=days) / max(points, 1)
+            rows = []
+            for p in range(points):
+                ts = now - step * (points - 1 - p)
+                for code in codes:
+                    rate = rng.uniform(-3, 3)
+                    rows.append({'code': code, 'name': f"基金{code}", 'rate': rate,
+                                 'profit': 10 * rate, 'amount': 1000.0, 'snapshot_time': ts})
+            if rows:
+                conn = db.session.connection()
+                conn.execute(db.text(
+                    "INSERT INTO fund_snapshots (code, name, rate, profit, amount, snapshot_time) "
+                    "VALUES (:code, :name, :rate, :profit, :amount, :snapshot_time)"
+                ), rows)
+
+            # 日汇总按快照一次性生成
+            latest = {}
+            for row in rows:
+                latest[(row['code'], row['snapshot_time'].date())] = row
+            FundSnapshotService.update_daily_rollups(list(latest.values()))
+
+            if indexes == 'legacy':
+                for sql in _LEGACY_INDEX_SQL:
+                    db.session.execute(db.text(sql))
+            db.session.commit()
+            db.session.execute(db.text("ANALYZE"))
+            yield app, codes
+
+
+# 已知且可接受的查询计划项：
+# - 按时间分桶聚合需要对桶表达式排序（输入已按索引限定在单只基金的时间范围内，输出不超过 points 行）
+# - keyset 分页按 (snapshot_time, id) 排序，id 只用于同一时间点的并列行，只在并列行内部排序
+_BUCKET_AGGREGATE = {'USE TEMP B-TREE FOR GROUP BY', 'USE TEMP B-TREE FOR ORDER BY'}
+_KEYSET_TIEBREAK = {'USE TEMP B-TREE FOR RIGHT PART OF ORDER BY'}
+
+
+def _service_calls(codes):
+    """服务层读查询入口（名称, 调用, 可接受的计划项）"""
+    from services import FundSnapshotService, HoldingService, LedgerService
+
+    def position_as_of():
+        LedgerService.invalidate([codes[0]])
+        return LedgerService.position_as_of(codes[0], datetime.utcnow())
+
+    return [
+        ('HoldingService.get_all_holdings', HoldingService.get_all_holdings, set()),
+        ('HoldingService.get_holdings_dict', HoldingService.get_holdings_dict, set()),
+        ('HoldingService.get_version', HoldingService.get_version, set()),
+        ('FundSnapshotService.get_history_page',
+         lambda: FundSnapshotService.get_history_page(codes[0], 7, 1000), _KEYSET_TIEBREAK),
+        ('FundSnapshotService.get_history_downsampled',
+         lambda: FundSnapshotService.get_history_downsampled(codes[0], 30, points=200), _BUCKET_AGGREGATE),
+        ('FundSnapshotService.get_history_batch',
+         lambda: FundSnapshotService.get_history_batch(codes[:50], 30, points=200), _BUCKET_AGGREGATE),
+        ('FundSnapshotService.get_today_summary', FundSnapshotService.get_today_summary, set()),
+        ('FundSnapshotService.get_profit_trend', lambda: FundSnapshotService.get_profit_trend(30), set()),
+        ('LedgerService.position_as_of', position_as_of, set()),
+        ('LedgerService.get_transactions', lambda: LedgerService.get_transactions(codes[0]), set()),
+    ]
+
+
+@contextmanager
+def _capture_statements(engine):
+    """记录期间执行的 SELECT 语句及参数"""
+    from sqlalchemy import event
+
+    captured = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            captured.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield captured
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _plan_problems(plan_rows):
+    """从查询计划中找出全表扫描（大表）与临时 B 树排序；holdings 小表与物化子查询（anon_*）的扫描不计"""
+    problems = []
+    for row in plan_rows:
+        detail = row[-1]
+        if (detail.startswith('SCAN') and 'USING' not in detail
+                and 'holdings' not in detail and not detail.startswith('SCAN anon_')):
+            problems.append(detail)
+        if 'USE TEMP B-TREE' in detail and 'holdings' not in detail:
+            problems.append(detail)
+    return problems
+
+
+def cmd_audit(args):
+    with synthetic_app(args.funds, args.points, indexes=args.indexes) as (app, codes):
+        from database import db
+
+        failed = False
+        for name, call, allowed in _service_calls(codes):
+            with _capture_statements(db.engine) as captured:
+                call()
+            print(f"\n== {name}")
+            for statement, params in captured:
+                plan = db.session.connection().exec_driver_sql(
+                    'EXPLAIN QUERY PLAN ' + statement, params
+                ).all()
+                print('  ' + ' '.join(statement.split())[:160])
+                for row in plan:
+                    print(f"    {row[-1]}")
+                problems = [p for p in _plan_problems(plan) if p not in allowed]
+                for detail in problems:
+                    print(f"    !! {detail}")
+                failed = failed or bool(problems)
+    return 1 if failed else 0
+
+
+def _time_call(call, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def cmd_queries(args):
+    with synthetic_app(args.funds, args.points, indexes=args.indexes) as (app, codes):
+        print(f"{args.funds} 只基金 × {args.points} 条快照，索引: {args.indexes}")
+        for name, call, _ in _service_calls(codes):
+            print(f"  {name:<44} {_time_call(call, args.repeat):8.2f} ms")
+    return 0
+
+
+def cmd_inserts(args):
+    with synthetic_app(args.funds, args.points, indexes=args.indexes) as (app, codes):
+        from services import FundSnapshotService
+
+        # 模拟 refresh_all_funds 的写入：每批为全部持仓各一条快照 + 日汇总 upsert
+        start = time.perf_counter()
+        for _ in range(args.batches):
+            now = datetime.utcnow()
+            FundSnapshotService.save_snapshots([
+                {'code': code, 'name': f"基金{code}", 'rate': 1.0, 'profit': 10.0,
+                 'amount': 1000.0, 'snapshot_time': now}
+                for code in codes
+            ])
+        elapsed = time.perf_counter() - start
+        total = args.batches * len(codes)
+        print(f"{args.funds} 只基金 × {args.points} 条快照，索引: {args.indexes}")
+        print(f"  写入 {total} 条快照: {elapsed * 1000:.1f} ms（{total / elapsed:,.0f} 条/秒）")
+    return 0
+
+
+def cmd_writes(args):
+    """并发写入：多个线程同时写快照，同时测量读延迟"""
+    import threading
+
+    with synthetic_app(args.funds, args.points) as (app, codes):
+        from services import FundSnapshotService
+
+        errors = []
+        read_samples = []
+        done = threading.Event()
+
+        def writer(idx):
+            with app.app_context():
+                for i in range(args.writes):
+                    code = codes[(idx * args.writes + i) % len(codes)]
+                    try:
+                        FundSnapshotService.save_snapshots([
+                            {'code': code, 'name': f"基金{code}", 'rate': 1.0, 'profit': 10.0,
+                             'amount': 1000.0, 'snapshot_time': datetime.utcnow()}
+                        ])
+                    except Exception as exc:
+                        errors.append(exc)
+
+        def reader():
+            with app.app_context():
+                while not done.is_set():
+                    read_samples.append(_time_call(FundSnapshotService.get_today_summary, 1))
+
+        threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.threads)]
+        read_thread = threading.Thread(target=reader)
+        start = time.perf_counter()
+        read_thread.start()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        done.set()
+        read_thread.join()
+
+        total = args.threads * args.writes
+        print(f"{args.threads} 个线程 × {args.writes} 次写入（写线程: {app.config['DB_WRITER_ENABLED']}）")
+        print(f"  写入吞吐: {total / elapsed:,.0f} 次/秒，失败 {len(errors)} 次")
+        if read_samples:
+            read_samples.sort()
+            p95 = read_samples[int(len(read_samples) * 0.95) - 1]
+            print(f"  并发读延迟: 中位数 {statistics.median(read_samples):.2f} ms，p95 {p95:.2f} ms")
+    return 1 if errors else 0
+
+
+def _fake_nav_server(history_days, latency):
+    """本地模拟的历史净值分页接口（格式同天天基金 lsjz），返回 (server, 请求计数)"""
+    import json
+    import threading
+    from datetime import date
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+    from urllib.parse import parse_qs, urlparse
+
+    counter = {'requests': 0}
+    lock = threading.Lock()
+    today = date.today()
+    # 只有工作日有净值
+    days = [today - timedelta(days=i) for i in range(history_days)]
+    days = [d for d in days if d.weekday() < 5]
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            qs = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+            code = qs.get('fundCode', '')
+            page = int(qs.get('pageIndex', 1))
+            size = int(qs.get('pageSize', 20))
+            start = qs.get('startDate')
+            series = [d for d in days if not start or d.isoformat() >= start]
+            rng = random.Random(code)
+            items = [{'FSRQ': d.isoformat(), 'DWJZ': '1.0000', 'JZZZL': f"{rng.uniform(-3, 3):.2f}"}
+                     for d in series[(page - 1) * size:page * size]]
+            with lock:
+                counter['requests'] += 1
+            if latency:
+                time.sleep(latency)
+            body = json.dumps({'Data': {'LSJZList': items}, 'ErrCode': 0, 'TotalCount': len(series),
+                               'PageSize': size, 'PageIndex': page}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.expected_days = len(days)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, counter
+
+
+def cmd_backfill(args):
+    """历史净值回填：对全部新持仓执行回填，统计耗时、请求数并校验写入条数"""
+    server, counter = _fake_nav_server(args.history_days, args.latency_ms / 1000)
+    os.environ['NAV_HISTORY_URL'] = f"http://127.0.0.1:{server.server_port}/f10/lsjz"
+    os.environ['NAV_BACKFILL_DAYS'] = str(args.history_days - 1)
+    os.environ['NAV_BACKFILL_RATE'] = str(args.rate)
+    os.environ['NAV_BACKFILL_PAGE_SIZE'] = str(args.page_size)
+
+    with synthetic_app(args.funds, 0, backfill=True) as (app, codes):
+        from backfill import nav_backfill
+        from database import db
+        from models import FundDailyRollup, HoldingTransaction, NavBackfillState
+
+        with app.app_context():
+            # 回填按流水中的历史持仓计算金额：建仓时间早于回填区间
+            opened = datetime.utcnow() - timedelta(days=args.history_days + 1)
+            db.session.add_all(HoldingTransaction(code=code, delta=1000.0, kind='open', effective_time=opened,
+                                                  created_at=opened) for code in codes)
+            db.session.commit()
+            start = time.perf_counter()
+            nav_backfill.enqueue(nav_backfill.pending_codes())
+            while time.perf_counter() - start < args.timeout:
+                finished = NavBackfillState.query.filter(
+                    NavBackfillState.status != NavBackfillState.STATUS_RUNNING
+                ).count()
+                if finished >= len(codes):
+                    break
+                db.session.rollback()
+                time.sleep(0.05)
+            elapsed = time.perf_counter() - start
+            failed = NavBackfillState.query.filter_by(status=NavBackfillState.STATUS_FAILED).count()
+            rows = FundDailyRollup.query.count()
+    server.shutdown()
+
+    expected = args.funds * server.expected_days
+    print(f"{args.funds} 只基金 × {server.expected_days} 个交易日，限速 {args.rate} 次/秒")
+    print(f"  耗时 {elapsed:.2f} s，请求 {counter['requests']} 次，写入 {rows} 条日汇总（期望 {expected}），失败 {failed} 只")
+    return 0 if rows == expected and not failed else 1
+
+
+def cmd_alerts(args):
+    """告警评估：rules 条规则 × funds 只基金，每批行情评估耗时"""
+    sys.path.insert(0, ROOT_DIR)
+    from alerts import FUND_METRICS, METRICS, OPS, AlertEngine
+
+    rng = random.Random(42)
+    codes = [f"{100000 + i:06d}" for i in range(args.funds)]
+    rules = []
+    for i in range(args.rules):
+        metric = rng.choice(METRICS)
+        # 一半基金级规则针对单只基金，其余对所有持仓生效
+        code = rng.choice(codes) if metric in FUND_METRICS and rng.random() < 0.5 else None
+        # 阈值方向与常见用法一致：大涨（> 正数）、大跌（< 负数）、绝对值超限、连续失败、回撤超限
+        scale = {'rate': 5, 'profit': 50, 'total_profit': 5000, 'total_rate': 3}.get(metric)
+        if scale:
+            op = rng.choice(OPS)
+            threshold = rng.uniform(0.2, 1) * scale * (-1 if op in ('<', '<=') else 1)
+        elif metric == 'fail_streak':
+            op, threshold = '>=', rng.randint(2, 5)
+        else:
+            op, threshold = '>', rng.uniform(100, 5000)
+        rules.append({'id': i + 1, 'metric': metric, 'op': op, 'threshold': threshold,
+                      'code': code, 'cooldown': 300, 'sinks': [], 'enabled': True})
+
+    engine = AlertEngine()
+    engine.enabled = True
+    start = time.perf_counter()
+    engine.load(rules)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    # 涨跌幅按随机游走逐批变化（每分钟一批）
+    rates = {code: rng.gauss(0, 1) for code in codes}
+    samples = []
+    fired = 0
+    for b in range(args.batches):
+        results = []
+        for code in codes:
+            rates[code] += rng.gauss(0, 0.1)
+            rate = rates[code]
+            ok = rng.random() > 0.01
+            results.append({'code': code, 'name': code, 'rate': rate if ok else 0, 'profit': 10 * rate if ok else 0,
+                            'amount': 1000.0, 'success': ok})
+        start = time.perf_counter()
+        fired += len(engine.evaluate(results, now=b * 60.0))
+        samples.append((time.perf_counter() - start) * 1000)
+
+    samples.sort()
+    print(f"{args.rules} 条规则 × {args.funds} 只基金，{args.batches} 批")
+    print(f"  编译规则 {load_ms:.1f} ms；每批评估 中位数 {statistics.median(samples):.2f} ms，"
+          f"最大 {samples[-1]:.2f} ms；共触发 {fired} 条告警")
+    return 0
+
+
+def cmd_search(args):
+    """基金目录前缀搜索延迟"""
+    sys.path.insert(0, ROOT_DIR)
+    from directory import DirectoryIndex
+
+    rng = random.Random(42)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    words = ['华夏', '易方达', '嘉实', '南方', '广发', '富国', '招商', '汇添富', '博时', '永赢']
+    rows = []
+    for i in range(args.funds):
+        abbr = ''.join(rng.choice(letters) for _ in range(rng.randint(4, 10)))
+        rows.append({'code': f"{i:06d}", 'name': f"{rng.choice(words)}{abbr.upper()}混合C", 'abbr': abbr.upper(),
+                     'pinyin': abbr.upper() * 2, 'type': '混合型'})
+
+    start = time.perf_counter()
+    index = DirectoryIndex(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    queries = []
+    for _ in range(args.queries):
+        row = rng.choice(rows)
+        key = rng.choice([row['code'], row['abbr'].lower(), row['name']])
+        queries.append(key[:rng.randint(1, min(4, len(key)))])
+    samples = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q, 20)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"{args.funds} 只基金，{len(index.keys)} 个检索键，建索引 {build_ms:.1f} ms")
+    print(f"  前缀搜索（limit=20）中位数 {statistics.median(samples):.3f} ms，p99 {p99:.3f} ms")
+    return 0
+
+
+def cmd_rebalance(args):
+    """调仓：逐个请求加减仓 vs 一次 /api/holdings/batch"""
+    with synthetic_app(args.funds, 1) as (app, codes):
+        from sqlalchemy import event
+        from database import db
+
+        client = app.test_client()
+        rng = random.Random(42)
+        with app.app_context():
+            engine = db.engine
+        statements = []
+
+        def record(conn, cursor, statement, *rest):
+            statements.append(statement)
+
+        event.listen(engine, 'before_cursor_execute', record)
+        single, batch = [], []
+        for _ in range(args.rounds):
+            targets = rng.sample(codes, min(args.ops, len(codes)))
+
+            statements.clear()
+            start = time.perf_counter()
+            for code in targets:
+                resp = client.post(f'/api/holdings/{code}/adjust', json={'delta_amount': rng.choice((-100, 100))})
+                assert resp.status_code == 200, resp.get_json()
+            single.append(((time.perf_counter() - start) * 1000, len(statements)))
+
+            version = client.get('/api/holdings').get_json()['version']
+            operations = [{'op': 'adjust', 'code': code, 'delta': rng.choice((-100, 100))} for code in targets]
+            statements.clear()
+            start = time.perf_counter()
+            resp = client.post('/api/holdings/batch', json={'version': version, 'operations': operations})
+            assert resp.status_code == 200, resp.get_json()
+            batch.append(((time.perf_counter() - start) * 1000, len(statements)))
+        event.remove(engine, 'before_cursor_execute', record)
+
+        print(f"{args.funds} 只持仓，每轮调整 {args.ops} 只，共 {args.rounds} 轮（中位数）")
+        for label, samples in (('逐个 /adjust', single), ('/holdings/batch', batch)):
+            print(f"  {label:<16} {statistics.median(ms for ms, _ in samples):8.2f} ms  "
+                  f"{statistics.median(n for _, n in samples):6.0f} 条 SQL")
+    return 0
+
+
+def _postgres_url(args):
+    """PostgreSQL 冒烟测试使用的库：--database-url、BENCH_PG_URL 或指向 PostgreSQL 的 DATABASE_URL"""
+    for url in (args.database_url, os.environ.get('BENCH_PG_URL'), os.environ.get('DATABASE_URL')):
+        if url and url.startswith(('postgresql', 'postgres://')):
+            return url
+    return None
+
+
+def cmd_partitions(args):
+    """PostgreSQL 冒烟测试（需要一个可丢弃的 PostgreSQL 库；未配置时跳过并返回 0）：
+    - 迁移按 --partitioning 建成原生分区或 TimescaleDB hypertable
+    - 刷新写入快照与日汇总 upsert、按时间分桶的降采样查询在该后端上可以执行
+    - 原生分区：启动时建好当前及未来 3 个月的分区，落入 DEFAULT 分区的数据在分区维护时移入新建的分区
+    """
+    url = _postgres_url(args)
+    if url is None:
+        print('跳过：未配置 PostgreSQL（--database-url / BENCH_PG_URL / DATABASE_URL）')
+        return 0
+    os.environ['DATABASE_URL'] = url
+    os.environ['SNAPSHOT_PARTITIONING'] = args.partitioning
+    os.environ['MIGRATE_ENABLED'] = '0'
+    os.environ['NAV_BACKFILL_ENABLED'] = '0'
+    os.environ['FUND_DIRECTORY_ENABLED'] = '0'
+    sys.path.insert(0, ROOT_DIR)
+    from datetime import date
+    from app import create_app
+    from database import db
+    import dialects
+    from models import FundDailyRollup
+    from services import FundSnapshotService
+
+    app = create_app('production')
+    failed = []
+
+    def check(label, ok):
+        print(f"  [{'ok' if ok else 'FAIL'}] {label}")
+        if not ok:
+            failed.append(label)
+
+    def partition_of(snapshot_id):
+        return db.session.execute(db.text(
+            "SELECT tableoid::regclass::text FROM fund_snapshots WHERE id = :id"
+        ), {'id': snapshot_id}).scalar()
+
+    with app.app_context():
+        mode = dialects.snapshot_partitioning()
+        check(f"fund_snapshots 分区方式为 {args.partitioning}（当前: {mode}；库已按其他方式迁移时请换一个空库）",
+              mode == args.partitioning)
+        if mode != args.partitioning:
+            return 1
+
+        # 刷新的写入路径：快照 INSERT + 日汇总 ON CONFLICT upsert（写两次，第二次走冲突更新）
+        now = datetime.utcnow()
+        for rate in (1.0, 2.0):
+            FundSnapshotService.save_snapshots([{'code': '000000', 'name': 'partition-smoke', 'rate': rate,
+                                                 'profit': rate, 'amount': 100.0, 'snapshot_time': now}])
+        rollup = FundDailyRollup.query.filter_by(code='000000', day=now.date()).first()
+        check('日汇总 upsert 保留当天最后一条', rollup is not None and rollup.rate == 2.0)
+        downsampled = FundSnapshotService.get_history_downsampled('000000', 1, points=10)
+        check(f"按时间分桶降采样（{'time_bucket' if dialects.timescale_enabled() else 'epoch 取整'}）",
+              len(downsampled['items']) >= 1)
+
+        if mode == 'native':
+            today = date.today()
+            for offset in range(4):
+                name = f"fund_snapshots_p{dialects.month_start(today, offset):%Y%m}"
+                check(f"启动时已创建 {name}", dialects._partition_exists(name))
+
+            current_id = db.session.execute(db.text(
+                "SELECT max(id) FROM fund_snapshots WHERE name = 'partition-smoke'"
+            )).scalar()
+            check('当月快照写入当月分区', partition_of(current_id) == f"fund_snapshots_p{now:%Y%m}")
+
+            # 找一个尚未建分区的月份，写入的数据先落入 DEFAULT，分区维护后移入新分区
+            offset = next(o for o in range(4, 240)
+                          if not dialects._partition_exists(f"fund_snapshots_p{dialects.month_start(today, o):%Y%m}"))
+            month = dialects.month_start(today, offset)
+            future_id = db.session.execute(db.text(
+                "INSERT INTO fund_snapshots (code, name, rate, profit, amount, snapshot_time) "
+                "VALUES ('000000', 'partition-smoke', 0, 0, 0, :ts) RETURNING id"
+            ), {'ts': datetime(month.year, month.month, 15)}).scalar()
+            db.session.commit()
+            check(f"{month:%Y-%m} 的快照落入 DEFAULT 分区", partition_of(future_id) == 'fund_snapshots_default')
+
+            created = dialects.ensure_snapshot_partitions(offset)
+            check(f"分区维护新建 {created} 个分区，{month:%Y-%m} 的快照移入 fund_snapshots_p{month:%Y%m}",
+                  partition_of(future_id) == f"fund_snapshots_p{month:%Y%m}")
+
+        db.session.execute(db.text("DELETE FROM fund_snapshots WHERE name = 'partition-smoke'"))
+        FundDailyRollup.query.filter_by(code='000000').delete()
+        db.session.commit()
+    return 1 if failed else 0
+
+
+def _add_synthetic_args(p):
+    p.add_argument('--funds', type=int, default=200)
+    p.add_argument('--points', type=int, default=500)
+    p.add_argument('--indexes', choices=('current', 'legacy'), default='current')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fund_Pulse 性能基准')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('startup', help='导入耗时与首个请求响应耗时')
+    p.add_argument('--runs', type=int, default=5)
+    p.add_argument('--max-import-ms', type=float, default=0)
+    p.add_argument('--max-ttfr-ms', type=float, default=0)
+    p.set_defaults(func=cmd_startup)
+
+    p = sub.add_parser('audit', help='对服务查询执行 EXPLAIN QUERY PLAN')
+    _add_synthetic_args(p)
+    p.set_defaults(func=cmd_audit)
+
+    p = sub.add_parser('queries', help='服务查询读延迟')
+    _add_synthetic_args(p)
+    p.add_argument('--repeat', type=int, default=20)
+    p.set_defaults(func=cmd_queries)
+
+    p = sub.add_parser('inserts', help='快照写入吞吐')
+    _add_synthetic_args(p)
+    p.add_argument('--batches', type=int, default=50)
+    p.set_defaults(func=cmd_inserts)
+
+    p = sub.add_parser('writes', help='并发写入吞吐与读延迟（DB_WRITER_ENABLED=0 可对比无写线程）')
+    p.add_argument('--funds', type=int, default=200)
+    p.add_argument('--points', type=int, default=100)
+    p.add_argument('--threads', type=int, default=8)
+    p.add_argument('--writes', type=int, default=200)
+    p.set_defaults(func=cmd_writes)
+
+    p = sub.add_parser('backfill', help='历史净值回填（本地模拟接口）')
+    p.add_argument('--funds', type=int, default=50)
+    p.add_argument('--history-days', type=int, default=365)
+    p.add_argument('--page-size', type=int, default=20)
+    p.add_argument('--rate', type=float, default=50)
+    p.add_argument('--latency-ms', type=float, default=20)
+    p.add_argument('--timeout', type=float, default=300)
+    p.set_defaults(func=cmd_backfill)
+
+    p = sub.add_parser('alerts', help='告警规则评估耗时')
+    p.add_argument('--rules', type=int, default=10000)
+    p.add_argument('--funds', type=int, default=1000)
+    p.add_argument('--batches', type=int, default=60)
+    p.set_defaults(func=cmd_alerts)
+
+    p = sub.add_parser('search', help='基金目录前缀搜索延迟')
+    p.add_argument('--funds', type=int, default=20000)
+    p.add_argument('--queries', type=int, default=10000)
+    p.set_defaults(func=cmd_search)
+
+    p = sub.add_parser('rebalance', help='调仓：逐个加减仓请求 vs 批量修改接口')
+    p.add_argument('--funds', type=int, default=200)
+    p.add_argument('--ops', type=int, default=50)
+    p.add_argument('--rounds', type=int, default=10)
+    p.set_defaults(func=cmd_rebalance)
+
+    p = sub.add_parser('partitions', help='PostgreSQL 冒烟测试（分区/hypertable、写入与分桶查询；未配置 PostgreSQL 时跳过）')
+    p.add_argument('--database-url', default=None)
+    p.add_argument('--partitioning', choices=('native', 'timescale'), default='native')
+    p.set_defaults(func=cmd_partitions)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
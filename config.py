@@ -4,13 +4,124 @@
 """
 
 import os
+import sys
+
+
+def _env_flag(name, default=False):
+    """读取布尔型环境变量"""
+    value = os.environ.get(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'y')
+
+
+def _database_uri():
+    """数据库连接串：默认 sqlite；DATABASE_URL 兼容 postgres:// 写法"""
+    uri = os.environ.get('DATABASE_URL')
+    if not uri:
+        return 'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fund.db')
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+# sqlite 写锁等待时间（毫秒）
+SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+
+
+def _engine_options(uri):
+    """按数据库类型生成 SQLAlchemy 引擎参数"""
+    if uri.startswith('postgresql'):
+        return {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'pool_recycle': 1800,
+            'pool_pre_ping': True,
+        }
+    if uri.startswith('sqlite'):
+        # 写锁被占用时等待 busy timeout 而不是立即报 database is locked
+        connect_args = {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000}
+        if uri in ('sqlite://', 'sqlite:///:memory:'):
+            return {'connect_args': connect_args}
+        # 文件库：每个线程从连接池取独立连接
+        return {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+            'pool_pre_ping': True,
+            'connect_args': connect_args,
+        }
+    return {}
+
+
+# 是否通过 `flask` 命令行运行（如 flask db upgrade）
+_RUNNING_FLASK_CLI = os.path.basename(sys.argv[0]).lower() in ('flask', 'flask.exe')
+
 
 class Config:
     """基础配置"""
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'fund-pulse-secret-key-2024'
-    SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
-        'sqlite:///' + os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fund.db')
+    SQLALCHEMY_DATABASE_URI = _database_uri()
+    SQLALCHEMY_ENGINE_OPTIONS = _engine_options(SQLALCHEMY_DATABASE_URI)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+    # sqlite 连接参数：WAL 模式下读不阻塞写、写不阻塞读
+    SQLITE_BUSY_TIMEOUT_MS = SQLITE_BUSY_TIMEOUT_MS
+    SQLITE_WAL = _env_flag('SQLITE_WAL', True)
+
+    # 单写线程：快照/持仓写入统一排队，短时间窗口内的写操作合并为一次提交
+    DB_WRITER_ENABLED = _env_flag('DB_WRITER_ENABLED', True)
+    DB_WRITE_BATCH_SIZE = 200
+    DB_WRITE_BATCH_WINDOW = 0.002  # 秒
+
+    # 历史数据接口单次返回的最大点数（原始分页的每页上限 / 降采样 points 上限）
+    HISTORY_MAX_POINTS = 5000
+    # 批量历史接口单次最多查询的基金数
+    HISTORY_BATCH_MAX_CODES = 500
+    # 批量历史接口未传 points / resolution 时每只基金的降采样点数（不超过 HISTORY_MAX_POINTS）
+    HISTORY_BATCH_DEFAULT_POINTS = 500
+    # 持仓批量修改接口单次最多的操作数
+    HOLDINGS_BATCH_MAX_OPS = 500
+
+    # PostgreSQL 下 fund_snapshots 的分区方式：auto / timescale / native / none（见迁移 0004）
+    SNAPSHOT_PARTITIONING = os.environ.get('SNAPSHOT_PARTITIONING', 'auto')
+
+    # 历史净值回填：新增持仓后在后台拉取最近 NAV_BACKFILL_DAYS 天的净值写入日汇总（见 backfill.py）；
+    # flask 命令行下默认关闭
+    NAV_BACKFILL_ENABLED = _env_flag('NAV_BACKFILL_ENABLED', not _RUNNING_FLASK_CLI)
+    NAV_HISTORY_URL = os.environ.get('NAV_HISTORY_URL', 'http://api.fund.eastmoney.com/f10/lsjz')
+    NAV_BACKFILL_DAYS = int(os.environ.get('NAV_BACKFILL_DAYS', 365))
+    NAV_BACKFILL_PAGE_SIZE = int(os.environ.get('NAV_BACKFILL_PAGE_SIZE', 20))
+    NAV_BACKFILL_WORKERS = 4
+    NAV_BACKFILL_RATE = float(os.environ.get('NAV_BACKFILL_RATE', 5))  # 每秒请求数（所有线程合计）
+    NAV_BACKFILL_MAX_ATTEMPTS = 3
+
+    # 基金目录：后台下载全量基金列表（代码/名称/拼音/类型），用于搜索与补全名称（见 directory.py）；
+    # flask 命令行下默认关闭。多个进程（如 gunicorn 的多个 worker）共用一个库时，
+    # 只有拿到 FUND_DIRECTORY_LOCK_FILE 文件锁的进程负责下载，其余进程定期从数据库重新加载
+    FUND_DIRECTORY_ENABLED = _env_flag('FUND_DIRECTORY_ENABLED', not _RUNNING_FLASK_CLI)
+    FUND_DIRECTORY_LOCK_FILE = os.environ.get(
+        'FUND_DIRECTORY_LOCK_FILE',
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'fund_directory.lock')
+    )
+    FUND_DIRECTORY_URL = os.environ.get('FUND_DIRECTORY_URL', 'http://fund.eastmoney.com/js/fundcode_search.js')
+    FUND_DIRECTORY_REFRESH_HOURS = 24
+    FUND_SEARCH_MAX_LIMIT = 100
+
+    # 告警：每次刷新后用本批行情评估 alert_rules（见 alerts.py）；webhook 规则未设置地址时使用 ALERT_WEBHOOK_URL
+    ALERTS_ENABLED = _env_flag('ALERTS_ENABLED', True)
+    ALERT_WEBHOOK_URL = os.environ.get('ALERT_WEBHOOK_URL')
+    ALERT_RECENT_LIMIT = 200  # 内存中保留的最近告警条数
+
+    # 前端静态资源（见 assets.py）：带指纹的资源缓存时间（秒）；修改 static/src 时可开启自动重新构建
+    ASSETS_MAX_AGE = 365 * 24 * 3600
+    ASSETS_AUTO_RELOAD = _env_flag('ASSETS_AUTO_RELOAD', False)
+
+    # 是否启用 Flask-Migrate：默认仅在 `flask` 命令行下启用（如 flask db upgrade），
+    # Web 服务与脚本启动时不导入 alembic，缩短启动时间
+    MIGRATE_ENABLED = _env_flag('MIGRATE_ENABLED', _RUNNING_FLASK_CLI)
+    # 启动时自动执行数据库迁移到最新版本；flask 命令行下默认关闭，由 flask db 显式管理
+    AUTO_UPGRADE_SCHEMA = _env_flag('AUTO_UPGRADE_SCHEMA', not _RUNNING_FLASK_CLI)
     
     # 基金数据刷新间隔（秒）
     REFRESH_INTERVAL = 60
@@ -21,6 +132,10 @@ class Config:
     # 并发线程数
     MAX_WORKERS = 10
 
+    # 估值缓存有效期（秒）与上游限速（每秒请求数，0 表示不限）：Web 刷新与终端客户端共用（见 services.FundAPIService）
+    QUOTE_CACHE_TTL = float(os.environ.get('QUOTE_CACHE_TTL', 30))
+    QUOTE_RATE = float(os.environ.get('QUOTE_RATE', 20))
+
 
 class DevelopmentConfig(Config):
     """开发环境配置"""
@@ -3,31 +3,93 @@
 数据库初始化模块
 """
 
+import os
+
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
-from sqlalchemy import text
+from sqlalchemy import event, text
+from sqlalchemy.exc import SQLAlchemyError
 
 db = SQLAlchemy()
-migrate = Migrate()
+# Flask-Migrate（及其依赖 alembic）导入较重，仅在需要迁移时才延迟初始化
+migrate = None
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'migrations')
+
+# 当前 schema 版本：即 migrations/versions 中最新迁移的 revision。
+# 新增迁移时同步更新；启动时与库中 alembic_version 比较，一致则跳过迁移
+SCHEMA_VERSION = '0010'
+
+
+def init_migrate(app):
+    """按需初始化 Flask-Migrate（延迟导入）"""
+    global migrate
+    if migrate is None:
+        from flask_migrate import Migrate
+        migrate = Migrate(directory=MIGRATIONS_DIR)
+    migrate.init_app(app, db)
+    return migrate
+
+
+def _get_stored_schema_version():
+    """读取数据库中记录的迁移版本；未迁移过的库返回 None"""
+    try:
+        return db.session.execute(text("SELECT version_num FROM alembic_version")).scalar()
+    except SQLAlchemyError:
+        db.session.rollback()
+        return None
+
+
+def upgrade_schema(app):
+    """执行数据库迁移到最新版本"""
+    if 'migrate' not in app.extensions:
+        init_migrate(app)
+    from flask_migrate import upgrade
+    upgrade(directory=MIGRATIONS_DIR)
+
+
+def _configure_sqlite(app):
+    """sqlite 连接级设置：WAL、busy_timeout、synchronous"""
+    busy_timeout = int(app.config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    use_wal = app.config.get('SQLITE_WAL', True)
+
+    def on_connect(dbapi_conn, _record):
+        cursor = dbapi_conn.cursor()
+        cursor.execute(f"PRAGMA busy_timeout = {busy_timeout}")
+        if use_wal:
+            cursor.execute("PRAGMA journal_mode = WAL")
+            # WAL 下 NORMAL 仍保证一致性，仅在掉电时可能丢失最后的提交
+            cursor.execute("PRAGMA synchronous = NORMAL")
+        cursor.close()
+
+    event.listen(db.engine, 'connect', on_connect)
 
 
 def init_db(app):
     """初始化数据库"""
     db.init_app(app)
-    migrate.init_app(app, db)
-    
     with app.app_context():
-        db.create_all()
-
-        # 轻量 schema 修复：历史数据库可能缺少新增字段（如 sort_order）
-        try:
-            engine_name = db.engine.name
-            if engine_name == 'sqlite':
-                cols = db.session.execute(text("PRAGMA table_info(holdings)"))
-                col_names = {row[1] for row in cols}
-                if 'sort_order' not in col_names:
-                    db.session.execute(text("ALTER TABLE holdings ADD COLUMN sort_order INTEGER NOT NULL DEFAULT 0"))
-                    db.session.commit()
-        except Exception:
-            # schema 修复失败时不阻断启动（但可能影响排序功能）
-            db.session.rollback()
+        if db.engine.name == 'sqlite':
+            _configure_sqlite(app)
+
+    from db_writer import db_writer
+    db_writer.init_app(app)
+    from backfill import nav_backfill
+    nav_backfill.init_app(app)
+    if app.config.get('MIGRATE_ENABLED'):
+        init_migrate(app)
+
+    # flask db 命令行下由用户显式执行迁移
+    if not app.config.get('AUTO_UPGRADE_SCHEMA', True):
+        return
+
+    with app.app_context():
+        # 已记录的 schema 版本与当前一致时跳过迁移，加快重启
+        if _get_stored_schema_version() != SCHEMA_VERSION:
+            upgrade_schema(app)
+
+        if db.engine.name == 'postgresql':
+            from dialects import maintain_snapshot_partitions
+            maintain_snapshot_partitions()
+
+    # 继续未完成的历史净值回填（后台线程，不阻塞启动）
+    nav_backfill.resume()
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+单写线程：所有快照/持仓写入经由一个专用线程串行执行并批量提交
+
+SQLite 同一时刻只允许一个写事务，多个请求并发写入时会互相等待甚至报
+"database is locked"。这里把写操作排队交给一个写线程：短时间窗口内到达的写操作
+在同一个事务中执行、只提交一次；读请求（WAL 模式下）不受写入阻塞。
+"""
+
+import functools
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database import db
+
+
+class DBWriter:
+    """单写线程（Flask 扩展风格，init_app 后按需启动）"""
+
+    def __init__(self):
+        self._app = None
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.enabled = False
+        self.batch_size = 200
+        self.batch_window = 0.005
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('DB_WRITER_ENABLED', True)
+        self.batch_size = app.config.get('DB_WRITE_BATCH_SIZE', self.batch_size)
+        self.batch_window = app.config.get('DB_WRITE_BATCH_WINDOW', self.batch_window)
+        app.extensions['db_writer'] = self
+
+    def in_writer_thread(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def run(self, fn, *args, **kwargs):
+        """执行写操作并等待结果。
+
+        fn 只修改 db.session，不自行提交；提交由写线程（或未启用时由当前线程）统一完成。
+        在写线程内部调用时直接执行（写操作之间可以嵌套调用）。
+        """
+        if self.in_writer_thread():
+            return fn(*args, **kwargs)
+
+        if not self.enabled or self._app is None:
+            # 未启用写线程：在当前线程执行并提交；嵌套的写操作并入外层事务
+            if getattr(self._local, 'depth', 0):
+                return fn(*args, **kwargs)
+            self._local.depth = 1
+            try:
+                result = fn(*args, **kwargs)
+                db.session.commit()
+                return result
+            except Exception:
+                db.session.rollback()
+                raise
+            finally:
+                self._local.depth = 0
+
+        result = self.submit(fn, *args, **kwargs).result()
+        # 写入在另一个会话中提交，丢弃当前会话中可能过期的对象
+        if has_app_context():
+            db.session.expire_all()
+        return result
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """提交写操作，返回 Future"""
+        self._ensure_started()
+        future = Future()
+        self._queue.put((fn, args, kwargs, future))
+        return future
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._loop, name='db-writer', daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        with self._app.app_context():
+            # 提交后保留已加载的属性，返回给调用方的对象脱离会话后仍可读取
+            db.session().expire_on_commit = False
+            while True:
+                batch = [self._queue.get()]
+                deadline = time.monotonic() + self.batch_window
+                while len(batch) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(self._queue.get(timeout=remaining))
+                    except queue.Empty:
+                        break
+                self._process(batch)
+
+    def _process(self, batch):
+        """在一个事务中执行一批写操作；失败时回滚并逐个重试，只让出错的操作失败"""
+        results = []
+        try:
+            for fn, args, kwargs, _ in batch:
+                results.append(fn(*args, **kwargs))
+            db.session.commit()
+        except Exception as exc:
+            db.session.rollback()
+            db.session.expunge_all()
+            if len(batch) == 1:
+                batch[0][3].set_exception(exc)
+                return
+            for job in batch:
+                self._process([job])
+            return
+
+        db.session.expunge_all()
+        for (_, _, _, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+db_writer = DBWriter()
+
+
+def write_operation(fn):
+    """装饰器：被装饰的函数作为写操作交由写线程执行"""
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        return db_writer.run(fn, *args, **kwargs)
+    return wrapper
+
+
+def after_commit(fn):
+    """注册在当前事务提交后执行的回调（如失效内存缓存）；事务回滚时丢弃。需在写操作内调用"""
+    db.session.info.setdefault('after_commit', []).append(fn)
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_after_commit(session):
+    for fn in session.info.pop('after_commit', []):
+        fn()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_commit(session):
+    session.info.pop('after_commit', None)
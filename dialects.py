@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+数据库方言适配
+
+服务层只通过这里使用方言相关的 SQL（upsert、按时间分桶、分区维护），
+同一套服务同时运行在 SQLite 与 PostgreSQL（可选 TimescaleDB）上。
+"""
+
+import logging
+from datetime import date
+from typing import Optional
+
+from sqlalchemy import BigInteger, Integer, cast, func, literal_column, text
+from sqlalchemy.exc import SQLAlchemyError
+
+from database import db
+
+logger = logging.getLogger(__name__)
+
+
+def dialect_name() -> str:
+    return db.engine.name
+
+
+def is_postgresql() -> bool:
+    return dialect_name() == 'postgresql'
+
+
+_timescale_cache = {}
+
+
+def timescale_enabled() -> bool:
+    """当前 PostgreSQL 库是否安装了 timescaledb 扩展（按引擎缓存）"""
+    if not is_postgresql():
+        return False
+    key = db.engine.url.render_as_string(hide_password=True)
+    if key not in _timescale_cache:
+        _timescale_cache[key] = bool(db.session.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")
+        ).scalar())
+    return _timescale_cache[key]
+
+
+def insert(model):
+    """支持 on_conflict_do_update 的 INSERT 构造；不支持的方言返回 None"""
+    name = dialect_name()
+    if name == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif name == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(model)
+
+
+def time_bucket(column, seconds: int):
+    """按固定秒数分桶，返回桶起点的 Unix 时间戳（整数秒）。
+
+    TimescaleDB 使用 time_bucket()，PostgreSQL 使用 epoch 取整，SQLite 使用 strftime('%s')。
+    """
+    seconds = max(1, int(seconds))
+    name = dialect_name()
+    if name == 'sqlite':
+        epoch = cast(func.strftime('%s', column), Integer)
+        return (epoch // seconds) * seconds
+    if timescale_enabled():
+        bucket = func.time_bucket(literal_column(f"INTERVAL '{seconds} seconds'"), column)
+        return cast(func.extract('epoch', bucket), BigInteger)
+    return cast(func.floor(func.extract('epoch', column) / seconds) * seconds, BigInteger)
+
+
+# ================= PostgreSQL 原生分区维护 =================
+
+def snapshot_partitioning() -> Optional[str]:
+    """fund_snapshots 的分区方式：'timescale' / 'native' / None"""
+    if not is_postgresql():
+        return None
+    if timescale_enabled() and db.session.execute(text(
+        "SELECT 1 FROM timescaledb_information.hypertables WHERE hypertable_name = 'fund_snapshots'"
+    )).scalar():
+        return 'timescale'
+    if db.session.execute(text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('fund_snapshots')"
+    )).scalar():
+        return 'native'
+    return None
+
+
+def month_start(d: date, offset: int = 0) -> date:
+    """d 所在月（再偏移 offset 个月）的第一天"""
+    month = d.month - 1 + offset
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def month_partition_ddl(table: str, month: date, prefix: Optional[str] = None) -> str:
+    """创建按月分区的 DDL（已存在时跳过）；分区表名为 {prefix}_pYYYYMM，prefix 默认为父表名"""
+    start = month_start(month)
+    end = month_start(month, 1)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {prefix or table}_p{start:%Y%m} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    )
+
+
+def _partition_exists(name: str) -> bool:
+    return bool(db.session.execute(text("SELECT to_regclass(:name)"), {'name': name}).scalar())
+
+
+def _move_default_rows(month: date) -> None:
+    """DEFAULT 分区中已有该月数据时，新建独立的表、把这些行移入后再挂载为分区（同一事务内）"""
+    start, end = month_start(month), month_start(month, 1)
+    name = f"fund_snapshots_p{start:%Y%m}"
+    params = {'start': start, 'end': end}
+    db.session.execute(text("LOCK TABLE fund_snapshots_default IN EXCLUSIVE MODE"))
+    db.session.execute(text(f"CREATE TABLE {name} (LIKE fund_snapshots INCLUDING DEFAULTS)"))
+    db.session.execute(text(
+        f"INSERT INTO {name} SELECT * FROM fund_snapshots_default "
+        "WHERE snapshot_time >= :start AND snapshot_time < :end"
+    ), params)
+    db.session.execute(text(
+        "DELETE FROM fund_snapshots_default WHERE snapshot_time >= :start AND snapshot_time < :end"
+    ), params)
+    # 挂载时会为分区补建父表上的主键与索引
+    db.session.execute(text(
+        f"ALTER TABLE fund_snapshots ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+
+def ensure_snapshot_partitions(months_ahead: int = 3) -> int:
+    """原生分区模式下，确保当前及未来 months_ahead 个月的分区存在，返回新建的分区数。
+
+    超出已建分区范围的数据会落入 DEFAULT 分区（不会丢失），但会失去分区裁剪；
+    这时直接建分区会失败，改为把 DEFAULT 中该月的数据移入新分区。失败时记录日志，下次维护时重试。
+    """
+    if snapshot_partitioning() != 'native':
+        return 0
+    today = date.today()
+    created = 0
+    for offset in range(months_ahead + 1):
+        month = month_start(today, offset)
+        if _partition_exists(f"fund_snapshots_p{month:%Y%m}"):
+            continue
+        try:
+            db.session.execute(text(month_partition_ddl('fund_snapshots', month)))
+            db.session.commit()
+            created += 1
+            continue
+        except SQLAlchemyError as exc:
+            db.session.rollback()
+            logger.info('创建分区 fund_snapshots_p%s 失败，尝试迁移 DEFAULT 分区中的数据: %s', f"{month:%Y%m}", exc)
+        try:
+            _move_default_rows(month)
+            db.session.commit()
+            created += 1
+        except SQLAlchemyError:
+            db.session.rollback()
+            logger.exception('创建分区 fund_snapshots_p%s 失败', f"{month:%Y%m}")
+    return created
+
+
+_partitions_checked_on: Optional[date] = None
+
+
+def maintain_snapshot_partitions(months_ahead: int = 3) -> None:
+    """定期分区维护：每个进程每天最多执行一次 ensure_snapshot_partitions。
+
+    由快照刷新调用，长时间运行的进程在跨月之前就会建好后续月份的分区。
+    """
+    global _partitions_checked_on
+    today = date.today()
+    if _partitions_checked_on == today or not is_postgresql():
+        return
+    _partitions_checked_on = today
+    try:
+        ensure_snapshot_partitions(months_ahead)
+    except SQLAlchemyError:
+        db.session.rollback()
+        logger.exception('快照分区维护失败')
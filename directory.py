@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+基金目录
+
+从天天基金的全量基金列表（fundcode_search.js）批量导入代码、名称、拼音与类型，保存在 fund_directory 表，
+后台按 FUND_DIRECTORY_REFRESH_HOURS 定期整体刷新；多进程部署时只有持有文件锁的一个进程下载，
+其余进程按同样的间隔从数据库重新加载。检索使用内存中的有序数组：
+代码、拼音缩写、全拼、名称都作为检索键放进同一个有序数组，前缀查询只需一次二分查找。
+新增持仓时从目录补全基金名称，不需要请求实时估值接口。
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+import urllib.request
+from bisect import bisect_left
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sqlalchemy import func
+
+import dialects
+from database import db
+from db_writer import db_writer
+from models import FundInfo
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+logger = logging.getLogger(__name__)
+
+# 每个写操作写入的行数，避免长时间占用写线程
+SAVE_CHUNK_SIZE = 1000
+
+
+class DirectoryIndex:
+    """不可变的前缀索引（刷新时整体替换，读取无需加锁）"""
+
+    def __init__(self, rows: List[Dict]):
+        self.entries = [{
+            'code': r['code'],
+            'name': r['name'],
+            'abbr': r.get('abbr'),
+            'type': r.get('type')
+        } for r in rows]
+        self.by_code = {e['code']: e for e in self.entries}
+
+        pairs = []
+        for i, r in enumerate(rows):
+            keys = {r['code'], (r.get('abbr') or '').lower(), (r.get('pinyin') or '').lower(), r['name'].lower()}
+            pairs.extend((key, i) for key in keys if key)
+        pairs.sort()
+        self.keys = [key for key, _ in pairs]
+        self.ids = [i for _, i in pairs]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def search(self, q: str, limit: int = 20) -> List[Dict]:
+        """前缀匹配代码/拼音缩写/全拼/名称，按匹配键排序（完全匹配的代码排在最前）"""
+        q = (q or '').strip().lower()
+        if not q:
+            return []
+        result = []
+        seen = set()
+        for pos in range(bisect_left(self.keys, q), len(self.keys)):
+            if not self.keys[pos].startswith(q):
+                break
+            i = self.ids[pos]
+            if i in seen:
+                continue
+            seen.add(i)
+            result.append(self.entries[i])
+            if len(result) >= limit:
+                break
+        return result
+
+
+def _try_lock(path: str):
+    """以非阻塞方式获取文件排他锁，成功时返回需一直保持打开的文件对象，已被其他进程持有时返回 None"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    f = open(path, 'a+')
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        f.close()
+        return None
+    return f
+
+
+def parse_fund_list(content: str) -> List[Dict]:
+    """解析 fundcode_search.js：var r = [["000001","HXCZHH","华夏成长混合","混合型-灵活","HUAXIACHENGZHANGHUNHE"], ...];"""
+    start, end = content.find('['), content.rfind(']')
+    if start == -1 or end == -1:
+        raise ValueError('基金列表格式不正确')
+    rows = []
+    for item in json.loads(content[start:end + 1]):
+        if len(item) < 3 or not str(item[0]).isdigit() or not item[2]:
+            continue
+        rows.append({
+            'code': str(item[0]),
+            'abbr': item[1] or None,
+            'name': item[2],
+            'type': item[3] if len(item) > 3 else None,
+            'pinyin': item[4] if len(item) > 4 else None
+        })
+    return rows
+
+
+class FundDirectory:
+    """基金目录（Flask 扩展风格）：首次检索时从数据库加载索引，后台线程定期刷新"""
+
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+        "Referer": "http://fund.eastmoney.com/"
+    }
+
+    def __init__(self):
+        self._app = None
+        self._index = None
+        self._loaded_at = 0.0  # 索引从数据库加载的时间（time.monotonic）
+        self._lock = threading.Lock()
+        self._thread = None
+        self._lock_file = None  # 持有文件锁时为打开的锁文件，本进程负责下载
+        self.enabled = False
+        self.url = None
+        self.refresh_interval = timedelta(hours=24)
+        self.timeout = 30
+
+    def init_app(self, app):
+        self._app = app
+        self.enabled = app.config.get('FUND_DIRECTORY_ENABLED', False)
+        self.url = app.config.get('FUND_DIRECTORY_URL')
+        self.refresh_interval = timedelta(hours=app.config.get('FUND_DIRECTORY_REFRESH_HOURS', 24))
+        app.extensions['fund_directory'] = self
+        if not (self.enabled and self.url) or self._thread is not None:
+            return
+        if self._lock_file is None:
+            self._lock_file = _try_lock(app.config['FUND_DIRECTORY_LOCK_FILE'])
+        if self._lock_file is None:
+            logger.info('基金目录由其他进程负责刷新')
+            return
+        self._thread = threading.Thread(target=self._loop, name='fund-directory', daemon=True)
+        self._thread.start()
+
+    @property
+    def _reload_interval(self) -> float:
+        """不负责下载的进程重新加载索引的间隔（秒），与后台刷新的检查间隔一致"""
+        return min(self.refresh_interval.total_seconds(), 3600)
+
+    # ================= 查询 =================
+
+    @property
+    def index(self) -> DirectoryIndex:
+        if self._needs_load():
+            with self._lock:
+                if self._needs_load():
+                    rows = db.session.query(
+                        FundInfo.code, FundInfo.name, FundInfo.abbr, FundInfo.pinyin, FundInfo.type
+                    ).all()
+                    self._index = DirectoryIndex([r._asdict() for r in rows])
+                    self._loaded_at = time.monotonic()
+        return self._index
+
+    def _needs_load(self) -> bool:
+        if self._index is None:
+            return True
+        # 本进程负责刷新时 refresh() 直接替换索引；否则定期重新加载其他进程写入的目录
+        return self._thread is None and time.monotonic() - self._loaded_at >= self._reload_interval
+
+    def search(self, q: str, limit: int = 20) -> List[Dict]:
+        return self.index.search(q, limit)
+
+    def lookup(self, code: str) -> Optional[Dict]:
+        return self.index.by_code.get(code)
+
+    def name_of(self, code: str) -> Optional[str]:
+        entry = self.lookup(code)
+        return entry['name'] if entry else None
+
+    # ================= 刷新 =================
+
+    def fetch(self) -> List[Dict]:
+        """下载并解析全量基金列表"""
+        req = urllib.request.Request(self.url, headers=self.HEADERS)
+        with urllib.request.urlopen(req, timeout=self.timeout) as response:
+            content = response.read().decode('utf-8-sig')
+        return parse_fund_list(content)
+
+    def refresh(self) -> int:
+        """下载全量列表写入数据库并重建索引，返回基金数"""
+        rows = self.fetch()
+        if not rows:
+            raise ValueError('基金列表为空')
+        now = datetime.utcnow()
+        for start in range(0, len(rows), SAVE_CHUNK_SIZE):
+            db_writer.run(self._save, rows[start:start + SAVE_CHUNK_SIZE], now)
+        # 本次列表中已不存在的基金（已清盘等）
+        db_writer.run(self._delete_before, now)
+        self._index = DirectoryIndex(rows)
+        return len(rows)
+
+    @staticmethod
+    def _save(rows: List[Dict], now: datetime) -> None:
+        rows = [dict(r, updated_at=now) for r in rows]
+        stmt = dialects.insert(FundInfo)
+        if stmt is not None:
+            stmt = stmt.values(rows)
+            db.session.execute(stmt.on_conflict_do_update(
+                index_elements=['code'],
+                set_={key: getattr(stmt.excluded, key) for key in ('name', 'abbr', 'pinyin', 'type', 'updated_at')}
+            ))
+            return
+
+        # 其他数据库：逐行查询后更新
+        existing = {f.code: f for f in FundInfo.query.filter(FundInfo.code.in_([r['code'] for r in rows]))}
+        for row in rows:
+            info = existing.get(row['code'])
+            if info is None:
+                db.session.add(FundInfo(**row))
+            else:
+                for key, value in row.items():
+                    setattr(info, key, value)
+
+    @staticmethod
+    def _delete_before(now: datetime) -> None:
+        FundInfo.query.filter(FundInfo.updated_at < now).delete(synchronize_session=False)
+
+    def _is_stale(self) -> bool:
+        last = db.session.query(func.max(FundInfo.updated_at)).scalar()
+        db.session.rollback()
+        return last is None or datetime.utcnow() - last >= self.refresh_interval
+
+    def _loop(self):
+        with self._app.app_context():
+            while True:
+                try:
+                    if self._is_stale():
+                        count = self.refresh()
+                        logger.info('基金目录已刷新：%d 只基金', count)
+                except Exception as exc:
+                    logger.warning('基金目录刷新失败: %s', exc)
+                # 失败后一小时内重试；刷新成功后下次检查时仍未过期则继续等待
+                time.sleep(self._reload_interval)
+
+
+fund_directory = FundDirectory()
@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+"""
+时间序列降采样
+
+- lttb：Largest-Triangle-Three-Buckets，保留曲线形状的代表点
+- bucket_rows：按固定数量分组，每组取最后一个点并附带组内最小/最大值
+- delta_encode / delta_decode：时间戳差分编码，压缩批量接口的响应体积
+"""
+
+import math
+import re
+from typing import Callable, Dict, List, Optional, Sequence
+
+# 降采样模式
+MODE_BUCKET = 'bucket'
+MODE_LTTB = 'lttb'
+MODES = (MODE_BUCKET, MODE_LTTB)
+
+_RESOLUTION_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+_RESOLUTION_RE = re.compile(r'^(\d+)([smhd]?)$')
+
+
+def parse_resolution(value: Optional[str]) -> Optional[int]:
+    """解析分桶粒度：纯数字为秒，也支持 30s / 5m / 1h / 1d；非法时抛出 ValueError"""
+    if value is None or value == '':
+        return None
+    match = _RESOLUTION_RE.match(str(value).strip().lower())
+    if not match:
+        raise ValueError(f'无法解析的 resolution: {value}')
+    seconds = int(match.group(1)) * _RESOLUTION_UNITS[match.group(2) or 's']
+    if seconds <= 0:
+        raise ValueError('resolution 必须大于 0')
+    return seconds
+
+
+def bucket_seconds_for(days: int, points: int) -> int:
+    """把 days 天的窗口分成不超过 points 个桶时的桶宽（秒）。
+
+    桶按 Unix 时间对齐，窗口首尾可能各落在半个桶里，因此按 points - 1 计算。
+    """
+    return max(1, math.ceil(days * 86400 / max(1, points - 1)))
+
+
+def lttb_indices(xs: Sequence[float], ys: Sequence[float], threshold: int) -> List[int]:
+    """LTTB 选点，返回被保留的下标（含首尾点，按 x 递增）"""
+    n = len(xs)
+    if threshold >= n:
+        return list(range(n))
+    if threshold < 3:
+        return [0, n - 1]
+
+    selected = [0]
+    every = (n - 2) / (threshold - 2)
+    a = 0
+    for i in range(threshold - 2):
+        # 下一个桶的平均点
+        avg_start = int((i + 1) * every) + 1
+        avg_end = min(int((i + 2) * every) + 1, n)
+        count = avg_end - avg_start
+        avg_x = sum(xs[avg_start:avg_end]) / count
+        avg_y = sum(ys[avg_start:avg_end]) / count
+
+        # 当前桶中与 a 点、下一桶平均点构成三角形面积最大的点
+        range_start = int(i * every) + 1
+        range_end = int((i + 1) * every) + 1
+        ax, ay = xs[a], ys[a]
+        best, best_area = range_start, -1.0
+        for j in range(range_start, range_end):
+            area = abs((ax - avg_x) * (ys[j] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+def lttb(rows: List[Dict], threshold: int, x: Callable[[Dict], float], y: Callable[[Dict], float]) -> List[Dict]:
+    """对字典行做 LTTB 降采样"""
+    if len(rows) <= threshold:
+        return rows
+    xs = [x(r) for r in rows]
+    ys = [y(r) or 0.0 for r in rows]
+    return [rows[i] for i in lttb_indices(xs, ys, threshold)]
+
+
+def bucket_rows(rows: List[Dict], threshold: int, fields: Sequence[str]) -> List[Dict]:
+    """按顺序把 rows 均分为不超过 threshold 组，每组取最后一行，并附带 fields 的组内 min/max"""
+    if len(rows) <= threshold:
+        return rows
+    size = math.ceil(len(rows) / threshold)
+    result = []
+    for start in range(0, len(rows), size):
+        group = rows[start:start + size]
+        item = dict(group[-1])
+        for field in fields:
+            values = [r[field] for r in group if r.get(field) is not None]
+            item[f'{field}_min'] = min(values) if values else None
+            item[f'{field}_max'] = max(values) if values else None
+        result.append(item)
+    return result
+
+
+def delta_encode(values: Sequence[int]) -> List[int]:
+    """整数序列差分编码：首项为原值，其余为与前一项之差"""
+    result = []
+    prev = 0
+    for v in values:
+        result.append(v - prev)
+        prev = v
+    return result
+
+
+def delta_decode(deltas: Sequence[int]) -> List[int]:
+    """delta_encode 的逆运算"""
+    result = []
+    total = 0
+    for d in deltas:
+        total += d
+        result.append(total)
+    return result
@@ -3,25 +3,29 @@
 """
 基金实盘波动监控工具
 功能：实时获取基金估值变动，计算持仓盈亏，美化终端展示
+
+持仓读取自数据库；默认优先从 Web 服务（/api/funds/live）读取行情，与 Web 页面共用同一份估值缓存，
+服务未启动时改为本地抓取（见 --mode）。
+
+终端界面只重绘发生变化的行；抓取在后台线程进行，刷新期间仍可排序、过滤、滚动：
+  s 切换排序  / 输入过滤  c 清除过滤  r 立即刷新  j/k 或方向键滚动  q 退出
 """
 
+import argparse
 import urllib.request
 import json
+import math
 import time
 import os
+import select
+import shutil
+import sys
+import functools
+import unicodedata
 import concurrent.futures
 from datetime import datetime
 from typing import Dict, Optional, List, Any
 
-# ================= 你的持仓配置 (2026/02/04) =================
-MY_HOLDINGS: Dict[str, float] = {
-    "016533": 100,   # 嘉实纳斯达克100ETF联接(QDII)C
-    "021458": 200,   # 易方达恒生红利低波联接C
-    "022365": 300,   # 永赢科技智选混合C
-    "019305": 400    # 摩根标普500指数(QDII)C
-}
-# ==========================================================
-
 # ================= 终端颜色配置 =================
 class Colors:
     """终端颜色常量"""
@@ -37,81 +41,10 @@ class Colors:
     DIM = '\033[2m'        # 暗淡
 
 
-class FundAPI:
-    """基金数据获取接口"""
-    
-    HEADERS = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
-        "Referer": "http://fund.eastmoney.com/"
-    }
-    TIMEOUT = 5
-    
-    @staticmethod
-    def fetch_from_eastmoney(code: str) -> Optional[Dict]:
-        """从天天基金网获取数据"""
-        try:
-            timestamp = int(time.time() * 1000)
-            url = f"http://fundgz.1234567.com.cn/js/{code}.js?rt={timestamp}"
-            req = urllib.request.Request(url, headers=FundAPI.HEADERS)
-            with urllib.request.urlopen(req, timeout=FundAPI.TIMEOUT) as response:
-                content = response.read().decode('utf-8')
-                start, end = content.find('{'), content.find('}') + 1
-                if start == -1:
-                    return None
-                return json.loads(content[start:end])
-        except (urllib.error.URLError, urllib.error.HTTPError, json.JSONDecodeError, TimeoutError):
-            return None
-
-
-def get_fund_data(code: str) -> Optional[Dict]:
-    """获取基金数据"""
-    data = FundAPI.fetch_from_eastmoney(code)
-    if data and 'gszzl' in data:
-        return data
-    return None
-
-
-def process_one_fund(code: str, amount: float) -> Dict[str, Any]:
-    """处理单个基金数据"""
-    data = get_fund_data(code)
-    
-    if data:
-        try:
-            rate = float(data.get('gszzl', 0))
-            profit = amount * (rate / 100)
-            name = data.get('name', '未知基金')
-            return {
-                "code": code,
-                "name": name,
-                "rate": rate,
-                "profit": profit,
-                "amount": amount,
-                "success": True
-            }
-        except (ValueError, TypeError):
-            pass
-    
-    return {
-        "code": code,
-        "name": "获取失败",
-        "amount": amount,
-        "success": False,
-        "profit": 0,
-        "rate": 0
-    }
-
-
+@functools.lru_cache(maxsize=4096)
 def get_display_len(s: str) -> int:
-    """计算字符串显示长度（中文算2格，英文算1格）"""
-    length = 0
-    for char in s:
-        if '\u4e00' <= char <= '\u9fff':
-            length += 2
-        elif char in '（）【】《》、，。！？；：':
-            length += 2
-        else:
-            length += 1
-    return length
+    """计算字符串显示长度（全角/宽字符算2格，其余算1格），按字符串缓存"""
+    return sum(2 if unicodedata.east_asian_width(char) in ('W', 'F') else 1 for char in s)
 
 
 def pad_string(s: str, width: int) -> str:
@@ -125,72 +58,232 @@ def draw_bar(rate: float, max_blocks: int = 20) -> str:
     """绘制涨跌柱状图"""
     blocks = int(abs(rate) / 0.25)
     blocks = min(blocks, max_blocks)
-    
+
     if blocks == 0:
         return f"{Colors.DIM}{'─' * 3}{Colors.RESET}"
-    
+
     if rate > 0:
         return f"{Colors.RED}{'▲' * blocks}{Colors.RESET}"
     else:
         return f"{Colors.GREEN}{'▼' * blocks}{Colors.RESET}"
 
 
-def clear_screen():
-    """清屏"""
-    os.system('cls' if os.name == 'nt' else 'clear')
+# ================= 终端渲染 =================
+
+class ScreenRenderer:
+    """差量渲染：记住上一帧的每一行，只用 ANSI 光标定位重绘发生变化的行，不清屏、不启动子进程"""
+
+    def __init__(self, out=None):
+        self.out = out or sys.stdout
+        self._lines: Optional[List[str]] = None
+
+    def __enter__(self):
+        # 切换到备用屏幕、隐藏光标、关闭自动换行（超宽的行被截断而不是折行打乱定位）
+        self.out.write('\033[?1049h\033[?25l\033[?7l')
+        self.out.flush()
+        return self
+
+    def __exit__(self, *exc):
+        self.out.write('\033[?7h\033[?25h\033[?1049l')
+        self.out.flush()
+        return False
+
+    def reset(self):
+        """下一帧整屏重绘（终端尺寸变化时）"""
+        self._lines = None
+
+    def render(self, lines: List[str]) -> None:
+        prev = self._lines
+        buf = []
+        if prev is None:
+            buf.append('\033[2J')
+            prev = []
+        for i, line in enumerate(lines):
+            if i >= len(prev) or prev[i] != line:
+                buf.append(f'\033[{i + 1};1H{line}\033[K')
+        if len(lines) < len(prev):
+            buf.append(f'\033[{len(lines) + 1};1H\033[J')
+        self._lines = list(lines)
+        if buf:
+            self.out.write(''.join(buf))
+            self.out.flush()
+
+
+def split_keys(data: str) -> List[str]:
+    """把读到的输入拆成按键：CSI 转义序列（如 \\033[A）作为一个整体，其余逐字符"""
+    keys = []
+    i = 0
+    while i < len(data):
+        if data.startswith('\033[', i):
+            end = i + 2
+            while end < len(data) and not ('@' <= data[end] <= '~'):
+                end += 1
+            keys.append(data[i:end + 1])
+            i = end + 1
+        else:
+            keys.append(data[i])
+            i += 1
+    return keys
+
+
+class Keyboard:
+    """非阻塞读取按键：POSIX 使用 cbreak 模式 + select，Windows 使用 msvcrt；标准输入不是终端时只等待"""
+
+    def __init__(self):
+        self._fd = None
+        self._saved = None
+        self._pending: List[str] = []
+
+    def __enter__(self):
+        if os.name != 'nt' and sys.stdin.isatty():
+            import termios
+            import tty
+            self._fd = sys.stdin.fileno()
+            self._saved = termios.tcgetattr(self._fd)
+            tty.setcbreak(self._fd)
+        return self
+
+    def __exit__(self, *exc):
+        if self._saved is not None:
+            import termios
+            termios.tcsetattr(self._fd, termios.TCSADRAIN, self._saved)
+        return False
+
+    def read(self, timeout: float) -> Optional[str]:
+        """最多等待 timeout 秒，返回按键（方向键等为完整的转义序列），无按键返回 None"""
+        if self._pending:
+            return self._pending.pop(0)
+        if self._fd is not None:
+            ready, _, _ = select.select([self._fd], [], [], max(0.0, timeout))
+            if ready:
+                # 一次可能读到多个按键（快速输入、粘贴），拆开后逐个返回
+                self._pending = split_keys(os.read(self._fd, 256).decode('utf-8', errors='ignore'))
+                return self._pending.pop(0) if self._pending else None
+            return None
+        if os.name == 'nt' and sys.stdin.isatty():
+            import msvcrt
+            deadline = time.monotonic() + timeout
+            while True:
+                if msvcrt.kbhit():
+                    key = msvcrt.getwch()
+                    if key in ('\x00', '\xe0'):
+                        # 方向键：转换为与 POSIX 相同的转义序列
+                        key = {'H': '\033[A', 'P': '\033[B', 'I': '\033[5~', 'Q': '\033[6~'}.get(msvcrt.getwch(), '')
+                    return key
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(0.02)
+        time.sleep(max(0.0, timeout))
+        return None
+
+
+# ================= 数据来源 =================
+
+class ServerSource:
+    """客户端模式：从 Web 服务读取最新一批行情，抓取与缓存由服务端统一完成"""
+
+    label = '服务端'
+
+    def __init__(self, base_url: str, max_age: float, timeout: float = 5):
+        self.base_url = base_url.rstrip('/')
+        self.max_age = max_age
+        self.timeout = timeout
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        url = f"{self.base_url}/api/funds/live?max_age={self.max_age:g}"
+        with urllib.request.urlopen(url, timeout=self.timeout) as response:
+            payload = json.loads(response.read().decode('utf-8'))
+        if not payload.get('success'):
+            raise ValueError(payload.get('message') or '服务端返回失败')
+        return payload['data']['funds']
+
+
+class LocalSource:
+    """本地模式：从数据库读取持仓，用 services 中与 Web 服务相同的获取与缓存逻辑直接抓取"""
+
+    label = '本地'
+
+    def __init__(self):
+        self._app = None
+
+    def fetch(self) -> List[Dict[str, Any]]:
+        if self._app is None:
+            # 只读取数据，不启动回填、基金目录等后台任务
+            os.environ.setdefault('NAV_BACKFILL_ENABLED', '0')
+            os.environ.setdefault('FUND_DIRECTORY_ENABLED', '0')
+            from app import create_app
+            self._app = create_app()
+        from services import FundSnapshotService, HoldingService
+        with self._app.app_context():
+            results, _ = FundSnapshotService.build_results(HoldingService.get_holdings_dict())
+        return results
 
 
-def print_header():
-    """打印标题头"""
-    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    
-    print(f"{Colors.CYAN}{'═' * 70}{Colors.RESET}")
-    print(f"{Colors.BOLD}{Colors.CYAN}║{' ' * 20}基金实盘波动监控中心{' ' * 20}║{Colors.RESET}")
-    print(f"{Colors.CYAN}{'═' * 70}{Colors.RESET}")
-    print(f"{Colors.DIM}  更新时间: {now}{Colors.RESET}")
-    print()
-    
-    print(f"{Colors.BOLD}{'代码':<8} {'基金名称':<30} {'持仓金额':>10} {'预估盈亏':>10} {'涨跌幅':>8}  {'波动图'}{Colors.RESET}")
-    print(f"{Colors.DIM}{'─' * 90}{Colors.RESET}")
+class FallbackSource:
+    """优先从 Web 服务读取，服务不可用时改为本地抓取；每轮刷新都先尝试 Web 服务"""
 
+    def __init__(self, primary, fallback):
+        self.primary = primary
+        self.fallback = fallback
+        self.label = primary.label
 
-def print_fund_row(item: Dict[str, Any]):
-    """打印单行基金数据"""
+    def fetch(self) -> List[Dict[str, Any]]:
+        try:
+            results = self.primary.fetch()
+            self.label = self.primary.label
+        except Exception:
+            results = self.fallback.fetch()
+            self.label = f"{self.fallback.label}（{self.primary.label}不可用）"
+        return results
+
+
+# ================= 监控面板 =================
+
+TABLE_WIDTH = 90
+
+# (结果字段, 显示名称, 是否降序)
+SORT_KEYS = [
+    ('profit', '盈亏', True),
+    ('rate', '涨跌幅', True),
+    ('amount', '持仓金额', True),
+    ('code', '代码', False),
+]
+
+
+def format_fund_row(item: Dict[str, Any]) -> str:
+    """格式化单行基金数据"""
     if not item['success']:
-        print(f"{Colors.YELLOW}{item['code']:<8}{Colors.RESET} "
-              f"{pad_string('⚠ 数据获取失败', 30)} "
-              f"{item['amount']:>10.2f} "
-              f"{'--':>10} "
-              f"{'--':>8}")
-        return
-    
+        return (f"{Colors.YELLOW}{item['code']:<8}{Colors.RESET} "
+                f"{pad_string('⚠ 数据获取失败', 30)} "
+                f"{item['amount']:>10.2f} "
+                f"{'--':>10} "
+                f"{'--':>8}")
+
     if item['profit'] > 0:
-        profit_color = Colors.RED
-        rate_color = Colors.RED
+        color = Colors.RED
     elif item['profit'] < 0:
-        profit_color = Colors.GREEN
-        rate_color = Colors.GREEN
+        color = Colors.GREEN
     else:
-        profit_color = Colors.WHITE
-        rate_color = Colors.WHITE
-    
+        color = Colors.WHITE
+
     name_str = pad_string(item['name'][:16], 30)
     profit_str = f"{item['profit']:+.2f}"
     rate_str = f"{item['rate']:+.2f}%"
-    bar_chart = draw_bar(item['rate'])
-    
-    print(f"{item['code']:<8} "
-          f"{name_str} "
-          f"{item['amount']:>10.2f} "
-          f"{profit_color}{profit_str:>10}{Colors.RESET} "
-          f"{rate_color}{rate_str:>8}{Colors.RESET}  "
-          f"{bar_chart}")
-
-
-def print_summary(total_profit: float, total_amount: float, success_count: int, total_count: int):
-    """打印汇总信息"""
-    print(f"{Colors.DIM}{'─' * 90}{Colors.RESET}")
-    
+
+    return (f"{item['code']:<8} "
+            f"{name_str} "
+            f"{item['amount']:>10.2f} "
+            f"{color}{profit_str:>10}{Colors.RESET} "
+            f"{color}{rate_str:>8}{Colors.RESET}  "
+            f"{draw_bar(item['rate'])}")
+
+
+def summary_lines(results: List[Dict[str, Any]]) -> List[str]:
+    """汇总信息"""
+    ok = [r for r in results if r['success']]
+    total_profit = sum(r['profit'] for r in ok)
+    total_amount = sum(r['amount'] for r in ok)
+
     if total_profit > 0:
         summary_color = Colors.RED
         status = "盈利"
@@ -200,83 +293,222 @@ def print_summary(total_profit: float, total_amount: float, success_count: int,
     else:
         summary_color = Colors.WHITE
         status = "持平"
-    
+
     total_rate = (total_profit / total_amount * 100) if total_amount > 0 else 0
-    
-    print(f"\n{Colors.BOLD}【持仓汇总】{Colors.RESET}")
-    print(f"  总持仓金额: {Colors.CYAN}{total_amount:.2f}{Colors.RESET} 元")
-    print(f"  预估{status}: {summary_color}{total_profit:+.2f}{Colors.RESET} 元 "
-          f"({summary_color}{total_rate:+.2f}%{Colors.RESET})")
-    print(f"  数据状态: {success_count}/{total_count} 只基金获取成功")
-    
+
+    lines = [
+        f"{Colors.BOLD}【持仓汇总】{Colors.RESET}",
+        f"  总持仓金额: {Colors.CYAN}{total_amount:.2f}{Colors.RESET} 元",
+        f"  预估{status}: {summary_color}{total_profit:+.2f}{Colors.RESET} 元 "
+        f"({summary_color}{total_rate:+.2f}%{Colors.RESET})",
+        f"  数据状态: {len(ok)}/{len(results)} 只基金获取成功",
+    ]
+
     # 盈亏条形图
     bar_width = 40
     if total_amount > 0:
         profit_ratio = min(abs(total_profit) / (total_amount * 0.05), 1.0)
         filled = int(bar_width * profit_ratio)
-        if total_profit >= 0:
-            bar = f"{Colors.RED}{'█' * filled}{Colors.DIM}{'░' * (bar_width - filled)}{Colors.RESET}"
+        color = Colors.RED if total_profit >= 0 else Colors.GREEN
+        lines.append(f"  盈亏可视化: {color}{'█' * filled}{Colors.DIM}{'░' * (bar_width - filled)}{Colors.RESET}")
+    return lines
+
+
+class Dashboard:
+    """监控面板：抓取在线程池中进行，主循环只负责按键、倒计时与差量渲染，三者互不阻塞"""
+
+    def __init__(self, source, refresh_interval: int = 60):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.renderer = ScreenRenderer()
+        self.results: List[Dict[str, Any]] = []
+        self.loaded = False
+        self.error: Optional[str] = None
+        self.updated_at: Optional[str] = None
+        self.pending: Optional[concurrent.futures.Future] = None
+        self.next_refresh = 0.0
+        self.sort_index = 0
+        self.filter_text = ''
+        self.editing: Optional[str] = None  # 正在输入的过滤条件
+        self.offset = 0  # 列表滚动位置
+        self.running = True
+
+    # ---------- 数据 ----------
+
+    def start_refresh(self):
+        """提交一轮抓取（上一轮未完成时忽略）"""
+        if self.pending is None:
+            self.pending = self.executor.submit(self.source.fetch)
+
+    def poll_refresh(self):
+        """抓取完成后替换数据（失败时保留上一批并显示错误），并安排下一次刷新"""
+        if self.pending is None or not self.pending.done():
+            return
+        try:
+            results = self.pending.result()
+        except Exception as exc:
+            self.error = str(exc) or exc.__class__.__name__
+        else:
+            for item in results:
+                # 行文本在数据更新时格式化一次，之后每帧直接复用
+                item['line'] = format_fund_row(item)
+            self.results = results
+            self.loaded = True
+            self.error = None
+            self.updated_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        self.pending = None
+        self.next_refresh = time.monotonic() + self.refresh_interval
+
+    def visible_results(self) -> List[Dict[str, Any]]:
+        key, _, reverse = SORT_KEYS[self.sort_index]
+        items = self.results
+        if self.filter_text:
+            text = self.filter_text.lower()
+            items = [r for r in items if text in r['code'] or text in r['name'].lower()]
+        return sorted(items, key=lambda r: r.get(key, 0), reverse=reverse)
+
+    # ---------- 按键 ----------
+
+    def handle_key(self, key: str, page: int):
+        if self.editing is not None:
+            if key in ('\r', '\n'):
+                self.filter_text, self.editing, self.offset = self.editing.strip(), None, 0
+            elif key == '\033':
+                self.editing = None
+            elif key in ('\x7f', '\b'):
+                self.editing = self.editing[:-1]
+            elif key.isprintable():
+                self.editing += key
+            return
+
+        if key in ('q', 'Q'):
+            self.running = False
+        elif key in ('s', 'S'):
+            self.sort_index = (self.sort_index + 1) % len(SORT_KEYS)
+        elif key == '/':
+            self.editing = self.filter_text
+        elif key in ('c', 'C'):
+            self.filter_text, self.offset = '', 0
+        elif key in ('r', 'R'):
+            self.next_refresh = 0.0
+        elif key in ('j', '\033[B'):
+            self.offset += 1
+        elif key in ('k', '\033[A'):
+            self.offset -= 1
+        elif key in (' ', '\033[6~'):
+            self.offset += page
+        elif key in ('b', '\033[5~'):
+            self.offset -= page
+
+    # ---------- 渲染 ----------
+
+    def build_frame(self, height: int) -> List[str]:
+        sort_name = SORT_KEYS[self.sort_index][1]
+        status = f"  更新时间: {self.updated_at or '--'}  |  数据来源: {self.source.label}  |  排序: {sort_name}"
+        if self.filter_text:
+            status += f"  |  过滤: {self.filter_text}"
+
+        lines = [
+            f"{Colors.CYAN}{'═' * 70}{Colors.RESET}",
+            f"{Colors.BOLD}{Colors.CYAN}║{' ' * 20}基金实盘波动监控中心{' ' * 20}║{Colors.RESET}",
+            f"{Colors.CYAN}{'═' * 70}{Colors.RESET}",
+            f"{Colors.DIM}{status}{Colors.RESET}",
+            "",
+            f"{Colors.BOLD}{'代码':<8} {'基金名称':<30} {'持仓金额':>10} {'预估盈亏':>10} {'涨跌幅':>8}  {'波动图'}{Colors.RESET}",
+            f"{Colors.DIM}{'─' * TABLE_WIDTH}{Colors.RESET}",
+        ]
+
+        if self.pending is not None:
+            remaining_text = f"{Colors.YELLOW}正在刷新...{Colors.RESET}"
         else:
-            bar = f"{Colors.GREEN}{'█' * filled}{Colors.DIM}{'░' * (bar_width - filled)}{Colors.RESET}"
-        print(f"\n  盈亏可视化: {bar}")
+            remaining = max(0, math.ceil(self.next_refresh - time.monotonic()))
+            remaining_text = f"下次刷新: {remaining}秒"
+        if self.editing is not None:
+            prompt = f"  过滤: {self.editing}▏ {Colors.DIM}(回车确定 / Esc 取消){Colors.RESET}"
+        else:
+            prompt = f"{Colors.DIM}  [s]排序 [/]过滤 [c]清除过滤 [r]立即刷新 [j/k]滚动 [q]退出{Colors.RESET}"
+
+        tail = [f"{Colors.DIM}{'─' * TABLE_WIDTH}{Colors.RESET}"]
+        tail += summary_lines(self.results) if self.results else []
+        tail += [f"{Colors.DIM}{'─' * TABLE_WIDTH}{Colors.RESET}", f"  {remaining_text}", prompt]
+
+        # 表格只占用剩余的行数，超出部分滚动查看
+        items = self.visible_results()
+        page = max(1, height - len(lines) - len(tail) - 1)
+        self.offset = max(0, min(self.offset, len(items) - page))
+        shown = items[self.offset:self.offset + page]
+        lines += [r['line'] for r in shown]
+        if self.error:
+            lines.append(f"{Colors.YELLOW}  ⚠ 获取失败: {self.error}{Colors.RESET}")
+        if not self.results:
+            if self.loaded:
+                lines.append(f"{Colors.DIM}  暂无持仓，请在 Web 页面添加{Colors.RESET}")
+            elif not self.error:
+                lines.append(f"{Colors.CYAN}正在获取基金数据...{Colors.RESET}")
+        elif len(items) > page:
+            lines.append(f"{Colors.DIM}  第 {self.offset + 1}-{self.offset + len(shown)} 只 / 共 {len(items)} 只{Colors.RESET}")
+        return lines + tail
+
+    def _wait_time(self) -> float:
+        """主循环等待按键的最长时间：抓取中快速轮询结果，否则等到倒计时下一次跳秒"""
+        if self.pending is not None:
+            return 0.05
+        remaining = self.next_refresh - time.monotonic()
+        return max(0.0, min(remaining - math.floor(remaining) or 1.0, remaining))
+
+    def run(self):
+        size = None
+        with Keyboard() as keyboard, self.renderer:
+            while self.running:
+                if self.pending is None and time.monotonic() >= self.next_refresh:
+                    self.start_refresh()
+                self.poll_refresh()
+
+                current = shutil.get_terminal_size()
+                if current != size:
+                    size = current
+                    self.renderer.reset()
+                frame = self.build_frame(size.lines)
+                self.renderer.render(frame)
 
+                key = keyboard.read(self._wait_time())
+                if key:
+                    self.handle_key(key, page=max(1, size.lines // 2))
+        self.executor.shutdown(wait=False, cancel_futures=True)
 
-def print_footer(refresh_seconds: int):
-    """打印底部信息"""
-    print(f"\n{Colors.DIM}{'─' * 90}{Colors.RESET}")
-    print(f"{Colors.DIM}  自动刷新倒计时: {refresh_seconds}秒 | 按 Ctrl+C 退出{Colors.RESET}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='基金实盘波动监控（终端版）')
+    parser.add_argument('--mode', choices=('auto', 'server', 'local'), default='auto',
+                        help='数据来源：auto 优先 Web 服务、不可用时本地抓取（默认）；server 只用 Web 服务；local 只读数据库并本地抓取')
+    parser.add_argument('--server', default=os.environ.get('FUND_PULSE_SERVER', 'http://localhost:5000'),
+                        help='Web 服务地址（默认 http://localhost:5000，或环境变量 FUND_PULSE_SERVER）')
+    parser.add_argument('--interval', type=int, default=60, help='刷新间隔（秒）')
+    return parser.parse_args(argv)
 
 
 def main():
     """主函数"""
-    os.system('')
-    
-    REFRESH_INTERVAL = 60
-    
-    print(f"\n{Colors.CYAN}正在初始化基金监控系统...{Colors.RESET}")
-    time.sleep(1)
-    
+    args = parse_args()
+    if os.name == 'nt':
+        # 启用 Windows 控制台的 ANSI 转义序列支持
+        os.system('')
+
+    server = ServerSource(args.server, max_age=args.interval)
+    if args.mode == 'server':
+        source = server
+    elif args.mode == 'local':
+        source = LocalSource()
+    else:
+        source = FallbackSource(server, LocalSource())
+
+    dashboard = Dashboard(source, args.interval)
     try:
-        while True:
-            start_time = time.time()
-            results: List[Dict] = []
-            
-            with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                futures = {
-                    executor.submit(process_one_fund, code, amount): code 
-                    for code, amount in MY_HOLDINGS.items()
-                }
-                for future in concurrent.futures.as_completed(futures):
-                    results.append(future.result())
-            
-            results.sort(key=lambda x: x.get("profit", 0), reverse=True)
-            
-            clear_screen()
-            print_header()
-            
-            total_profit = 0.0
-            total_amount = 0.0
-            success_count = 0
-            
-            for item in results:
-                print_fund_row(item)
-                if item['success']:
-                    total_profit += item['profit']
-                    total_amount += item['amount']
-                    success_count += 1
-            
-            print_summary(total_profit, total_amount, success_count, len(results))
-            
-            elapsed = time.time() - start_time
-            remaining = max(1, REFRESH_INTERVAL - int(elapsed))
-            print_footer(remaining)
-            
-            for i in range(remaining, 0, -1):
-                print(f"\r{Colors.DIM}  下次刷新: {i}秒后...{Colors.RESET}", end="", flush=True)
-                time.sleep(1)
-                
+        dashboard.run()
     except KeyboardInterrupt:
-        print(f"\n\n{Colors.YELLOW}感谢使用，再见！{Colors.RESET}")
+        pass
+    print(f"{Colors.YELLOW}感谢使用，再见！{Colors.RESET}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+数据库迁移辅助函数
+
+供 migrations/versions 下的迁移脚本使用：
+- 大表回填按主键区间分批执行，每批单独提交，刷新写入可在批次之间穿插进行
+- 索引在 PostgreSQL 上使用 CONCURRENTLY 在线创建，不长时间阻塞写入
+"""
+
+import time
+
+import sqlalchemy as sa
+from alembic import op
+
+# 每批回填的主键区间大小
+BACKFILL_BATCH_SIZE = 5000
+# 批次之间的让出时间（秒），给刷新写入留出获取写锁的机会
+BACKFILL_PAUSE = 0.01
+
+
+def table_exists(name):
+    """判断表是否已存在（兼容迁移引入前由 create_all 建出的旧库）"""
+    return sa.inspect(op.get_bind()).has_table(name)
+
+
+def index_exists(table, name):
+    """判断索引是否已存在"""
+    if not table_exists(table):
+        return False
+    return any(ix['name'] == name for ix in sa.inspect(op.get_bind()).get_indexes(table))
+
+
+def column_exists(table, name):
+    """判断字段是否已存在"""
+    return any(col['name'] == name for col in sa.inspect(op.get_bind()).get_columns(table))
+
+
+def batched_backfill(table, sql, batch_size=BACKFILL_BATCH_SIZE, pause=BACKFILL_PAUSE, start_after=0):
+    """按主键区间分批执行回填 SQL。
+
+    sql 为带 :lo / :hi 参数的语句，处理 id > :lo AND id <= :hi 的行。
+    在 autocommit 块中执行，每批自动提交，避免一次性锁住整张大表。
+    start_after 之后（不含）的行才会处理。返回已处理到的最大主键（表为空时返回 start_after）。
+    """
+    bind = op.get_bind()
+    bounds = bind.execute(
+        sa.text(f"SELECT MIN(id), MAX(id) FROM {table} WHERE id > :start"), {'start': start_after}
+    ).first()
+    if not bounds or bounds[0] is None:
+        return start_after
+
+    lo, max_id = bounds[0] - 1, bounds[1]
+    stmt = sa.text(sql)
+    with op.get_context().autocommit_block():
+        while lo < max_id:
+            hi = min(lo + batch_size, max_id)
+            op.get_bind().execute(stmt, {'lo': lo, 'hi': hi})
+            lo = hi
+            if pause:
+                time.sleep(pause)
+    return max_id
+
+
+def create_index_online(name, table, columns, unique=False):
+    """在线创建索引：PostgreSQL 使用 CREATE INDEX CONCURRENTLY；
+    sqlite 不支持并发建索引，在独立的短事务中创建，不与回填共享锁。"""
+    if index_exists(table, name):
+        return
+    dialect = op.get_bind().dialect.name
+    with op.get_context().autocommit_block():
+        if dialect == 'postgresql':
+            op.create_index(name, table, columns, unique=unique, postgresql_concurrently=True)
+        else:
+            op.create_index(name, table, columns, unique=unique)
+
+
+def drop_index_online(name, table):
+    """在线删除索引"""
+    if not index_exists(table, name):
+        return
+    dialect = op.get_bind().dialect.name
+    with op.get_context().autocommit_block():
+        if dialect == 'postgresql':
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+        else:
+            op.drop_index(name, table_name=table)
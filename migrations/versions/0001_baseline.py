@@ -0,0 +1,67 @@
+"""baseline: holdings / fund_snapshots
+
+迁移引入前的数据库由 db.create_all() 建表，并在启动时手工补 sort_order 字段。
+本迁移对已存在的表与字段做幂等处理，旧库升级时直接接管。
+
+Revision ID: 0001
+Revises: 
+Create Date: 2026-10-19 10:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migration_helpers import column_exists, index_exists, table_exists
+
+
+# revision identifiers, used by Alembic.
+revision = '0001'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if not table_exists('holdings'):
+        op.create_table(
+            'holdings',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('code', sa.String(length=10), nullable=False),
+            sa.Column('name', sa.String(length=100)),
+            sa.Column('amount', sa.Float(), nullable=False),
+            sa.Column('sort_order', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('created_at', sa.DateTime()),
+            sa.Column('updated_at', sa.DateTime()),
+        )
+    elif not column_exists('holdings', 'sort_order'):
+        op.add_column('holdings', sa.Column('sort_order', sa.Integer(), nullable=False, server_default='0'))
+
+    if not index_exists('holdings', 'ix_holdings_code'):
+        op.create_index('ix_holdings_code', 'holdings', ['code'], unique=True)
+    if not index_exists('holdings', 'ix_holdings_sort_order'):
+        op.create_index('ix_holdings_sort_order', 'holdings', ['sort_order'])
+
+    if not table_exists('fund_snapshots'):
+        op.create_table(
+            'fund_snapshots',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('code', sa.String(length=10), nullable=False),
+            sa.Column('name', sa.String(length=100)),
+            sa.Column('rate', sa.Float()),
+            sa.Column('profit', sa.Float()),
+            sa.Column('amount', sa.Float()),
+            sa.Column('snapshot_time', sa.DateTime()),
+        )
+
+    for name, columns in (
+        ('ix_fund_snapshots_code', ['code']),
+        ('ix_fund_snapshots_snapshot_time', ['snapshot_time']),
+        ('idx_code_time', ['code', 'snapshot_time']),
+    ):
+        if not index_exists('fund_snapshots', name):
+            op.create_index(name, 'fund_snapshots', columns)
+
+
+def downgrade():
+    op.drop_table('fund_snapshots')
+    op.drop_table('holdings')
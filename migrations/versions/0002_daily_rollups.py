@@ -0,0 +1,69 @@
+"""fund_daily_rollups: 每只基金每天最后一次快照
+
+大库上 fund_snapshots 可能有数百万行，回填按主键区间分批提交，
+刷新写入可在批次之间继续进行。
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19 10:30:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from migration_helpers import batched_backfill, create_index_online, table_exists
+
+
+# revision identifiers, used by Alembic.
+revision = '0002'
+down_revision = '0001'
+branch_labels = None
+depends_on = None
+
+
+def _day_expr(column):
+    if op.get_bind().dialect.name == 'sqlite':
+        return f"date({column})"
+    return f"CAST({column} AS DATE)"
+
+
+def upgrade():
+    if not table_exists('fund_daily_rollups'):
+        op.create_table(
+            'fund_daily_rollups',
+            sa.Column('id', sa.Integer(), primary_key=True),
+            sa.Column('code', sa.String(length=10), nullable=False),
+            sa.Column('day', sa.Date(), nullable=False),
+            sa.Column('name', sa.String(length=100)),
+            sa.Column('rate', sa.Float()),
+            sa.Column('profit', sa.Float()),
+            sa.Column('amount', sa.Float()),
+            sa.Column('last_time', sa.DateTime(), nullable=False),
+        )
+    # 回填依赖唯一索引做 upsert，先在空表上建索引
+    create_index_online('uq_rollup_code_day', 'fund_daily_rollups', ['code', 'day'], unique=True)
+
+    day = _day_expr('snapshot_time')
+    batched_backfill('fund_snapshots', f"""
+        INSERT INTO fund_daily_rollups (code, day, name, rate, profit, amount, last_time)
+        SELECT s.code, {_day_expr('s.snapshot_time')}, s.name, s.rate, s.profit, s.amount, s.snapshot_time
+        FROM fund_snapshots s
+        JOIN (
+            SELECT code, MAX(snapshot_time) AS max_time
+            FROM fund_snapshots
+            WHERE id > :lo AND id <= :hi AND snapshot_time IS NOT NULL
+            GROUP BY code, {day}
+        ) m ON s.code = m.code AND s.snapshot_time = m.max_time
+        WHERE s.id > :lo AND s.id <= :hi
+        ON CONFLICT (code, day) DO UPDATE SET
+            name = excluded.name,
+            rate = excluded.rate,
+            profit = excluded.profit,
+            amount = excluded.amount,
+            last_time = excluded.last_time
+        WHERE excluded.last_time >= fund_daily_rollups.last_time
+    """)
+
+
+def downgrade():
+    op.drop_table('fund_daily_rollups')
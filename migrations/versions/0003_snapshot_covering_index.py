@@ -0,0 +1,38 @@
+"""覆盖索引：fund_snapshots 替换冗余索引，fund_daily_rollups 增加按天索引
+
+以 (code, snapshot_time, rate, profit, amount, name) 覆盖索引替换
+ix_fund_snapshots_code / ix_fund_snapshots_snapshot_time / idx_code_time。
+先在线建新索引，再删除旧索引，期间查询始终有可用索引。
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19 11:00:00
+
+"""
+from migration_helpers import create_index_online, drop_index_online
+
+
+# revision identifiers, used by Alembic.
+revision = '0003'
+down_revision = '0002'
+branch_labels = None
+depends_on = None
+
+COVER_COLUMNS = ['code', 'snapshot_time', 'rate', 'profit', 'amount', 'name']
+ROLLUP_COVER_COLUMNS = ['day', 'code', 'last_time', 'profit', 'amount']
+
+
+def upgrade():
+    create_index_online('idx_snapshots_code_time_cover', 'fund_snapshots', COVER_COLUMNS)
+    create_index_online('idx_rollup_day_cover', 'fund_daily_rollups', ROLLUP_COVER_COLUMNS)
+    drop_index_online('idx_code_time', 'fund_snapshots')
+    drop_index_online('ix_fund_snapshots_code', 'fund_snapshots')
+    drop_index_online('ix_fund_snapshots_snapshot_time', 'fund_snapshots')
+
+
+def downgrade():
+    create_index_online('ix_fund_snapshots_code', 'fund_snapshots', ['code'])
+    create_index_online('ix_fund_snapshots_snapshot_time', 'fund_snapshots', ['snapshot_time'])
+    create_index_online('idx_code_time', 'fund_snapshots', ['code', 'snapshot_time'])
+    drop_index_online('idx_rollup_day_cover', 'fund_daily_rollups')
+    drop_index_online('idx_snapshots_code_time_cover', 'fund_snapshots')
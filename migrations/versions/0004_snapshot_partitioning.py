@@ -0,0 +1,122 @@
+"""PostgreSQL: fund_snapshots 按时间分区
+
+仅在 PostgreSQL 上执行，SQLite 直接跳过。分区方式由配置 SNAPSHOT_PARTITIONING 决定：
+- timescale：转换为 TimescaleDB hypertable（按 7 天一个 chunk）
+- native：原生 RANGE 分区（按月一个分区 + DEFAULT 分区）
+- auto（默认）：安装了 timescaledb 扩展时用 timescale，否则用 native
+- none：不分区
+
+两种方式都要求主键包含分区字段，主键由 (id) 改为 (id, snapshot_time)。
+原生分区的数据迁移按主键分批复制，最后在短暂的排他锁内补齐增量并切换表名。
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19 12:00:00
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+from flask import current_app
+
+from dialects import month_partition_ddl, month_start
+from migration_helpers import batched_backfill
+
+
+# revision identifiers, used by Alembic.
+revision = '0004'
+down_revision = '0003'
+branch_labels = None
+depends_on = None
+
+COPY_COLUMNS = 'id, code, name, rate, profit, amount, snapshot_time'
+
+
+def _partitioning_mode(bind):
+    mode = (current_app.config.get('SNAPSHOT_PARTITIONING') or 'auto').lower()
+    if mode != 'auto':
+        return mode
+    available = bind.execute(sa.text(
+        "SELECT 1 FROM pg_available_extensions WHERE name = 'timescaledb'"
+    )).scalar()
+    return 'timescale' if available else 'native'
+
+
+def _fill_null_times(bind):
+    # 分区字段不能为空
+    bind.execute(sa.text(
+        "UPDATE fund_snapshots SET snapshot_time = now() AT TIME ZONE 'utc' WHERE snapshot_time IS NULL"
+    ))
+    op.alter_column('fund_snapshots', 'snapshot_time', nullable=False)
+
+
+def _upgrade_timescale(bind):
+    bind.execute(sa.text("CREATE EXTENSION IF NOT EXISTS timescaledb"))
+    _fill_null_times(bind)
+    op.drop_constraint('fund_snapshots_pkey', 'fund_snapshots', type_='primary')
+    op.create_primary_key('fund_snapshots_pkey', 'fund_snapshots', ['id', 'snapshot_time'])
+    bind.execute(sa.text(
+        "SELECT create_hypertable('fund_snapshots', 'snapshot_time', "
+        "chunk_time_interval => INTERVAL '7 days', migrate_data => true, if_not_exists => true)"
+    ))
+
+
+def _upgrade_native(bind):
+    _fill_null_times(bind)
+
+    op.execute(
+        "CREATE TABLE fund_snapshots_part (LIKE fund_snapshots INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (snapshot_time)"
+    )
+    op.execute("ALTER TABLE fund_snapshots_part ADD PRIMARY KEY (id, snapshot_time)")
+    op.execute(
+        "CREATE INDEX idx_snapshots_code_time_cover_part ON fund_snapshots_part "
+        "(code, snapshot_time, rate, profit, amount, name)"
+    )
+
+    # 已有数据所在月份 + 未来 3 个月的分区，其余落入 DEFAULT 分区；
+    # 分区直接使用切换表名后的最终名称（fund_snapshots_pYYYYMM）
+    first = bind.execute(sa.text("SELECT MIN(snapshot_time) FROM fund_snapshots")).scalar()
+    month = month_start(first.date() if first else date.today())
+    last = month_start(date.today(), 3)
+    while month <= last:
+        op.execute(month_partition_ddl('fund_snapshots_part', month, prefix='fund_snapshots'))
+        month = month_start(month, 1)
+    op.execute("CREATE TABLE fund_snapshots_default PARTITION OF fund_snapshots_part DEFAULT")
+
+    # 在线分批复制：期间刷新仍写入旧表
+    copied = batched_backfill('fund_snapshots', f"""
+        INSERT INTO fund_snapshots_part ({COPY_COLUMNS})
+        SELECT {COPY_COLUMNS} FROM fund_snapshots WHERE id > :lo AND id <= :hi
+    """)
+
+    # 短暂排他锁：补齐复制期间新写入的行并切换表名
+    op.execute("LOCK TABLE fund_snapshots IN EXCLUSIVE MODE")
+    bind.execute(sa.text(
+        f"INSERT INTO fund_snapshots_part ({COPY_COLUMNS}) "
+        f"SELECT {COPY_COLUMNS} FROM fund_snapshots WHERE id > :copied"
+    ), {'copied': copied})
+    op.execute("ALTER SEQUENCE fund_snapshots_id_seq OWNED BY NONE")
+    op.execute("DROP TABLE fund_snapshots")
+    op.execute("ALTER TABLE fund_snapshots_part RENAME TO fund_snapshots")
+    op.execute("ALTER SEQUENCE fund_snapshots_id_seq OWNED BY fund_snapshots.id")
+    op.execute("ALTER TABLE fund_snapshots RENAME CONSTRAINT fund_snapshots_part_pkey TO fund_snapshots_pkey")
+    op.execute("ALTER INDEX idx_snapshots_code_time_cover_part RENAME TO idx_snapshots_code_time_cover")
+
+
+def upgrade():
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return
+
+    mode = _partitioning_mode(bind)
+    if mode == 'timescale':
+        _upgrade_timescale(bind)
+    elif mode == 'native':
+        _upgrade_native(bind)
+
+
+def downgrade():
+    # 分区表转回普通表需要整表复制，不提供自动降级
+    pass
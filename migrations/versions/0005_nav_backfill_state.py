@@ -0,0 +1,36 @@
+"""nav_backfill_state: 历史净值回填进度
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19 13:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0005'
+down_revision = '0004'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'nav_backfill_state',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('code', sa.String(length=10), nullable=False),
+        sa.Column('status', sa.String(length=10), nullable=False),
+        sa.Column('next_page', sa.Integer(), nullable=False),
+        sa.Column('total_count', sa.Integer()),
+        sa.Column('fetched_count', sa.Integer(), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('error', sa.String(length=255)),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    op.create_index('ix_nav_backfill_state_code', 'nav_backfill_state', ['code'], unique=True)
+
+
+def downgrade():
+    op.drop_table('nav_backfill_state')
@@ -0,0 +1,37 @@
+"""alert_rules: 告警规则
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19 14:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0006'
+down_revision = '0005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'alert_rules',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('name', sa.String(length=100)),
+        sa.Column('metric', sa.String(length=20), nullable=False),
+        sa.Column('op', sa.String(length=4), nullable=False),
+        sa.Column('threshold', sa.Float(), nullable=False),
+        sa.Column('code', sa.String(length=10)),
+        sa.Column('cooldown', sa.Integer(), nullable=False),
+        sa.Column('sinks', sa.String(length=100), nullable=False),
+        sa.Column('webhook_url', sa.String(length=255)),
+        sa.Column('enabled', sa.Boolean(), nullable=False),
+        sa.Column('created_at', sa.DateTime()),
+    )
+
+
+def downgrade():
+    op.drop_table('alert_rules')
@@ -0,0 +1,42 @@
+"""holding_transactions: 持仓变动流水
+
+已有持仓各生成一条 baseline 流水（生效时间为持仓创建时间），使流水之和等于当前持仓金额。
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19 15:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0007'
+down_revision = '0006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'holding_transactions',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('code', sa.String(length=10), nullable=False),
+        sa.Column('delta', sa.Float(), nullable=False),
+        sa.Column('kind', sa.String(length=10), nullable=False),
+        sa.Column('effective_time', sa.DateTime(), nullable=False),
+        sa.Column('note', sa.String(length=255)),
+        sa.Column('created_at', sa.DateTime()),
+    )
+    op.create_index('idx_holding_tx_code_time', 'holding_transactions', ['code', 'effective_time', 'id', 'delta'])
+
+    op.execute("""
+        INSERT INTO holding_transactions (code, delta, kind, effective_time, created_at)
+        SELECT code, amount, 'baseline', COALESCE(created_at, CURRENT_TIMESTAMP), CURRENT_TIMESTAMP
+        FROM holdings WHERE amount <> 0
+    """)
+
+
+def downgrade():
+    op.drop_table('holding_transactions')
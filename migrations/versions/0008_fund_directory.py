@@ -0,0 +1,34 @@
+"""fund_directory: 基金目录
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19 16:00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0008'
+down_revision = '0007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'fund_directory',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('code', sa.String(length=10), nullable=False),
+        sa.Column('name', sa.String(length=100), nullable=False),
+        sa.Column('abbr', sa.String(length=50)),
+        sa.Column('pinyin', sa.String(length=255)),
+        sa.Column('type', sa.String(length=50)),
+        sa.Column('updated_at', sa.DateTime()),
+    )
+    op.create_index('ix_fund_directory_code', 'fund_directory', ['code'], unique=True)
+
+
+def downgrade():
+    op.drop_table('fund_directory')
@@ -30,20 +30,31 @@ class Holding(db.Model):
         }
 
 
+class HoldingsVersion(db.Model):
+    """持仓版本号（只有 id=1 一行）：持仓的每次修改都使其加一，批量修改接口据此做乐观并发控制"""
+    __tablename__ = 'holdings_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
 class FundSnapshot(db.Model):
     """基金快照记录（用于历史趋势）"""
     __tablename__ = 'fund_snapshots'
     
     id = db.Column(db.Integer, primary_key=True)
-    code = db.Column(db.String(10), nullable=False, index=True)
+    code = db.Column(db.String(10), nullable=False)
     name = db.Column(db.String(100))
     rate = db.Column(db.Float)  # 涨跌幅
     profit = db.Column(db.Float)  # 盈亏金额
     amount = db.Column(db.Float)  # 持仓金额
-    snapshot_time = db.Column(db.DateTime, default=datetime.utcnow, index=True)
+    snapshot_time = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # 快照按 (code, snapshot_time) 范围读取；索引附带取值字段，历史查询无需回表。
+    # 单列 code / snapshot_time 索引无查询使用，已移除以减少写入放大（见 benchmark.py audit）
     __table_args__ = (
-        db.Index('idx_code_time', 'code', 'snapshot_time'),
+        db.Index('idx_snapshots_code_time_cover', 'code', 'snapshot_time', 'rate', 'profit', 'amount', 'name'),
     )
     
     def to_dict(self):
@@ -55,3 +66,157 @@ class FundSnapshot(db.Model):
             'amount': self.amount,
             'snapshot_time': self.snapshot_time.isoformat() if self.snapshot_time else None
         }
+
+
+class FundDailyRollup(db.Model):
+    """基金日汇总（每只基金每天最后一次快照），用于趋势统计"""
+    __tablename__ = 'fund_daily_rollups'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(10), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+    name = db.Column(db.String(100))
+    rate = db.Column(db.Float)
+    profit = db.Column(db.Float)
+    amount = db.Column(db.Float)
+    last_time = db.Column(db.DateTime, nullable=False)  # 当天最后一次快照时间
+    
+    # uq_rollup_code_day 用于刷新 upsert 与今日汇总；
+    # idx_rollup_day_cover 按天顺序覆盖趋势聚合，GROUP BY day 无需临时排序
+    __table_args__ = (
+        db.Index('uq_rollup_code_day', 'code', 'day', unique=True),
+        db.Index('idx_rollup_day_cover', 'day', 'code', 'last_time', 'profit', 'amount'),
+    )
+    
+    def to_dict(self):
+        return {
+            'code': self.code,
+            'day': self.day.isoformat() if self.day else None,
+            'name': self.name,
+            'rate': self.rate,
+            'profit': self.profit,
+            'amount': self.amount,
+            'last_time': self.last_time.isoformat() if self.last_time else None
+        }
+
+
+class NavBackfillState(db.Model):
+    """历史净值回填进度（每只基金一行，用于断点续传）"""
+    __tablename__ = 'nav_backfill_state'
+    
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(10), unique=True, nullable=False, index=True)
+    status = db.Column(db.String(10), nullable=False, default=STATUS_RUNNING)
+    next_page = db.Column(db.Integer, nullable=False, default=1)  # 下一次要拉取的页码
+    total_count = db.Column(db.Integer)  # 上游返回的总条数
+    fetched_count = db.Column(db.Integer, nullable=False, default=0)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(255))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'code': self.code,
+            'status': self.status,
+            'next_page': self.next_page,
+            'total_count': self.total_count,
+            'fetched_count': self.fetched_count,
+            'attempts': self.attempts,
+            'error': self.error,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class AlertRule(db.Model):
+    """告警规则（由 alerts.AlertEngine 在每次刷新后评估）"""
+    __tablename__ = 'alert_rules'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100))
+    metric = db.Column(db.String(20), nullable=False)  # 指标，见 alerts.FUND_METRICS / PORTFOLIO_METRICS
+    op = db.Column(db.String(4), nullable=False)  # 比较方式，见 alerts.OPS
+    threshold = db.Column(db.Float, nullable=False)
+    code = db.Column(db.String(10))  # 基金级指标：为空表示所有持仓
+    cooldown = db.Column(db.Integer, nullable=False, default=300)  # 同一规则同一基金两次告警的最小间隔（秒）
+    sinks = db.Column(db.String(100), nullable=False, default='log')  # 逗号分隔：log / webhook / sse
+    webhook_url = db.Column(db.String(255))
+    enabled = db.Column(db.Boolean, nullable=False, default=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name,
+            'metric': self.metric,
+            'op': self.op,
+            'threshold': self.threshold,
+            'code': self.code,
+            'cooldown': self.cooldown,
+            'sinks': [s for s in (self.sinks or '').split(',') if s],
+            'webhook_url': self.webhook_url,
+            'enabled': self.enabled,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class AlertRulesVersion(db.Model):
+    """告警规则版本号（只有 id=1 一行）：规则的每次增删改都使其加一，各进程的告警引擎据此重新加载规则"""
+    __tablename__ = 'alert_rules_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class HoldingTransaction(db.Model):
+    """持仓变动流水（只追加）：任意时刻的持仓金额 = 该时刻之前所有 delta 之和"""
+    __tablename__ = 'holding_transactions'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(10), nullable=False)
+    delta = db.Column(db.Float, nullable=False)  # 持仓金额变动（可正可负）
+    kind = db.Column(db.String(10), nullable=False)  # open / set / adjust / import / close / manual / baseline
+    effective_time = db.Column(db.DateTime, nullable=False)  # 生效时间（UTC，可早于录入时间）
+    note = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    # 按 (code, 生效时间) 顺序读取单只基金的流水，索引附带 delta，无需回表
+    __table_args__ = (
+        db.Index('idx_holding_tx_code_time', 'code', 'effective_time', 'id', 'delta'),
+    )
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'code': self.code,
+            'delta': self.delta,
+            'kind': self.kind,
+            'effective_time': self.effective_time.isoformat() if self.effective_time else None,
+            'note': self.note,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+
+class FundInfo(db.Model):
+    """基金目录（代码/名称/拼音/类型），由 directory.FundDirectory 定期整体刷新"""
+    __tablename__ = 'fund_directory'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    code = db.Column(db.String(10), unique=True, nullable=False, index=True)
+    name = db.Column(db.String(100), nullable=False)
+    abbr = db.Column(db.String(50))  # 拼音首字母缩写
+    pinyin = db.Column(db.String(255))  # 全拼
+    type = db.Column(db.String(50))
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'code': self.code,
+            'name': self.name,
+            'abbr': self.abbr,
+            'type': self.type
+        }
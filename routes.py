@@ -3,8 +3,15 @@
 API路由模块
 """
 
-from flask import Blueprint, jsonify, request
-from services import HoldingService, FundSnapshotService
+import queue
+from datetime import datetime, timezone
+
+from flask import Blueprint, Response, current_app, jsonify, request
+import downsample
+from alerts import alert_engine
+from backfill import nav_backfill
+from directory import fund_directory
+from services import AlertService, HoldingService, HoldingsVersionConflict, FundSnapshotService, LedgerService
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -12,8 +19,36 @@ api_bp = Blueprint('api', __name__, url_prefix='/api')
 @api_bp.route('/holdings', methods=['GET'])
 def get_holdings():
     """获取所有持仓"""
-    holdings = HoldingService.get_all_holdings()
-    return jsonify({'success': True, 'data': holdings})
+    version, holdings = HoldingService.get_holdings_with_version()
+    return jsonify({'success': True, 'data': holdings, 'version': version})
+
+
+@api_bp.route('/holdings/batch', methods=['POST'])
+def batch_holdings():
+    """批量修改持仓：operations 按顺序在一个事务中执行，返回最终持仓与新版本号。
+
+    传入 version 时做乐观并发控制：持仓已被其他请求修改则整批不执行，返回 409 与当前持仓。
+    """
+    data = request.get_json() or {}
+    version = data.get('version')
+    if version is not None and (isinstance(version, bool) or not isinstance(version, int)):
+        return jsonify({'success': False, 'message': 'version 必须为整数'}), 400
+
+    max_ops = current_app.config.get('HOLDINGS_BATCH_MAX_OPS', 500)
+    try:
+        operations = HoldingService.validate_batch(data.get('operations'))
+        if len(operations) > max_ops:
+            raise ValueError(f'单次最多 {max_ops} 个操作')
+        result = HoldingService.apply_batch(operations, version)
+    except HoldingsVersionConflict as e:
+        version, holdings = HoldingService.get_holdings_with_version()
+        return jsonify({'success': False, 'message': str(e), 'data': {
+            'version': version,
+            'holdings': holdings
+        }}), 409
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, 'data': result})
 
 
 @api_bp.route('/holdings/reorder', methods=['POST'])
@@ -110,10 +145,74 @@ def adjust_holding(code):
     return jsonify({'success': True, 'data': holding.to_dict()})
 
 
+@api_bp.route('/funds/search', methods=['GET'])
+def search_funds():
+    """按代码/拼音缩写/全拼/名称前缀搜索基金目录"""
+    q = request.args.get('q', '')
+    max_limit = current_app.config.get('FUND_SEARCH_MAX_LIMIT', 100)
+    limit = request.args.get('limit', 20, type=int)
+    if not 1 <= limit <= max_limit:
+        return jsonify({'success': False, 'message': f'limit 取值范围为 1~{max_limit}'}), 400
+    return jsonify({'success': True, 'data': fund_directory.search(q, limit)})
+
+
+def _parse_time(value):
+    """解析 ISO 时间（可只有日期），带时区的转换为 UTC；为空返回 None，非法时抛出 ValueError"""
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(str(value))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+@api_bp.route('/holdings/<code>/transactions', methods=['GET'])
+def get_holding_transactions(code):
+    """获取持仓变动流水"""
+    return jsonify({'success': True, 'data': LedgerService.get_transactions(code)})
+
+
+@api_bp.route('/holdings/<code>/transactions', methods=['POST'])
+def add_holding_transaction(code):
+    """录入持仓变动（effective_time 可早于当前时间，之后的日汇总会被增量修正）"""
+    data = request.get_json() or {}
+    try:
+        delta = float(data.get('delta'))
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'delta 必须为数字'}), 400
+    try:
+        effective_time = _parse_time(data.get('effective_time'))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'effective_time 格式不正确'}), 400
+    if effective_time and effective_time > datetime.utcnow():
+        return jsonify({'success': False, 'message': 'effective_time 不能晚于当前时间'}), 400
+
+    try:
+        note = str(data['note'])[:255] if data.get('note') else None
+        holding = LedgerService.add_transaction(code, delta, effective_time, note)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if not holding:
+        return jsonify({'success': False, 'message': '持仓不存在'}), 404
+    return jsonify({'success': True, 'data': holding.to_dict()})
+
+
+@api_bp.route('/holdings/<code>/position', methods=['GET'])
+def get_holding_position(code):
+    """查询任意时刻的持仓金额（at 为空时为当前）"""
+    try:
+        at = _parse_time(request.args.get('at')) or datetime.utcnow()
+    except ValueError:
+        return jsonify({'success': False, 'message': 'at 格式不正确'}), 400
+    return jsonify({'success': True, 'data': {
+        'code': code, 'at': at.isoformat(), 'amount': LedgerService.position_as_of(code, at)
+    }})
+
+
 @api_bp.route('/refresh', methods=['POST'])
 def refresh_funds():
-    """刷新基金数据"""
-    results = FundSnapshotService.refresh_all_funds()
+    """刷新基金数据（显式刷新，不使用估值缓存）"""
+    results = FundSnapshotService.refresh_all_funds(force=True)
     summary = FundSnapshotService.get_today_summary()
     return jsonify({
         'success': True,
@@ -124,6 +223,15 @@ def refresh_funds():
     })
 
 
+@api_bp.route('/funds/live', methods=['GET'])
+def get_live_funds():
+    """最近一批行情（终端客户端轮询用）：超过 max_age 秒（默认 REFRESH_INTERVAL）才重新抓取"""
+    max_age = request.args.get('max_age', current_app.config.get('REFRESH_INTERVAL', 60), type=float)
+    if max_age < 0:
+        return jsonify({'success': False, 'message': 'max_age 不能为负数'}), 400
+    return jsonify({'success': True, 'data': FundSnapshotService.get_live(max_age)})
+
+
 @api_bp.route('/summary', methods=['GET'])
 def get_summary():
     """获取汇总数据"""
@@ -131,17 +239,164 @@ def get_summary():
     return jsonify({'success': True, 'data': summary})
 
 
+def _parse_downsample_args():
+    """解析降采样参数 points / resolution / mode；返回 (points, resolution, mode, 错误信息)"""
+    points = request.args.get('points', type=int)
+    mode = request.args.get('mode', downsample.MODE_BUCKET)
+    try:
+        resolution = downsample.parse_resolution(request.args.get('resolution'))
+    except ValueError as e:
+        return None, None, None, str(e)
+
+    max_points = current_app.config.get('HISTORY_MAX_POINTS', 5000)
+    if points is not None and not 3 <= points <= max_points:
+        return None, None, None, f'points 取值范围为 3~{max_points}'
+    if mode not in downsample.MODES:
+        return None, None, None, f"mode 只支持 {'/'.join(downsample.MODES)}"
+    return points, resolution, mode, None
+
+
+@api_bp.route('/history/batch', methods=['GET'])
+def get_history_batch():
+    """批量获取多只基金历史数据（一次查询，按 code 分组的紧凑列式格式）
+
+    codes 为逗号分隔的基金代码；t 为差分编码的相对秒数（见 FundSnapshotService.get_history_batch）。
+    可选 points / resolution / mode 降采样，参数同 /history/<code>；都不传时按 HISTORY_BATCH_DEFAULT_POINTS 个点降采样，
+    每只基金返回的点数始终有上限（不提供原始快照，原始快照用 /history/<code> 分页获取）。
+    """
+    codes = [c.strip() for c in request.args.get('codes', '').split(',') if c.strip()]
+    codes = list(dict.fromkeys(codes))
+    max_codes = current_app.config.get('HISTORY_BATCH_MAX_CODES', 500)
+    if not codes:
+        return jsonify({'success': False, 'message': 'codes 不能为空'}), 400
+    if len(codes) > max_codes:
+        return jsonify({'success': False, 'message': f'codes 最多 {max_codes} 个'}), 400
+    if not all(c.isdigit() for c in codes):
+        return jsonify({'success': False, 'message': '基金代码格式不正确'}), 400
+
+    days = request.args.get('days', 7, type=int)
+    points, resolution, mode, error = _parse_downsample_args()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+    max_points = current_app.config.get('HISTORY_MAX_POINTS', 5000)
+    if resolution:
+        resolution = max(resolution, downsample.bucket_seconds_for(days, max_points))
+    elif not points:
+        points = min(current_app.config.get('HISTORY_BATCH_DEFAULT_POINTS', 500), max_points)
+
+    data = FundSnapshotService.get_history_batch(codes, days, points, resolution, mode)
+    return jsonify({'success': True, 'data': data})
+
+
 @api_bp.route('/history/<code>', methods=['GET'])
 def get_history(code):
-    """获取基金历史数据"""
+    """获取基金历史数据
+
+    - 传 points 或 resolution 时返回服务端降采样结果（点数有上限）
+    - 否则按时间顺序分页返回原始快照：limit 为每页条数，next_cursor 传回 after 获取下一页
+    """
     days = request.args.get('days', 7, type=int)
-    history = FundSnapshotService.get_history(code, days)
-    return jsonify({'success': True, 'data': history})
+    points, resolution, mode, error = _parse_downsample_args()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+
+    max_points = current_app.config.get('HISTORY_MAX_POINTS', 5000)
+    if points or resolution:
+        if resolution:
+            # 过细的 resolution 也不能让返回点数超过上限
+            resolution = max(resolution, downsample.bucket_seconds_for(days, max_points))
+        result = FundSnapshotService.get_history_downsampled(code, days, points, resolution, mode)
+        return jsonify({'success': True, 'data': result['items'], 'resolution': result['resolution']})
+
+    limit = request.args.get('limit', max_points, type=int)
+    if not 1 <= limit <= max_points:
+        return jsonify({'success': False, 'message': f'limit 取值范围为 1~{max_points}'}), 400
+
+    try:
+        page = FundSnapshotService.get_history_page(code, days, limit, request.args.get('after'))
+    except ValueError:
+        return jsonify({'success': False, 'message': 'after 游标格式不正确'}), 400
+    return jsonify({'success': True, 'data': page['items'], 'next_cursor': page['next_cursor']})
 
 
 @api_bp.route('/trend', methods=['GET'])
 def get_trend():
-    """获取盈亏趋势"""
+    """获取盈亏趋势（可传 points 降采样）"""
     days = request.args.get('days', 7, type=int)
-    trend = FundSnapshotService.get_profit_trend(days)
+    points, _, mode, error = _parse_downsample_args()
+    if error:
+        return jsonify({'success': False, 'message': error}), 400
+
+    trend = FundSnapshotService.get_profit_trend(days, points, mode)
     return jsonify({'success': True, 'data': trend})
+
+
+@api_bp.route('/backfill', methods=['GET'])
+def get_backfill_states():
+    """获取历史净值回填进度"""
+    return jsonify({'success': True, 'data': nav_backfill.get_states()})
+
+
+@api_bp.route('/alerts/rules', methods=['GET'])
+def get_alert_rules():
+    """获取告警规则"""
+    return jsonify({'success': True, 'data': AlertService.get_rules()})
+
+
+@api_bp.route('/alerts/rules', methods=['POST'])
+def add_alert_rule():
+    """新增告警规则（metric / op / threshold 必填，code 为空表示所有持仓）"""
+    data = request.get_json() or {}
+    try:
+        rule = AlertService.add_rule(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, 'data': rule})
+
+
+@api_bp.route('/alerts/rules/<int:rule_id>', methods=['PUT'])
+def update_alert_rule(rule_id):
+    """修改告警规则"""
+    data = request.get_json() or {}
+    try:
+        rule = AlertService.update_rule(rule_id, data)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if rule is None:
+        return jsonify({'success': False, 'message': '规则不存在'}), 404
+    return jsonify({'success': True, 'data': rule})
+
+
+@api_bp.route('/alerts/rules/<int:rule_id>', methods=['DELETE'])
+def delete_alert_rule(rule_id):
+    """删除告警规则"""
+    if AlertService.delete_rule(rule_id):
+        return jsonify({'success': True, 'message': '删除成功'})
+    return jsonify({'success': False, 'message': '规则不存在'}), 404
+
+
+@api_bp.route('/alerts', methods=['GET'])
+def get_alerts():
+    """获取最近触发的告警"""
+    limit = request.args.get('limit', 50, type=int)
+    return jsonify({'success': True, 'data': alert_engine.get_recent(limit)})
+
+
+@api_bp.route('/alerts/stream', methods=['GET'])
+def stream_alerts():
+    """以 Server-Sent Events 推送告警（规则的 sinks 需包含 sse）"""
+    subscriber = alert_engine.sse.subscribe()
+
+    def generate():
+        try:
+            while True:
+                try:
+                    yield f"data: {subscriber.get(timeout=15)}\n\n"
+                except queue.Empty:
+                    # 心跳，避免代理断开空闲连接
+                    yield ': keepalive\n\n'
+        finally:
+            alert_engine.sse.unsubscribe(subscriber)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
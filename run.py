@@ -11,32 +11,26 @@ import sys
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app import create_app
-from database import db
-from models import Holding
-from services import HoldingService
 
 
 def main():
     """主函数"""
-    # 创建应用
+    # 创建应用（数据目录与数据库表由 create_app 负责初始化）
     app = create_app('development')
     
-    with app.app_context():
-        # 创建数据目录
-        data_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
-        os.makedirs(data_dir, exist_ok=True)
-        
-        # 创建数据库表
-        db.create_all()
-        
-        # 初始化默认持仓数据（可选）
-        # 为避免“清空持仓后重启又自动出现默认持仓”，默认不初始化。
-        # 需要初始化时设置环境变量：INIT_DEFAULT_HOLDINGS=1
-        init_defaults = os.environ.get('INIT_DEFAULT_HOLDINGS', '').lower() in ('1', 'true', 'yes', 'y')
-        if init_defaults and Holding.query.count() == 0:
-            print("正在初始化默认持仓数据...")
-            HoldingService.init_default_holdings()
-            print("默认持仓数据初始化完成")
+    # 初始化默认持仓数据（可选）
+    # 为避免“清空持仓后重启又自动出现默认持仓”，默认不初始化。
+    # 需要初始化时设置环境变量：INIT_DEFAULT_HOLDINGS=1
+    init_defaults = os.environ.get('INIT_DEFAULT_HOLDINGS', '').lower() in ('1', 'true', 'yes', 'y')
+    if init_defaults:
+        from models import Holding
+        from services import HoldingService
+
+        with app.app_context():
+            if Holding.query.count() == 0:
+                print("正在初始化默认持仓数据...")
+                HoldingService.init_default_holdings()
+                print("默认持仓数据初始化完成")
     
     print("\n" + "=" * 50)
     print("  基金实盘波动监控系统启动中...")
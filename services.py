@@ -5,23 +5,96 @@
 
 import urllib.request
 import json
+import math
 import time
 import concurrent.futures
-from datetime import datetime, timedelta
-from typing import Dict, Optional, List, Any
+import threading
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, List, Any, Tuple
+from sqlalchemy import and_, func, insert, or_, update
+import alerts
+import dialects
+import downsample
 from database import db
-from models import Holding, FundSnapshot
+from alerts import alert_engine
+from backfill import RateLimiter, nav_backfill
+from directory import fund_directory
+from db_writer import after_commit, write_operation
+from models import (AlertRule, AlertRulesVersion, Holding, HoldingsVersion, HoldingTransaction, FundSnapshot,
+                    FundDailyRollup, NavBackfillState)
 
 
 class FundAPIService:
-    """基金数据获取服务"""
+    """基金数据获取服务
+
+    所有估值请求（Web 刷新、终端客户端）都经过 get_quotes：有效期内的估值直接复用，
+    同一基金正在请求时等待同一个请求，并共用一个线程池与上游限速。
+    """
     
     HEADERS = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
         "Referer": "http://fund.eastmoney.com/"
     }
     TIMEOUT = 5
-    
+    MAX_WORKERS = 10
+    CACHE_TTL = 30  # 估值缓存有效期（秒）
+    RATE = 20  # 每秒最多请求上游次数（0 表示不限）
+
+    _cache: Dict[str, Tuple[float, Dict]] = {}  # code -> (获取时间, 估值)
+    _inflight: Dict[str, concurrent.futures.Future] = {}
+    _lock = threading.Lock()
+    _executor = None
+    _limiter = RateLimiter(RATE, burst=MAX_WORKERS)
+
+    @staticmethod
+    def init_app(app) -> None:
+        """从应用配置读取超时、并发数、缓存有效期与限速"""
+        FundAPIService.TIMEOUT = app.config.get('REQUEST_TIMEOUT', FundAPIService.TIMEOUT)
+        FundAPIService.MAX_WORKERS = app.config.get('MAX_WORKERS', FundAPIService.MAX_WORKERS)
+        FundAPIService.CACHE_TTL = app.config.get('QUOTE_CACHE_TTL', FundAPIService.CACHE_TTL)
+        FundAPIService.RATE = app.config.get('QUOTE_RATE', FundAPIService.RATE)
+        FundAPIService._limiter = RateLimiter(FundAPIService.RATE, burst=FundAPIService.MAX_WORKERS)
+
+    @staticmethod
+    def get_quotes(codes: List[str], max_age: float = None) -> Dict[str, Optional[Dict]]:
+        """批量获取估值 {code: 估值或 None}；获取时间在 max_age 秒（默认 CACHE_TTL）以内的直接返回缓存"""
+        max_age = FundAPIService.CACHE_TTL if max_age is None else max_age
+        now = time.monotonic()
+        quotes = {}
+        waiting = {}
+        with FundAPIService._lock:
+            if FundAPIService._executor is None:
+                FundAPIService._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=FundAPIService.MAX_WORKERS, thread_name_prefix='fund-quote')
+            for code in codes:
+                cached = FundAPIService._cache.get(code)
+                if cached is not None and now - cached[0] <= max_age:
+                    quotes[code] = cached[1]
+                    continue
+                future = FundAPIService._inflight.get(code)
+                if future is None:
+                    future = FundAPIService._executor.submit(FundAPIService._fetch_and_cache, code)
+                    FundAPIService._inflight[code] = future
+                waiting[code] = future
+        for code, future in waiting.items():
+            quotes[code] = future.result()
+        return quotes
+
+    @staticmethod
+    def _fetch_and_cache(code: str) -> Optional[Dict]:
+        data = None
+        try:
+            FundAPIService._limiter.acquire()
+            data = FundAPIService.fetch_fund_data(code)
+            return data
+        finally:
+            with FundAPIService._lock:
+                # 获取失败不缓存，下次请求时重试
+                if data is not None:
+                    FundAPIService._cache[code] = (time.monotonic(), data)
+                FundAPIService._inflight.pop(code, None)
+
     @staticmethod
     def fetch_fund_data(code: str) -> Optional[Dict]:
         """从天天基金网获取基金数据"""
@@ -46,14 +119,221 @@ class FundAPIService:
                 TimeoutError, ValueError, TypeError):
             return None
     
+class LedgerService:
+    """持仓变动流水服务
+
+    流水只追加不修改，Holding.amount 是流水之和的物化结果。按基金缓存 (生效时间, 累计金额) 序列，
+    查询任意时刻的持仓只需一次二分查找。缓存记录构建时的持仓版本号（每次写流水都会使其加一），
+    版本号变化后重建，因此其他进程（如 gunicorn 的其他 worker）写入的流水也会生效。
+    """
+    
+    _cache: Dict[str, Tuple[int, Tuple[List[datetime], List[float]]]] = {}
+    _cache_lock = threading.Lock()
+    
+    @staticmethod
+    def record(code: str, delta: float, kind: str, effective_time: datetime = None, note: str = None) -> None:
+        """追加一条流水；不提交事务，需在写操作内调用"""
+        LedgerService.record_many([{'code': code, 'delta': delta, 'kind': kind,
+                                    'effective_time': effective_time, 'note': note}])
+    
+    @staticmethod
+    def record_many(entries: List[Dict[str, Any]]) -> None:
+        """批量追加流水（delta 为 0 的忽略）；生效时间早于当前的流水同时增量修正之后的日汇总"""
+        now = datetime.utcnow()
+        rows = [{
+            'code': e['code'],
+            'delta': float(e['delta']),
+            'kind': e['kind'],
+            'effective_time': e.get('effective_time') or now,
+            'note': e.get('note'),
+            'created_at': now
+        } for e in entries if e.get('delta')]
+        if not rows:
+            return
+        
+        db.session.execute(insert(HoldingTransaction), rows)
+        for row in rows:
+            if row['effective_time'] < now:
+                LedgerService._apply_to_rollups(row['code'], row['delta'], row['effective_time'])
+        
+        codes = {row['code'] for row in rows}
+        after_commit(lambda: LedgerService.invalidate(codes))
+    
+    @staticmethod
+    def _apply_to_rollups(code: str, delta: float, since: datetime) -> None:
+        """补录的流水只影响生效之后的日汇总：持仓金额加 delta，盈亏按当日涨跌幅重算"""
+        db.session.execute(
+            update(FundDailyRollup)
+            .where(FundDailyRollup.code == code,
+                   FundDailyRollup.day >= since.date(),
+                   FundDailyRollup.last_time >= since)
+            .values(amount=FundDailyRollup.amount + delta,
+                    profit=(FundDailyRollup.amount + delta) * func.coalesce(FundDailyRollup.rate, 0) / 100)
+        )
+    
+    @staticmethod
+    def invalidate(codes=None) -> None:
+        """失效持仓序列缓存（codes 为空时全部失效）"""
+        with LedgerService._cache_lock:
+            if codes is None:
+                LedgerService._cache.clear()
+            else:
+                for code in codes:
+                    LedgerService._cache.pop(code, None)
+    
+    @staticmethod
+    def _series(code: str) -> Tuple[List[datetime], List[float]]:
+        """单只基金的 (生效时间升序, 累计持仓金额)"""
+        # 版本号先于流水读取：两次读取之间有写入时缓存的是旧版本号，下次读取会重建
+        version = HoldingService.get_version()
+        cached = LedgerService._cache.get(code)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        series = LedgerService._load_series(code)
+        with LedgerService._cache_lock:
+            LedgerService._cache[code] = (version, series)
+        return series
+
+    @staticmethod
+    def _load_series(code: str) -> Tuple[List[datetime], List[float]]:
+        rows = db.session.query(HoldingTransaction.effective_time, HoldingTransaction.delta).filter(
+            HoldingTransaction.code == code
+        ).order_by(HoldingTransaction.effective_time.asc(), HoldingTransaction.id.asc()).all()
+        times, amounts = [], []
+        total = 0.0
+        for effective_time, delta in rows:
+            total += delta
+            times.append(effective_time)
+            amounts.append(total)
+        return times, amounts
+    
+    @staticmethod
+    def position_as_of(code: str, when: datetime) -> float:
+        """when 时刻（UTC）的持仓金额"""
+        times, amounts = LedgerService._series(code)
+        idx = bisect_right(times, when)
+        return amounts[idx - 1] if idx else 0.0
+    
+    @staticmethod
+    def positions_as_of(code: str, times: List[datetime]) -> List[float]:
+        """多个时刻（UTC）的持仓金额，只读取一次流水；不使用缓存，可在写操作内读取当前事务中的流水"""
+        series_times, amounts = LedgerService._load_series(code)
+        result = []
+        for when in times:
+            idx = bisect_right(series_times, when)
+            result.append(amounts[idx - 1] if idx else 0.0)
+        return result
+    
+    @staticmethod
+    def get_transactions(code: str) -> List[Dict]:
+        """单只基金的流水（按生效时间排序，附带变动后的持仓金额）"""
+        txs = HoldingTransaction.query.filter_by(code=code).order_by(
+            HoldingTransaction.effective_time.asc(), HoldingTransaction.id.asc()
+        ).all()
+        result = []
+        total = 0.0
+        for tx in txs:
+            total += tx.delta
+            item = tx.to_dict()
+            item['amount_after'] = total
+            result.append(item)
+        return result
+    
+    @staticmethod
+    @write_operation
+    def add_transaction(code: str, delta: float, effective_time: datetime = None,
+                        note: str = None) -> Optional[Holding]:
+        """录入（可补录）一笔持仓变动；持仓不存在时返回 None。
+
+        变动后持仓为负时抛出 ValueError；补录的减仓还要求生效时刻及之后每个时点的持仓都不为负。
+        """
+        # 流水只追加不修改，写入 NaN / Infinity 后无法更正
+        if not math.isfinite(delta) or delta == 0:
+            raise ValueError('delta 必须为非零的有限数字')
+        holding = Holding.query.filter_by(code=code).first()
+        if holding is None:
+            return None
+        new_amount = float(holding.amount or 0) + delta
+        if new_amount < 0:
+            raise ValueError('变动后持仓金额不能为负数')
+        if delta < 0 and effective_time is not None and effective_time < datetime.utcnow():
+            # 在写事务内直接读取流水，不使用缓存
+            times, amounts = LedgerService._load_series(code)
+            idx = bisect_right(times, effective_time)
+            lowest = min([amounts[idx - 1] if idx else 0.0] + amounts[idx:])
+            if lowest + delta < 0:
+                raise ValueError('补录后该时刻或之后的持仓金额会出现负数')
+        holding.amount = new_amount
+        LedgerService.record(code, delta, 'manual', effective_time, note)
+        HoldingService.bump_version()
+        if delta > 0 and effective_time is not None and effective_time < datetime.utcnow():
+            # 补录更早的建仓/加仓后重新回填：之前没有持仓的日期按新的流水补齐（已有的日汇总已在 record 中修正）
+            NavBackfillState.query.filter_by(code=code).delete()
+            nav_backfill.enqueue([code])
+        return holding
+
+
+class HoldingsVersionConflict(Exception):
+    """批量修改时客户端提供的持仓版本号已过期"""
+
+    def __init__(self, current: int):
+        super().__init__(f'持仓已被修改（当前版本 {current}），请刷新后重试')
+        self.current = current
+
+
 class HoldingService:
-    """持仓管理服务"""
+    """持仓管理服务（持仓金额的每次变动同时写入流水，持仓的每次修改都使版本号加一）"""
+
+    BATCH_OPS = ('upsert', 'adjust', 'delete', 'reorder')
     
+    @staticmethod
+    def get_version() -> int:
+        """当前持仓版本号"""
+        return db.session.query(HoldingsVersion.version).filter(HoldingsVersion.id == 1).scalar() or 0
+
+    @staticmethod
+    def get_holdings_with_version() -> Tuple[int, List[Dict]]:
+        """(版本号, 全部持仓)，供客户端做乐观并发控制。
+
+        版本号先于持仓读取：两次读取之间若有写入，客户端拿到的是旧版本号与新持仓，
+        之后带这个版本号的批量修改只会收到 409，不会覆盖这次写入。
+        """
+        version = HoldingService.get_version()
+        return version, HoldingService.get_all_holdings()
+
+    @staticmethod
+    def bump_version(expected: int = None) -> int:
+        """版本号加一并返回新版本号；需在写操作内调用。
+
+        expected 不为 None 时只在当前版本等于 expected 时更新（比较与更新在同一条 UPDATE 中完成），
+        否则抛出 HoldingsVersionConflict。
+        """
+        stmt = update(HoldingsVersion).where(HoldingsVersion.id == 1).values(version=HoldingsVersion.version + 1)
+        if expected is not None:
+            stmt = stmt.where(HoldingsVersion.version == expected)
+        if db.session.execute(stmt).rowcount:
+            return HoldingService.get_version()
+
+        current = db.session.get(HoldingsVersion, 1)
+        if current is None and not expected:
+            db.session.add(HoldingsVersion(id=1, version=1))
+            return 1
+        raise HoldingsVersionConflict(current.version if current else 0)
+
     @staticmethod
     def get_all_holdings() -> List[Dict]:
         """获取所有持仓"""
-        holdings = Holding.query.order_by(Holding.sort_order.asc(), Holding.id.asc()).all()
-        return [h.to_dict() for h in holdings]
+        # populate_existing：同一事务中批量 UPDATE 过的持仓以数据库中的值为准（见 apply_batch）
+        holdings = Holding.query.execution_options(populate_existing=True).order_by(
+            Holding.sort_order.asc(), Holding.id.asc()
+        ).all()
+        result = [h.to_dict() for h in holdings]
+        # 未记录名称的持仓从基金目录补全
+        for item in result:
+            if not item['name']:
+                item['name'] = fund_directory.name_of(item['code'])
+        return result
     
     @staticmethod
     def get_holdings_dict() -> Dict[str, float]:
@@ -62,25 +342,34 @@ class HoldingService:
         return {h.code: h.amount for h in holdings}
     
     @staticmethod
+    @write_operation
     def add_holding(code: str, amount: float, name: str = None) -> Holding:
-        """添加或更新持仓"""
+        """添加或更新持仓（新增或原名称为空且未提供名称时从基金目录补全）"""
         holding = Holding.query.filter_by(code=code).first()
         if holding:
             # 更新持仓金额
+            LedgerService.record(code, amount - float(holding.amount or 0), 'set')
             holding.amount = amount
-            # 如果提供了名称则更新
+            # 如果提供了名称则更新；不覆盖已有名称
             if name:
                 holding.name = name
+            elif not holding.name:
+                holding.name = fund_directory.name_of(code)
         else:
+            name = name or fund_directory.name_of(code)
             # 新增持仓
             # 新增时默认排在最后
             max_sort = db.session.query(db.func.max(Holding.sort_order)).scalar() or 0
             holding = Holding(code=code, amount=amount, name=name, sort_order=max_sort + 1)
             db.session.add(holding)
-        db.session.commit()
+            LedgerService.record(code, amount, 'open')
+            # 新持仓在后台回填历史净值
+            nav_backfill.enqueue([code])
+        HoldingService.bump_version()
         return holding
 
     @staticmethod
+    @write_operation
     def update_sort_order(order_list: List[str]) -> None:
         """批量更新排序：order_list 为 code 按从上到下的顺序排列"""
         if not order_list:
@@ -91,29 +380,38 @@ class HoldingService:
         for h in holdings:
             if h.code in code_to_order:
                 h.sort_order = code_to_order[h.code]
-        db.session.commit()
+        HoldingService.bump_version()
 
     @staticmethod
+    @write_operation
     def clear_all_holdings(clear_snapshots: bool = False) -> None:
         """清空持仓；可选同时清空快照数据"""
         from models import FundSnapshot
 
+        LedgerService.record_many([
+            {'code': h.code, 'delta': -float(h.amount or 0), 'kind': 'close'} for h in Holding.query.all()
+        ])
         Holding.query.delete()
         if clear_snapshots:
             FundSnapshot.query.delete()
-        db.session.commit()
+            FundDailyRollup.query.delete()
+            after_commit(FundSnapshotService._last_saved.clear)
+        HoldingService.bump_version()
 
     @staticmethod
+    @write_operation
     def import_holdings(items: List[Dict[str, Any]], replace: bool = True) -> None:
         """批量导入持仓。
 
         items: [{code, amount, name?}]，顺序即 sort_order。
         replace: True 时先清空再导入；False 时做 upsert（按 code 更新/新增）。
         """
+        before = {h.code: float(h.amount or 0) for h in Holding.query.all()}
         if replace:
             Holding.query.delete()
             db.session.flush()
 
+        imported = []
         for idx, it in enumerate(items):
             code = str(it.get('code', '')).strip()
             if not code or not code.isdigit():
@@ -129,6 +427,8 @@ class HoldingService:
 
             name = it.get('name', None)
             holding = Holding.query.filter_by(code=code).first()
+            if not (isinstance(name, str) and name.strip()) and not (holding and holding.name):
+                name = fund_directory.name_of(code)
             if holding:
                 holding.amount = amount
                 if isinstance(name, str) and name.strip():
@@ -137,20 +437,31 @@ class HoldingService:
             else:
                 holding = Holding(code=code, amount=amount, name=(name.strip() if isinstance(name, str) else None), sort_order=idx)
                 db.session.add(holding)
+            imported.append(code)
 
-        db.session.commit()
+        after = {h.code: float(h.amount or 0) for h in Holding.query.all()}
+        LedgerService.record_many([
+            {'code': code, 'delta': after.get(code, 0.0) - before.get(code, 0.0), 'kind': 'import'}
+            for code in sorted(before.keys() | after.keys())
+        ])
+        # 已完成回填的基金会被跳过，只有新基金会真正拉取
+        nav_backfill.enqueue(imported)
+        HoldingService.bump_version()
     
     @staticmethod
+    @write_operation
     def delete_holding(code: str) -> bool:
         """删除持仓"""
         holding = Holding.query.filter_by(code=code).first()
         if holding:
+            LedgerService.record(code, -float(holding.amount or 0), 'close')
             db.session.delete(holding)
-            db.session.commit()
+            HoldingService.bump_version()
             return True
         return False
 
     @staticmethod
+    @write_operation
     def adjust_holding(code: str, delta_amount: float, name: str = None) -> Optional[Holding]:
         """加减仓：在原有 amount 基础上增减（delta_amount 可正可负）"""
         holding = Holding.query.filter_by(code=code).first()
@@ -162,13 +473,142 @@ class HoldingService:
         except (TypeError, ValueError):
             return None
 
-        holding.amount = max(0.0, new_amount)
+        new_amount = max(0.0, new_amount)
+        LedgerService.record(code, new_amount - float(holding.amount or 0), 'adjust')
+        holding.amount = new_amount
         if name:
             holding.name = name
-        db.session.commit()
+        HoldingService.bump_version()
         return holding
     
     @staticmethod
+    def validate_batch(operations: Any) -> List[Dict[str, Any]]:
+        """校验并规范化批量操作；不合法时抛出 ValueError（指明第几个操作）
+
+        - {"op": "upsert", "code", "amount", "name"?}：新增或覆盖持仓金额
+        - {"op": "adjust", "code", "delta"}：加减仓（结果小于 0 时按 0 处理）
+        - {"op": "delete", "code"}
+        - {"op": "reorder", "codes": [...]}：按数组顺序设置展示顺序
+        """
+        if not isinstance(operations, list) or not operations:
+            raise ValueError('operations 必须为非空数组')
+
+        result = []
+        for i, item in enumerate(operations, 1):
+            if not isinstance(item, dict) or item.get('op') not in HoldingService.BATCH_OPS:
+                raise ValueError(f"第 {i} 个操作：op 只支持 {'/'.join(HoldingService.BATCH_OPS)}")
+            op = item['op']
+            if op == 'reorder':
+                codes = item.get('codes')
+                if not isinstance(codes, list) or not all(isinstance(c, str) and c for c in codes):
+                    raise ValueError(f'第 {i} 个操作：codes 必须为非空字符串数组')
+                result.append({'op': op, 'codes': codes})
+                continue
+
+            code = item.get('code')
+            code = code.strip() if isinstance(code, str) else ''
+            if not code.isdigit() or len(code) not in (6, 7, 8, 9, 10):
+                raise ValueError(f'第 {i} 个操作：基金代码格式不正确')
+            entry = {'op': op, 'code': code}
+            if op == 'upsert':
+                try:
+                    entry['amount'] = float(item.get('amount', 0))
+                except (TypeError, ValueError):
+                    raise ValueError(f'第 {i} 个操作：amount 必须为数字')
+                if not math.isfinite(entry['amount']):
+                    raise ValueError(f'第 {i} 个操作：amount 必须为有限数字')
+                if entry['amount'] < 0:
+                    raise ValueError(f'第 {i} 个操作：amount 不能为负数')
+                name = item.get('name')
+                entry['name'] = name.strip() if isinstance(name, str) and name.strip() else None
+            elif op == 'adjust':
+                try:
+                    entry['delta'] = float(item.get('delta'))
+                except (TypeError, ValueError):
+                    raise ValueError(f'第 {i} 个操作：delta 必须为数字')
+                if not math.isfinite(entry['delta']):
+                    raise ValueError(f'第 {i} 个操作：delta 必须为有限数字')
+            result.append(entry)
+        return result
+
+    @staticmethod
+    @write_operation
+    def apply_batch(operations: List[Dict[str, Any]], expected_version: int = None) -> Dict[str, Any]:
+        """在一个事务中按顺序执行批量操作（validate_batch 的结果），返回 {'version', 'holdings'}。
+
+        一次查出涉及的持仓，在内存中按顺序合并出最终状态，再用一条 DELETE、一次批量 INSERT、
+        一次按主键的批量 UPDATE 写回，流水同样一次写入。操作不存在的持仓时抛出 ValueError，整批回滚；
+        expected_version 已过期时抛出 HoldingsVersionConflict。
+        """
+        version = HoldingService.bump_version(expected_version)
+
+        codes = {o['code'] for o in operations if 'code' in o}
+        codes.update(c for o in operations if o['op'] == 'reorder' for c in o['codes'])
+        rows = db.session.query(
+            Holding.id, Holding.code, Holding.name, Holding.amount, Holding.sort_order
+        ).filter(Holding.code.in_(codes)).all()
+        ids = {r.code: r.id for r in rows}
+        original = {r.code: {'name': r.name, 'amount': float(r.amount or 0), 'sort_order': r.sort_order} for r in rows}
+        # code -> 最终状态；None 表示已删除
+        state = {code: dict(h) for code, h in original.items()}
+
+        next_sort = None
+        ledger = []
+        for i, o in enumerate(operations, 1):
+            op = o['op']
+            if op == 'reorder':
+                for idx, code in enumerate(o['codes']):
+                    if state.get(code) is not None:
+                        state[code]['sort_order'] = idx
+                continue
+
+            code = o['code']
+            current = state.get(code)
+            if op == 'upsert':
+                name = o['name']
+                if current is None:
+                    name = name or fund_directory.name_of(code)
+                    # 新增时排在最后（最大 sort_order 每批只查询一次）
+                    if next_sort is None:
+                        next_sort = (db.session.query(func.max(Holding.sort_order)).scalar() or 0) + 1
+                    state[code] = {'name': name, 'amount': o['amount'], 'sort_order': next_sort}
+                    next_sort += 1
+                    ledger.append({'code': code, 'delta': o['amount'], 'kind': 'open'})
+                else:
+                    ledger.append({'code': code, 'delta': o['amount'] - current['amount'], 'kind': 'set'})
+                    current['amount'] = o['amount']
+                    # 未提供名称时不覆盖已有名称
+                    if name:
+                        current['name'] = name
+                    elif not current['name']:
+                        current['name'] = fund_directory.name_of(code)
+            elif current is None:
+                raise ValueError(f'第 {i} 个操作：持仓 {code} 不存在')
+            elif op == 'adjust':
+                new_amount = max(0.0, current['amount'] + o['delta'])
+                ledger.append({'code': code, 'delta': new_amount - current['amount'], 'kind': 'adjust'})
+                current['amount'] = new_amount
+            else:
+                ledger.append({'code': code, 'delta': -current['amount'], 'kind': 'close'})
+                state[code] = None
+
+        deleted = [code for code in original if state[code] is None]
+        inserted = [dict(h, code=code) for code, h in state.items() if h is not None and code not in original]
+        updated = [dict(h, id=ids[code]) for code, h in state.items()
+                   if h is not None and code in original and h != original[code]]
+        if deleted:
+            Holding.query.filter(Holding.code.in_(deleted)).delete(synchronize_session=False)
+        if inserted:
+            db.session.execute(insert(Holding), inserted)
+        if updated:
+            # 按主键批量 UPDATE（executemany）
+            db.session.execute(update(Holding), updated)
+        LedgerService.record_many(ledger)
+        nav_backfill.enqueue([h['code'] for h in inserted])
+        return {'version': version, 'holdings': HoldingService.get_all_holdings()}
+
+    @staticmethod
+    @write_operation
     def init_default_holdings():
         """初始化默认持仓数据"""
         default_holdings = {
@@ -182,75 +622,346 @@ class HoldingService:
             if not Holding.query.filter_by(code=code).first():
                 holding = Holding(code=code, amount=data['amount'], name=data['name'])
                 db.session.add(holding)
-        db.session.commit()
+                LedgerService.record(code, data['amount'], 'open')
+        HoldingService.bump_version()
 
 
 class FundSnapshotService:
     """基金快照服务"""
+
+    # 最近一批刷新结果：(获取时间, 持仓版本号, {'funds': [...], 'update_time': ...})
+    _latest: Optional[Tuple[float, int, Dict]] = None
+    _refresh_lock = threading.Lock()
+    # 每只基金最近一次保存的快照 (name, rate, amount)：估值复用缓存时不重复写入相同的点
+    _last_saved: Dict[str, Tuple] = {}
     
     @staticmethod
-    def refresh_all_funds() -> List[Dict]:
-        """刷新所有基金数据"""
-        holdings = HoldingService.get_holdings_dict()
+    def build_results(holdings: Dict[str, float], max_age: float = None) -> Tuple[List[Dict], List[Dict]]:
+        """按持仓计算每只基金的估值盈亏（只读，不写数据库），返回 (结果列表, 待保存的快照行)；
+        max_age 同 FundAPIService.get_quotes"""
+        quotes = FundAPIService.get_quotes(list(holdings.keys()), max_age)
         results = []
-        
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            futures = {
-                executor.submit(FundAPIService.fetch_fund_data, code): code 
-                for code in holdings.keys()
-            }
-            for future in concurrent.futures.as_completed(futures):
-                code = futures[future]
-                data = future.result()
-                amount = holdings.get(code, 0)
-                
-                if data:
-                    profit = amount * (data['rate'] / 100)
-                    result = {
-                        'code': code,
-                        'name': data['name'],
-                        'rate': data['rate'],
-                        'profit': profit,
-                        'amount': amount,
-                        'success': True
-                    }
-                    
-                    # 保存快照
-                    snapshot = FundSnapshot(
-                        code=code,
-                        name=data['name'],
-                        rate=data['rate'],
-                        profit=profit,
-                        amount=amount
-                    )
-                    db.session.add(snapshot)
-                else:
-                    result = {
-                        'code': code,
-                        'name': '获取失败',
-                        'rate': 0,
-                        'profit': 0,
-                        'amount': amount,
-                        'success': False
-                    }
-                
-                results.append(result)
-        
-        db.session.commit()
+        snapshot_rows = []
+        now = datetime.utcnow()
+        for code, amount in holdings.items():
+            data = quotes.get(code)
+            if data:
+                profit = amount * (data['rate'] / 100)
+                results.append({
+                    'code': code,
+                    'name': data['name'],
+                    'rate': data['rate'],
+                    'profit': profit,
+                    'amount': amount,
+                    'success': True
+                })
+                # 待保存的快照
+                snapshot_rows.append({
+                    'code': code,
+                    'name': data['name'],
+                    'rate': data['rate'],
+                    'profit': profit,
+                    'amount': amount,
+                    'snapshot_time': now
+                })
+            else:
+                results.append({
+                    'code': code,
+                    'name': '获取失败',
+                    'rate': 0,
+                    'profit': 0,
+                    'amount': amount,
+                    'success': False
+                })
         
         # 按盈亏排序
         results.sort(key=lambda x: x.get('profit', 0), reverse=True)
+        return results, snapshot_rows
+
+    @staticmethod
+    def refresh_all_funds(force: bool = False) -> List[Dict]:
+        """刷新所有基金数据；force 时不使用估值缓存（用户显式刷新）。
+
+        与上次保存的快照完全相同（估值来自缓存且持仓未变）的基金不再写入快照，避免历史中出现重复的点。
+        """
+        # 版本号先于持仓读取：读取期间持仓被修改时记录的是旧版本号，下次 get_live 会重新刷新
+        version = HoldingService.get_version()
+        holdings = HoldingService.get_holdings_dict()
+        results, snapshot_rows = FundSnapshotService.build_results(holdings, 0 if force else None)
+        
+        last_saved = FundSnapshotService._last_saved
+        snapshot_rows = [r for r in snapshot_rows
+                         if last_saved.get(r['code']) != (r['name'], r['rate'], r['amount'])]
+        # PostgreSQL 原生分区：每天检查一次，提前建好后续月份的分区
+        dialects.maintain_snapshot_partitions()
+        FundSnapshotService.save_snapshots(snapshot_rows)
+        last_saved.update((r['code'], (r['name'], r['rate'], r['amount'])) for r in snapshot_rows)
+        # 用本批行情评估告警规则（不查询数据库）
+        alert_engine.evaluate(results)
+        
+        FundSnapshotService._latest = (time.monotonic(), version, {
+            'funds': results,
+            'update_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        })
         return results
+
+    @staticmethod
+    def get_live(max_age: float) -> Dict:
+        """最近一批刷新结果；超过 max_age 秒或持仓已修改（版本号变化，含其他进程的修改）时重新刷新，
+        并发请求只触发一次刷新"""
+        def fresh():
+            latest = FundSnapshotService._latest
+            if (latest is not None and time.monotonic() - latest[0] <= max_age
+                    and latest[1] == HoldingService.get_version()):
+                return latest[2]
+            return None
+
+        data = fresh()
+        if data is not None:
+            return data
+        with FundSnapshotService._refresh_lock:
+            data = fresh()
+            if data is None:
+                FundSnapshotService.refresh_all_funds()
+                data = FundSnapshotService._latest[2]
+        return data
     
     @staticmethod
-    def get_history(code: str, days: int = 7) -> List[Dict]:
-        """获取基金历史数据"""
+    @write_operation
+    def save_snapshots(snapshot_rows: List[Dict]) -> None:
+        """批量写入快照并更新日汇总"""
+        if not snapshot_rows:
+            return
+        db.session.execute(insert(FundSnapshot), snapshot_rows)
+        FundSnapshotService.update_daily_rollups(snapshot_rows)
+
+    @staticmethod
+    def update_daily_rollups(snapshot_rows: List[Dict]) -> None:
+        """用快照（字段同 FundSnapshot 的字典）更新日汇总，每只基金每天保留最后一条；不提交事务"""
+        if not snapshot_rows:
+            return
+
+        rows = [{
+            'code': s['code'],
+            'day': s['snapshot_time'].date(),
+            'name': s['name'],
+            'rate': s['rate'],
+            'profit': s['profit'],
+            'amount': s['amount'],
+            'last_time': s['snapshot_time']
+        } for s in snapshot_rows]
+
+        stmt = dialects.insert(FundDailyRollup)
+        if stmt is not None:
+            stmt = stmt.values(rows)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=['code', 'day'],
+                set_={
+                    'name': stmt.excluded.name,
+                    'rate': stmt.excluded.rate,
+                    'profit': stmt.excluded.profit,
+                    'amount': stmt.excluded.amount,
+                    'last_time': stmt.excluded.last_time
+                },
+                where=stmt.excluded.last_time >= FundDailyRollup.last_time
+            )
+            db.session.execute(stmt)
+            return
+
+        # 其他数据库：逐行查询后更新
+        for row in rows:
+            rollup = FundDailyRollup.query.filter_by(code=row['code'], day=row['day']).first()
+            if rollup is None:
+                db.session.add(FundDailyRollup(**row))
+            elif rollup.last_time <= row['last_time']:
+                for key, value in row.items():
+                    setattr(rollup, key, value)
+
+    @staticmethod
+    def _snapshot_row(row) -> Dict:
+        """查询结果行 -> 与 FundSnapshot.to_dict 相同结构的字典"""
+        return {
+            'code': row.code,
+            'name': row.name,
+            'rate': row.rate,
+            'profit': row.profit,
+            'amount': row.amount,
+            'snapshot_time': row.snapshot_time.isoformat() if row.snapshot_time else None
+        }
+
+    @staticmethod
+    def encode_cursor(snapshot_time: datetime, snapshot_id: int) -> str:
+        return f"{snapshot_time.isoformat()}_{snapshot_id}"
+
+    @staticmethod
+    def decode_cursor(cursor: str):
+        """游标 -> (snapshot_time, id)；格式不正确时抛出 ValueError"""
+        time_part, _, id_part = cursor.rpartition('_')
+        return datetime.fromisoformat(time_part), int(id_part)
+
+    @staticmethod
+    def get_history_page(code: str, days: int = 7, limit: int = 1000, after: str = None) -> Dict:
+        """按时间顺序分页获取原始快照（keyset 分页）。
+
+        返回 {'items': [...], 'next_cursor': str|None}；next_cursor 传回 after 获取下一页。
+        """
         start_time = datetime.utcnow() - timedelta(days=days)
-        snapshots = FundSnapshot.query.filter(
+        query = db.session.query(
+            FundSnapshot.id, FundSnapshot.code, FundSnapshot.name, FundSnapshot.rate,
+            FundSnapshot.profit, FundSnapshot.amount, FundSnapshot.snapshot_time
+        ).filter(
             FundSnapshot.code == code,
             FundSnapshot.snapshot_time >= start_time
-        ).order_by(FundSnapshot.snapshot_time).all()
-        return [s.to_dict() for s in snapshots]
+        )
+        if after:
+            after_time, after_id = FundSnapshotService.decode_cursor(after)
+            query = query.filter(or_(
+                FundSnapshot.snapshot_time > after_time,
+                and_(FundSnapshot.snapshot_time == after_time, FundSnapshot.id > after_id)
+            ))
+        # 多取一条用于判断是否还有下一页
+        rows = query.order_by(FundSnapshot.snapshot_time, FundSnapshot.id).limit(limit + 1).all()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = FundSnapshotService.encode_cursor(rows[-1].snapshot_time, rows[-1].id)
+        return {
+            'items': [FundSnapshotService._snapshot_row(r) for r in rows],
+            'next_cursor': next_cursor
+        }
+
+    @staticmethod
+    def _raw_rows(codes: List[str], start_time: datetime) -> List:
+        """读取多只基金时间窗口内的原始快照（按 code、时间排序，走覆盖索引）"""
+        return db.session.query(
+            FundSnapshot.code, FundSnapshot.name, FundSnapshot.rate,
+            FundSnapshot.profit, FundSnapshot.amount, FundSnapshot.snapshot_time
+        ).filter(
+            FundSnapshot.code.in_(codes),
+            FundSnapshot.snapshot_time >= start_time
+        ).order_by(FundSnapshot.code, FundSnapshot.snapshot_time).all()
+
+    @staticmethod
+    def _bucketed_rows(codes: List[str], start_time: datetime, resolution: int) -> List:
+        """在数据库中按 (code, 时间桶) 聚合：每桶取最后一条快照，附带桶内 rate/profit 的最小/最大值"""
+        bucket = dialects.time_bucket(FundSnapshot.snapshot_time, resolution)
+        buckets = db.session.query(
+            FundSnapshot.code.label('code'),
+            bucket.label('bucket'),
+            func.max(FundSnapshot.snapshot_time).label('last_time'),
+            func.min(FundSnapshot.rate).label('rate_min'),
+            func.max(FundSnapshot.rate).label('rate_max'),
+            func.min(FundSnapshot.profit).label('profit_min'),
+            func.max(FundSnapshot.profit).label('profit_max')
+        ).filter(
+            FundSnapshot.code.in_(codes),
+            FundSnapshot.snapshot_time >= start_time
+        ).group_by(FundSnapshot.code, bucket).subquery()
+
+        rows = db.session.query(
+            FundSnapshot.code, FundSnapshot.name, FundSnapshot.rate,
+            FundSnapshot.profit, FundSnapshot.amount, FundSnapshot.snapshot_time,
+            buckets.c.bucket, buckets.c.rate_min, buckets.c.rate_max,
+            buckets.c.profit_min, buckets.c.profit_max
+        ).join(
+            buckets,
+            and_(FundSnapshot.code == buckets.c.code, FundSnapshot.snapshot_time == buckets.c.last_time)
+        ).order_by(buckets.c.code, buckets.c.bucket).all()
+
+        # 同一时间点存在多条快照时只保留一条
+        result = []
+        last_key = None
+        for r in rows:
+            if (r.code, r.bucket) == last_key:
+                continue
+            last_key = (r.code, r.bucket)
+            result.append(r)
+        return result
+
+    @staticmethod
+    def _lttb_rows(rows: List, threshold: int) -> List:
+        return downsample.lttb(rows, threshold, x=lambda r: r.snapshot_time.timestamp(), y=lambda r: r.rate)
+
+    @staticmethod
+    def get_history_downsampled(code: str, days: int = 7, points: int = None,
+                                resolution: int = None, mode: str = downsample.MODE_BUCKET) -> Dict:
+        """获取降采样后的历史数据，返回点数约为 points（或按 resolution 秒分桶）。
+
+        bucket 模式在数据库中按时间分桶聚合：每桶取最后一条快照，并附带桶内 rate/profit 的最小/最大值；
+        lttb 模式读取原始点后用 LTTB 选取保留曲线形状的代表点（按 rate）。
+        返回 {'items': [...], 'resolution': 桶宽秒数}
+        """
+        if resolution is None:
+            resolution = downsample.bucket_seconds_for(days, points or 500)
+        start_time = datetime.utcnow() - timedelta(days=days)
+
+        if mode == downsample.MODE_LTTB:
+            rows = FundSnapshotService._raw_rows([code], start_time)
+            threshold = points or max(3, math.ceil(days * 86400 / resolution))
+            picked = FundSnapshotService._lttb_rows(rows, threshold)
+            return {
+                'items': [FundSnapshotService._snapshot_row(r) for r in picked],
+                'resolution': resolution
+            }
+
+        items = []
+        for r in FundSnapshotService._bucketed_rows([code], start_time, resolution):
+            item = FundSnapshotService._snapshot_row(r)
+            item.update({
+                'rate_min': r.rate_min,
+                'rate_max': r.rate_max,
+                'profit_min': r.profit_min,
+                'profit_max': r.profit_max
+            })
+            items.append(item)
+        return {'items': items, 'resolution': resolution}
+
+    @staticmethod
+    def get_history_batch(codes: List[str], days: int = 7, points: int = None,
+                          resolution: int = None, mode: str = downsample.MODE_BUCKET) -> Dict:
+        """一次查询获取多只基金的历史序列（紧凑格式）。
+
+        返回 {'base': 起始 Unix 秒, 'resolution': 桶宽秒数或 None, 'series': {code: {...}}}，
+        每个序列为列式数组：t 为相对 base 的秒数差分编码（首项相对 base，其余相对前一项），
+        以及 rate / profit / amount；bucket 降采样时另有 rate_min / rate_max / profit_min / profit_max。
+        """
+        start_time = datetime.utcnow() - timedelta(days=days)
+        base = int(start_time.replace(tzinfo=timezone.utc).timestamp())
+
+        downsampled = bool(points or resolution)
+        if downsampled and resolution is None:
+            resolution = downsample.bucket_seconds_for(days, points)
+
+        if downsampled and mode != downsample.MODE_LTTB:
+            rows = FundSnapshotService._bucketed_rows(codes, start_time, resolution)
+            extra = ('rate_min', 'rate_max', 'profit_min', 'profit_max')
+        else:
+            rows = FundSnapshotService._raw_rows(codes, start_time)
+            extra = ()
+
+        grouped = {}
+        for r in rows:
+            grouped.setdefault(r.code, []).append(r)
+
+        series = {}
+        for code, items in grouped.items():
+            if downsampled and mode == downsample.MODE_LTTB:
+                threshold = points or max(3, math.ceil(days * 86400 / resolution))
+                items = FundSnapshotService._lttb_rows(items, threshold)
+            seconds = [int(r.snapshot_time.replace(tzinfo=timezone.utc).timestamp()) - base for r in items]
+            entry = {
+                'name': items[-1].name,
+                't': downsample.delta_encode(seconds),
+                'rate': [r.rate for r in items],
+                'profit': [r.profit for r in items],
+                'amount': [r.amount for r in items]
+            }
+            for field in extra:
+                entry[field] = [getattr(r, field) for r in items]
+            series[code] = entry
+
+        return {'base': base, 'resolution': resolution if downsampled else None, 'series': series}
     
     @staticmethod
     def get_today_summary() -> Dict:
@@ -271,22 +982,13 @@ class FundSnapshotService:
                 'update_time': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
         
-        # 获取今日最新快照数据
+        # 获取今日最新快照数据：日汇总表每只基金每天只有一行（当天最后一条快照），
+        # 按 (code, day) 唯一索引直接定位，无需扫描今日全部快照再去重
         today = datetime.utcnow().date()
-        today_start = datetime.combine(today, datetime.min.time())
-        
-        latest_snapshots = db.session.query(FundSnapshot).filter(
-            FundSnapshot.snapshot_time >= today_start,
-            FundSnapshot.code.in_(holding_codes)
-        ).order_by(FundSnapshot.snapshot_time.desc()).all()
-        
-        # 按code去重，取最新
-        seen = set()
-        unique_snapshots = []
-        for s in latest_snapshots:
-            if s.code not in seen:
-                seen.add(s.code)
-                unique_snapshots.append(s)
+        unique_snapshots = FundDailyRollup.query.filter(
+            FundDailyRollup.day == today,
+            FundDailyRollup.code.in_(holding_codes)
+        ).all()
         
         # 计算盈亏
         total_profit = sum(s.profit for s in unique_snapshots)
@@ -304,8 +1006,8 @@ class FundSnapshotService:
         }
     
     @staticmethod
-    def get_profit_trend(days: int = 7) -> List[Dict]:
-        """获取盈亏趋势数据"""
+    def get_profit_trend(days: int = 7, points: int = None, mode: str = downsample.MODE_BUCKET) -> List[Dict]:
+        """获取盈亏趋势数据；指定 points 时降采样到不超过 points 个点"""
         holdings = Holding.query.all()
         holding_codes = [h.code for h in holdings]
         if not holding_codes:
@@ -315,40 +1017,143 @@ class FundSnapshotService:
         
         # 口径说明：每只基金每天只取“当天最后一条快照”（最新一次刷新结果），
         # 再对当天所有持仓求和，避免同一天多次刷新导致重复累计。
-        from sqlalchemy import func
-
-        day_col = func.date(FundSnapshot.snapshot_time)
-        latest_per_code_day = db.session.query(
-            FundSnapshot.code.label('code'),
-            day_col.label('day'),
-            func.max(FundSnapshot.snapshot_time).label('max_time')
-        ).filter(
-            FundSnapshot.snapshot_time >= start_time,
-            FundSnapshot.code.in_(holding_codes)
-        ).group_by(
-            FundSnapshot.code,
-            day_col
-        ).subquery()
-
-        latest_rows = db.session.query(FundSnapshot).join(
-            latest_per_code_day,
-            (FundSnapshot.code == latest_per_code_day.c.code) &
-            (FundSnapshot.snapshot_time == latest_per_code_day.c.max_time)
-        ).subquery()
-
+        # 每天最后一条快照已由 fund_daily_rollups 维护，这里直接按天聚合。
         daily_stats = db.session.query(
-            latest_rows.c.snapshot_time,
-            func.date(latest_rows.c.snapshot_time).label('date'),
-            func.sum(latest_rows.c.profit).label('total_profit'),
-            func.sum(latest_rows.c.amount).label('total_amount')
+            FundDailyRollup.day.label('date'),
+            func.sum(FundDailyRollup.profit).label('total_profit'),
+            func.sum(FundDailyRollup.amount).label('total_amount')
+        ).filter(
+            FundDailyRollup.day >= start_time.date(),
+            FundDailyRollup.last_time >= start_time,
+            FundDailyRollup.code.in_(holding_codes)
         ).group_by(
-            func.date(latest_rows.c.snapshot_time)
+            FundDailyRollup.day
         ).order_by(
-            func.date(latest_rows.c.snapshot_time)
+            FundDailyRollup.day
         ).all()
 
-        return [{
+        trend = [{
             'date': str(stat.date),
             'profit': float(stat.total_profit or 0),
             'amount': float(stat.total_amount or 0)
         } for stat in daily_stats]
+
+        if points and len(trend) > points:
+            if mode == downsample.MODE_LTTB:
+                trend = downsample.lttb(
+                    trend, points,
+                    x=lambda r: datetime.fromisoformat(r['date']).timestamp(),
+                    y=lambda r: r['profit']
+                )
+            else:
+                trend = downsample.bucket_rows(trend, points, fields=('profit',))
+        return trend
+
+
+class AlertService:
+    """告警规则管理服务（规则变更后通知告警引擎重新加载）"""
+    
+    FIELDS = ('name', 'metric', 'op', 'threshold', 'code', 'cooldown', 'sinks', 'webhook_url', 'enabled')
+    
+    @staticmethod
+    def get_rules() -> List[Dict]:
+        """获取所有告警规则"""
+        rules = AlertRule.query.order_by(AlertRule.id.asc()).all()
+        return [r.to_dict() for r in rules]
+    
+    @staticmethod
+    def validate_rule(data: Dict[str, Any], partial: bool = False) -> Dict[str, Any]:
+        """校验并规范化规则字段；不合法时抛出 ValueError"""
+        values = {k: data[k] for k in AlertService.FIELDS if k in data}
+        if not partial:
+            for key in ('metric', 'op', 'threshold'):
+                if values.get(key) is None:
+                    raise ValueError(f'{key} 不能为空')
+        
+        if 'metric' in values and values['metric'] not in alerts.METRICS:
+            raise ValueError(f"metric 只支持 {'/'.join(alerts.METRICS)}")
+        if 'op' in values and values['op'] not in alerts.OPS:
+            raise ValueError(f"op 只支持 {' '.join(alerts.OPS)}")
+        try:
+            if 'threshold' in values:
+                values['threshold'] = float(values['threshold'])
+            if 'cooldown' in values:
+                values['cooldown'] = int(values['cooldown'])
+        except (TypeError, ValueError):
+            raise ValueError('threshold / cooldown 必须为数字')
+        if values.get('cooldown', 0) < 0:
+            raise ValueError('cooldown 不能为负数')
+        
+        if 'code' in values:
+            code = str(values['code'] or '').strip()
+            if code and not code.isdigit():
+                raise ValueError('基金代码格式不正确')
+            values['code'] = code or None
+        if 'sinks' in values:
+            sinks = values['sinks']
+            if isinstance(sinks, str):
+                sinks = sinks.split(',')
+            if not isinstance(sinks, list) or not all(isinstance(s, str) and s.strip() for s in sinks):
+                raise ValueError('sinks 必须为字符串数组')
+            sinks = [s.strip() for s in sinks]
+            unknown = [s for s in sinks if s not in alert_engine.sinks]
+            if unknown:
+                raise ValueError(f"不支持的 sinks: {', '.join(unknown)}（可选 {'/'.join(alert_engine.sinks)}）")
+            values['sinks'] = ','.join(sinks)
+        if 'enabled' in values:
+            values['enabled'] = bool(values['enabled'])
+        return values
+    
+    @staticmethod
+    @write_operation
+    def _save_rule(rule_id: Optional[int], values: Dict[str, Any]) -> Optional[Dict]:
+        if rule_id is None:
+            rule = AlertRule(**values)
+            db.session.add(rule)
+        else:
+            rule = db.session.get(AlertRule, rule_id)
+            if rule is None:
+                return None
+            for key, value in values.items():
+                setattr(rule, key, value)
+        db.session.flush()
+        AlertService._bump_version()
+        return rule.to_dict()
+    
+    @staticmethod
+    def add_rule(data: Dict[str, Any]) -> Dict:
+        """新增规则"""
+        rule = AlertService._save_rule(None, AlertService.validate_rule(data))
+        alert_engine.invalidate()
+        return rule
+    
+    @staticmethod
+    def update_rule(rule_id: int, data: Dict[str, Any]) -> Optional[Dict]:
+        """修改规则（只更新传入的字段）；规则不存在时返回 None"""
+        rule = AlertService._save_rule(rule_id, AlertService.validate_rule(data, partial=True))
+        alert_engine.invalidate()
+        return rule
+    
+    @staticmethod
+    @write_operation
+    def _delete_rule(rule_id: int) -> bool:
+        if AlertRule.query.filter_by(id=rule_id).delete() == 0:
+            return False
+        AlertService._bump_version()
+        return True
+
+    @staticmethod
+    def _bump_version() -> None:
+        """规则版本号加一（需在写操作内调用），各进程的告警引擎在下次评估时重新加载规则"""
+        stmt = update(AlertRulesVersion).where(AlertRulesVersion.id == 1).values(
+            version=AlertRulesVersion.version + 1
+        )
+        if not db.session.execute(stmt).rowcount:
+            db.session.add(AlertRulesVersion(id=1, version=1))
+    
+    @staticmethod
+    def delete_rule(rule_id: int) -> bool:
+        """删除规则"""
+        deleted = AlertService._delete_rule(rule_id)
+        alert_engine.invalidate()
+        return deleted
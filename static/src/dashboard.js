@@ -0,0 +1,497 @@
+let countdown = 60;
+let timer = null;
+let trendChart = null;
+let pieChart = null;
+
+document.addEventListener('DOMContentLoaded', () => {
+    initCharts();
+    refreshData();
+    startTimer();
+});
+
+function startTimer() {
+    timer = setInterval(() => {
+        countdown--;
+        document.getElementById('countdown').textContent = countdown + '秒后刷新';
+        if (countdown <= 0) {
+            refreshData();
+            countdown = 60;
+        }
+    }, 1000);
+}
+
+async function refreshData() {
+    try {
+        const res = await fetch('/api/refresh', { method: 'POST' });
+        const json = await res.json();
+        if (json.success) {
+            renderSummary(json.data.summary);
+            renderFundList(json.data.funds);
+            updatePieChart(json.data.funds);
+            loadTrend();
+        }
+    } catch (e) {
+        showToast('error', '刷新失败: ' + e.message);
+    }
+}
+
+function renderSummary(s) {
+    document.getElementById('totalAmount').textContent = s.total_amount.toFixed(2);
+
+    const profitEl = document.getElementById('totalProfit');
+    const profit = s.total_profit;
+    profitEl.textContent = (profit >= 0 ? '+' : '') + profit.toFixed(2);
+    profitEl.className = 'stat-value ' + (profit >= 0 ? 'rise' : 'fall');
+
+    const rateEl = document.getElementById('totalRate');
+    const rate = s.total_rate;
+    rateEl.textContent = (rate >= 0 ? '+' : '') + rate.toFixed(2) + '%';
+    rateEl.className = 'stat-value ' + (rate >= 0 ? 'rise' : 'fall');
+
+    document.getElementById('dataStatus').innerHTML = 
+        `<span class="badge ${s.success_count === s.total_count ? 'badge-success' : 'badge-danger'}">${s.success_count}/${s.total_count}</span>`;
+    document.getElementById('updateTime').textContent = s.update_time;
+}
+
+function renderFundList(funds) {
+    const tbody = document.getElementById('fundList');
+    tbody.innerHTML = funds.map(f => {
+        const cls = f.rate >= 0 ? 'rise' : 'fall';
+        const bars = renderBars(f.rate);
+        const safeName = encodeURIComponent(f.name || '');
+        return `
+            <tr draggable="true" data-code="${f.code}">
+                <td><span class="fund-code">${f.code}</span></td>
+                <td class="fund-name">${f.name || '--'}</td>
+                <td>${f.amount.toFixed(2)}</td>
+                <td class="${cls}">${f.profit >= 0 ? '+' : ''}${f.profit.toFixed(2)}</td>
+                <td class="${cls}">${f.rate >= 0 ? '+' : ''}${f.rate.toFixed(2)}%</td>
+                <td><div class="volatility-bar">${bars}</div></td>
+                <td>
+                    <button class="btn-action success" data-action="adjust" data-code="${f.code}" data-sign="1" title="加仓">
+                        <i class="bi bi-plus-lg"></i>
+                    </button>
+                    <button class="btn-action ms-1" data-action="adjust" data-code="${f.code}" data-sign="-1" title="减仓">
+                        <i class="bi bi-dash-lg"></i>
+                    </button>
+                    <button class="btn-action ms-1" data-action="edit" data-code="${f.code}" data-name="${safeName}" data-amount="${f.amount}" title="编辑">
+                        <i class="bi bi-pencil"></i>
+                    </button>
+                    <button class="btn-action danger ms-1" data-action="delete" data-code="${f.code}" title="删除">
+                        <i class="bi bi-trash"></i>
+                    </button>
+                </td>
+            </tr>
+        `;
+    }).join('');
+}
+
+// 拖拽排序（持久化）
+let draggingRow = null;
+
+document.getElementById('fundList').addEventListener('dragstart', (e) => {
+    const tr = e.target.closest('tr[draggable="true"]');
+    if (!tr) return;
+    draggingRow = tr;
+    tr.style.opacity = '0.6';
+    e.dataTransfer.effectAllowed = 'move';
+});
+
+document.getElementById('fundList').addEventListener('dragend', (e) => {
+    const tr = e.target.closest('tr[draggable="true"]');
+    if (tr) tr.style.opacity = '';
+    draggingRow = null;
+});
+
+document.getElementById('fundList').addEventListener('dragover', (e) => {
+    e.preventDefault();
+    const overRow = e.target.closest('tr[draggable="true"]');
+    if (!draggingRow || !overRow || draggingRow === overRow) return;
+
+    const rect = overRow.getBoundingClientRect();
+    const next = (e.clientY - rect.top) > (rect.height / 2);
+    const parent = overRow.parentNode;
+    parent.insertBefore(draggingRow, next ? overRow.nextSibling : overRow);
+});
+
+document.getElementById('fundList').addEventListener('drop', async (e) => {
+    e.preventDefault();
+    await persistOrder();
+});
+
+async function persistOrder() {
+    const codes = Array.from(document.querySelectorAll('#fundList tr[data-code]'))
+        .map(tr => tr.getAttribute('data-code'))
+        .filter(Boolean);
+
+    if (!codes.length) return;
+
+    try {
+        const res = await fetch('/api/holdings/reorder', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ codes })
+        });
+        const json = await res.json();
+        if (json.success) {
+            showToast('success', '排序已保存');
+        } else {
+            showToast('error', json.message || '排序保存失败');
+        }
+    } catch (e) {
+        showToast('error', '排序保存失败: ' + e.message);
+    }
+}
+
+document.getElementById('fundList').addEventListener('click', (e) => {
+    const btn = e.target.closest('button[data-action]');
+    if (!btn) return;
+
+    const action = btn.dataset.action;
+    const code = btn.dataset.code;
+
+    if (action === 'adjust') {
+        const sign = parseFloat(btn.dataset.sign || '0');
+        if (!Number.isFinite(sign) || (sign !== 1 && sign !== -1)) return;
+        quickAdjustByInput(code, sign);
+        return;
+    }
+
+    if (action === 'edit') {
+        const name = decodeURIComponent(btn.dataset.name || '');
+        const amount = parseFloat(btn.dataset.amount || '0');
+        editHolding(code, name, amount);
+        return;
+    }
+
+    if (action === 'delete') {
+        deleteHolding(code);
+        return;
+    }
+});
+
+function renderBars(rate) {
+    const n = Math.min(Math.floor(Math.abs(rate) / 0.2), 15);
+    const cls = rate >= 0 ? 'rise' : 'fall';
+    return Array(n).fill(`<div class="vol-bar ${cls}"></div>`).join('');
+}
+
+function initCharts() {
+    const ctx1 = document.getElementById('trendChart').getContext('2d');
+    trendChart = new Chart(ctx1, {
+        type: 'line',
+        data: {
+            labels: [],
+            datasets: [{
+                label: '盈亏',
+                data: [],
+                borderColor: '#5f9ea0',
+                backgroundColor: 'rgba(95,158,160,0.1)',
+                fill: true,
+                tension: 0.4,
+                pointRadius: 3,
+                pointHoverRadius: 5
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: { display: false },
+                tooltip: {
+                    backgroundColor: 'rgba(17,17,26,0.95)',
+                    titleColor: '#f6f7fb',
+                    bodyColor: '#f6f7fb',
+                    borderColor: 'rgba(255,255,255,0.10)',
+                    borderWidth: 1
+                }
+            },
+            scales: {
+                x: {
+                    grid: { color: 'rgba(255,255,255,0.08)' },
+                    ticks: { color: '#c7ccda' }
+                },
+                y: {
+                    grid: { color: 'rgba(255,255,255,0.08)' },
+                    ticks: { color: '#c7ccda' }
+                }
+            }
+        }
+    });
+
+    const ctx2 = document.getElementById('pieChart').getContext('2d');
+    pieChart = new Chart(ctx2, {
+        type: 'doughnut',
+        data: {
+            labels: [],
+            datasets: [{
+                data: [],
+                backgroundColor: ['#5f9ea0','#ff4757','#2ed573','#ffa502','#a55eea','#ff6b81','#1e90ff','#ff9ff3']
+            }]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: false,
+            plugins: {
+                legend: {
+                    position: 'bottom',
+                    labels: {
+                        color: '#c7ccda',
+                        font: { size: 10 },
+                        boxWidth: 12,
+                        generateLabels: (chart) => {
+                            const ds = chart.data.datasets?.[0] || {};
+                            const labels = chart.data.labels || [];
+                            const values = (ds.data || []).map(v => Number(v) || 0);
+                            const total = values.reduce((a, b) => a + b, 0) || 0;
+                            const bg = Array.isArray(ds.backgroundColor) ? ds.backgroundColor : [];
+                            const border = Array.isArray(ds.borderColor) ? ds.borderColor : [];
+
+                            return labels.map((t, i) => {
+                                const name = (t ?? '').toString().trim() || '未命名';
+                                const v = values[i] || 0;
+                                const pct = total > 0 ? (v / total * 100) : 0;
+                                const hidden = !chart.getDataVisibility(i);
+                                return {
+                                    text: `${name} ${pct.toFixed(1)}%`,
+                                    fillStyle: bg[i] || bg[0] || '#5f9ea0',
+                                    strokeStyle: border[i] || border[0] || bg[i] || bg[0] || '#5f9ea0',
+                                    lineWidth: 1,
+                                    fontColor: '#c7ccda',
+                                    hidden,
+                                    index: i
+                                };
+                            });
+                        }
+                    }
+                },
+                tooltip: {
+                    backgroundColor: 'rgba(17,17,26,0.95)',
+                    titleColor: '#f6f7fb',
+                    bodyColor: '#f6f7fb',
+                    borderColor: 'rgba(255,255,255,0.10)',
+                    borderWidth: 1,
+                    callbacks: {
+                        label: (context) => {
+                            const label = context.label || context.chart?.data?.labels?.[context.dataIndex] || '未命名';
+                            const values = context.dataset.data.map(v => Number(v) || 0);
+                            const total = values.reduce((a, b) => a + b, 0) || 0;
+                            const v = Number(context.parsed) || 0;
+                            const pct = total > 0 ? (v / total * 100) : 0;
+                            return `${label}: ${v.toFixed(2)} (${pct.toFixed(1)}%)`;
+                        }
+                    }
+                }
+            }
+        }
+    });
+}
+
+async function loadTrend() {
+    const days = document.getElementById('trendDays').value;
+    try {
+        const res = await fetch(`/api/trend?days=${days}`);
+        const json = await res.json();
+        if (json.success && json.data.length > 0) {
+            trendChart.data.labels = json.data.map(d => d.date);
+            trendChart.data.datasets[0].data = json.data.map(d => d.profit);
+            trendChart.update();
+        }
+    } catch (e) { console.error(e); }
+}
+
+function updatePieChart(funds) {
+    const valid = funds.filter(f => f.success && f.amount > 0);
+    const top = valid.slice(0, 6);
+    const other = valid.slice(6).reduce((s, f) => s + f.amount, 0);
+
+    const labels = top.map(f => (f.name || f.code).substring(0, 6));
+    const data = top.map(f => f.amount);
+    if (other > 0) { labels.push('其他'); data.push(other); }
+
+    pieChart.data.labels = labels;
+    pieChart.data.datasets[0].data = data;
+    pieChart.update();
+}
+
+function editHolding(code, name, amount) {
+    document.getElementById('modalTitle').innerHTML = '<i class="bi bi-pencil me-2"></i>编辑持仓';
+    document.getElementById('editCode').value = code;
+    document.getElementById('fundCode').value = code;
+    document.getElementById('fundCode').readOnly = true;
+    document.getElementById('fundName').value = name;
+    document.getElementById('fundAmount').value = amount;
+    new bootstrap.Modal(document.getElementById('addModal')).show();
+}
+
+function saveHolding() {
+    const editCode = document.getElementById('editCode').value;
+    const code = document.getElementById('fundCode').value.trim();
+    const name = document.getElementById('fundName').value.trim();
+    const amount = parseFloat(document.getElementById('fundAmount').value);
+
+    if (!code || isNaN(amount)) {
+        showToast('error', '请填写完整信息');
+        return;
+    }
+
+    fetch('/api/holdings', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ code, name, amount })
+    })
+    .then(r => r.json())
+    .then(json => {
+        if (json.success) {
+            showToast('success', editCode ? '修改成功' : '添加成功');
+            bootstrap.Modal.getInstance(document.getElementById('addModal')).hide();
+            resetForm();
+            refreshData();
+        } else {
+            showToast('error', json.message);
+        }
+    })
+    .catch(e => showToast('error', '操作失败: ' + e.message));
+}
+
+function getQuickDelta() {
+    const el = document.getElementById('quickDelta');
+    const v = el ? parseFloat(el.value) : 100;
+    return Number.isFinite(v) && v > 0 ? v : 100;
+}
+
+// 覆盖：根据输入框的值进行加减
+function quickAdjustByInput(code, sign) {
+    const delta = getQuickDelta() * sign;
+    quickAdjust(code, delta);
+}
+
+async function clearHoldings() {
+    if (!confirm('确定要清空所有持仓吗？此操作不可恢复。')) return;
+    try {
+        const res = await fetch('/api/holdings/clear', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ clear_snapshots: false })
+        });
+        const json = await res.json();
+        if (json.success) {
+            showToast('success', '已清空持仓');
+            refreshData();
+        } else {
+            showToast('error', json.message || '清空失败');
+        }
+    } catch (e) {
+        showToast('error', '清空失败: ' + e.message);
+    }
+}
+
+async function exportHoldings() {
+    try {
+        const res = await fetch('/api/holdings/export');
+        const json = await res.json();
+        if (!json.success) {
+            showToast('error', json.message || '导出失败');
+            return;
+        }
+
+        const text = JSON.stringify(json.data, null, 2);
+        await navigator.clipboard.writeText(text);
+        showToast('success', '已复制导出JSON到剪贴板');
+    } catch (e) {
+        showToast('error', '导出失败: ' + e.message);
+    }
+}
+
+async function importHoldings() {
+    const text = (document.getElementById('importText')?.value || '').trim();
+    const replace = !!document.getElementById('importReplace')?.checked;
+
+    if (!text) {
+        showToast('error', '请输入要导入的 JSON');
+        return;
+    }
+
+    let items;
+    try {
+        items = JSON.parse(text);
+    } catch (e) {
+        showToast('error', 'JSON 解析失败');
+        return;
+    }
+
+    if (!Array.isArray(items)) {
+        showToast('error', 'JSON 必须是数组');
+        return;
+    }
+
+    try {
+        const res = await fetch('/api/holdings/import', {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/json' },
+            body: JSON.stringify({ items, replace })
+        });
+        const json = await res.json();
+        if (json.success) {
+            showToast('success', '导入成功');
+            bootstrap.Modal.getInstance(document.getElementById('importModal')).hide();
+            refreshData();
+        } else {
+            showToast('error', json.message || '导入失败');
+        }
+    } catch (e) {
+        showToast('error', '导入失败: ' + e.message);
+    }
+}
+
+function deleteHolding(code) {
+    if (!confirm('确定删除该持仓？')) return;
+    fetch(`/api/holdings/${code}`, { method: 'DELETE' })
+        .then(r => r.json())
+        .then(json => {
+            if (json.success) {
+                showToast('success', '删除成功');
+                refreshData();
+            } else {
+                showToast('error', json.message);
+            }
+        })
+        .catch(e => showToast('error', '删除失败'));
+}
+
+function quickAdjust(code, delta) {
+    fetch(`/api/holdings/${code}/adjust`, {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ delta_amount: delta })
+    })
+    .then(r => r.json())
+    .then(json => {
+        if (json.success) {
+            showToast('success', delta > 0 ? `已加仓 +${delta}` : `已减仓 ${delta}`);
+            refreshData();
+        } else {
+            showToast('error', json.message || '操作失败');
+        }
+    })
+    .catch(e => showToast('error', '操作失败: ' + e.message));
+}
+
+function resetForm() {
+    document.getElementById('editCode').value = '';
+    document.getElementById('fundCode').value = '';
+    document.getElementById('fundCode').readOnly = false;
+    document.getElementById('fundName').value = '';
+    document.getElementById('fundAmount').value = '';
+    document.getElementById('modalTitle').innerHTML = '<i class="bi bi-plus-circle me-2"></i>新增持仓';
+}
+
+function showToast(type, msg) {
+    const el = document.getElementById('toastBody');
+    const icon = type === 'success' ? 'bi-check-circle rise' : 'bi-exclamation-circle rise';
+    el.innerHTML = `<i class="bi ${icon} me-2"></i>${msg}`;
+    document.getElementById('toast').className = 'toast show';
+    setTimeout(() => document.getElementById('toast').classList.remove('show'), 2500);
+}
+
+document.getElementById('addModal').addEventListener('hidden.bs.modal', resetForm);